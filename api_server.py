@@ -1,6 +1,14 @@
-﻿from flask import Flask, jsonify, request
+﻿from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+import argparse
+import gzip
+import hashlib
+import json
+import os
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 app = Flask(__name__)
@@ -8,6 +16,345 @@ CORS(app)
 
 DB_PATH = Path(__file__).parent / 'odds_history.db'
 
+# Encoded responses kept per (route, args, database generation)
+CACHE_SIZE = 4096
+GZIP_MIN_BYTES = 1024
+
+HISTORY_COLUMNS = '''player_name, stat_type, draftkings_line, draftkings_over_odds, 
+                   draftkings_under_odds, fanduel_line, fanduel_over_odds, 
+                   fanduel_under_odds, recorded_at'''
+
+# Batch endpoint: parallel arrays per series, in this order
+SERIES_COLUMNS = ('recorded_at', 'draftkings_line', 'draftkings_over_odds', 'draftkings_under_odds',
+                  'fanduel_line', 'fanduel_over_odds', 'fanduel_under_odds')
+MAX_BATCH_PAIRS = 500
+# A game's props are re-read from Supabase at most this often
+GAME_PROPS_TTL = 60
+
+# Live feed (/api/stream): one poller for all clients, bounded coalescing queue per client
+POLL_SECONDS = 1.0
+COALESCE_SECONDS = 0.25
+MAX_PENDING = 1000
+HEARTBEAT_SECONDS = 15
+# Each open stream holds a worker thread: cap them (default half of --threads) so
+# regular requests keep the rest, and end streams with nothing to send so clients reconnect
+MAX_STREAMS = 16
+STREAM_IDLE_SECONDS = 300
+
+# ETags from an earlier server process must not match this one's generations
+SERVER_ID = f'{os.getpid()}-{time.time_ns()}'
+
+local = threading.local()
+cache = OrderedDict()
+cache_lock = threading.Lock()
+game_props = {}
+supabase_client = None
+
+class Reader:
+    '''Read-only connection for one server thread, plus the snapshot version it last saw'''
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        self.data_version = None
+        self.version = None
+        self.tables = set()
+
+    def snapshot_version(self):
+        '''Newest recorded_at; only re-read when another connection has committed'''
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != self.data_version:
+            self.tables = {row[0] for row in self.conn.execute('SELECT name FROM sqlite_master')}
+            # Compact databases (scripts/odds_store.py) keep snapshot times in their own table
+            source = 'snapshots' if 'snapshots' in self.tables else 'odds_history'
+            self.version = self.conn.execute(f'SELECT MAX(recorded_at) FROM {source}').fetchone()[0]
+            self.data_version = data_version
+        return self.version
+
+class DbGeneration:
+    '''Bumped whenever any writer commits: snapshots, line_movement rebuilds, retention/rollups
+
+    One shared connection watches PRAGMA data_version (a per-connection
+    counter, so readers can't compare theirs), which makes the generation a
+    cache key every server thread agrees on.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.conn = None
+        self.data_version = None
+        self.value = 0
+
+    def current(self):
+        with self.lock:
+            if self.conn is None or self.path != str(DB_PATH):
+                self.path = str(DB_PATH)
+                self.conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+                self.data_version = None
+            data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version != self.data_version:
+                self.data_version = data_version
+                self.value += 1
+            return self.value
+
+db_generation = DbGeneration()
+
+def get_reader():
+    reader = getattr(local, 'reader', None)
+    if reader is None or reader.path != str(DB_PATH):
+        reader = local.reader = Reader(DB_PATH)
+    return reader
+
+def rows_as_dicts(cursor):
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+def cached_json(key, build):
+    '''Serve build() as JSON, cached until the database next changes, with ETag/304 and gzip'''
+    # Read the generation first: anything built afterwards is at least that fresh
+    generation = db_generation.current()
+    reader = get_reader()
+    reader.snapshot_version()
+    cache_key = key + (generation,)
+    etag = hashlib.sha1(repr((SERVER_ID,) + cache_key).encode('utf-8')).hexdigest()[:20]
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    with cache_lock:
+        entry = cache.get(cache_key)
+        if entry:
+            cache.move_to_end(cache_key)
+    if entry is None:
+        body = json.dumps(build(reader), separators=(',', ':')).encode('utf-8')
+        compressed = gzip.compress(body, 5) if len(body) >= GZIP_MIN_BYTES else None
+        entry = (body, compressed)
+        with cache_lock:
+            cache[cache_key] = entry
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+    body, compressed = entry
+    response = Response(body, mimetype='application/json')
+    if compressed and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def query_history(reader, player_name, stat_type):
+    if 'odds_history_hourly' in reader.tables:
+        # Older than the raw tier: hourly closes kept by scripts/odds_retention.py
+        cursor = reader.conn.execute(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM odds_history
+            WHERE player_name = ? AND stat_type = ?
+            UNION ALL
+            SELECT {HISTORY_COLUMNS}
+            FROM odds_history_hourly
+            WHERE player_name = ? AND stat_type = ? AND recorded_at < (
+                SELECT COALESCE(MIN(recorded_at), '9999') FROM odds_history
+                WHERE player_name = ? AND stat_type = ?)
+            ORDER BY recorded_at ASC
+        ''', (player_name, stat_type) * 3)
+    else:
+        cursor = reader.conn.execute(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM odds_history
+            WHERE player_name = ? AND stat_type = ?
+            ORDER BY recorded_at ASC
+        ''', (player_name, stat_type))
+    return rows_as_dicts(cursor)
+
+def get_supabase():
+    '''Supabase client for resolving a game's props, created on first use'''
+    global supabase_client
+    if supabase_client is None:
+        from dotenv import load_dotenv
+        from supabase import create_client
+        load_dotenv()
+        supabase_client = create_client(
+            os.getenv('VITE_SUPABASE_URL'),
+            os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
+        )
+    return supabase_client
+
+def props_for_game(game_id):
+    '''(player_name, stat_type) pairs on the board for a game'''
+    entry = game_props.get(game_id)
+    if entry and time.monotonic() - entry[0] < GAME_PROPS_TTL:
+        return entry[1]
+    response = get_supabase().table('props').select('player_name, stat_type')\
+        .eq('game_id', game_id).is_('retired_at', 'null').execute()
+    pairs = sorted({(p['player_name'], p['stat_type']) for p in response.data or []})
+    game_props[game_id] = (time.monotonic(), pairs)
+    return pairs
+
+def downsample(rows, points):
+    '''At most `points` rows: first, last and line/price changes first, then evenly spaced fill'''
+    if not points or len(rows) <= points:
+        return rows
+    last = len(rows) - 1
+    keep = [i for i in range(len(rows)) if i in (0, last) or rows[i][1:] != rows[i - 1][1:]]
+    if len(keep) >= points:
+        # More moves than room: thin the moves evenly, still ending on the latest row
+        step = (len(keep) - 1) / (points - 1)
+        keep = [keep[round(j * step)] for j in range(points)]
+    else:
+        # Spend the spare points on unchanged rows so flat stretches keep their shape
+        kept = set(keep)
+        rest = [i for i in range(len(rows)) if i not in kept]
+        spare = points - len(keep)
+        step = len(rest) / spare
+        keep = sorted(kept.union(rest[int(j * step)] for j in range(spare)))
+    return [rows[i] for i in keep]
+
+def history_series(reader, player_name, stat_type, points=None):
+    '''One prop's history as parallel arrays (columnar JSON)'''
+    rows = [tuple(row[col] for col in SERIES_COLUMNS) for row in query_history(reader, player_name, stat_type)]
+    sampled = downsample(rows, points)
+    series = {'player_name': player_name, 'stat_type': stat_type, 'total': len(rows)}
+    for i, col in enumerate(SERIES_COLUMNS):
+        series[col] = [row[i] for row in sampled]
+    return series
+
+def parse_pairs(items):
+    '''[[player, stat], ...] or [{"player_name", "stat_type"}, ...] -> sorted unique pairs'''
+    pairs = set()
+    for item in items:
+        if isinstance(item, dict):
+            item = (item.get('player_name'), item.get('stat_type'))
+        if not isinstance(item, (list, tuple)) or len(item) != 2 or not all(isinstance(v, str) and v for v in item):
+            raise ValueError(f'invalid pair: {item!r}')
+        pairs.add(tuple(item))
+    return sorted(pairs)
+
+class Subscriber:
+    '''One stream client: its filters and the props updated since its last event'''
+
+    def __init__(self, players=(), pairs=None):
+        self.players = set(players)
+        # None: no game filter
+        self.pairs = set(pairs) if pairs is not None else None
+        self.pending = OrderedDict()
+        self.resync = False
+        self.ready = threading.Condition()
+
+    def wants(self, key):
+        if not self.players and self.pairs is None:
+            return True
+        return key[0] in self.players or (self.pairs is not None and key in self.pairs)
+
+    def push(self, updates):
+        with self.ready:
+            for key, update in updates:
+                if self.wants(key):
+                    # Coalesce: a prop that moves again before delivery keeps only its newest values
+                    self.pending.pop(key, None)
+                    self.pending[key] = update
+            if len(self.pending) > MAX_PENDING:
+                # Client is not keeping up: drop the backlog and have it refetch
+                self.pending.clear()
+                self.resync = True
+            if self.pending or self.resync:
+                self.ready.notify()
+
+    def drain(self, timeout):
+        '''Wait up to timeout for updates, let a burst settle, then take everything pending'''
+        with self.ready:
+            if not self.pending and not self.resync:
+                self.ready.wait(timeout)
+            waiting = bool(self.pending)
+        if waiting:
+            time.sleep(COALESCE_SECONDS)
+        with self.ready:
+            updates, resync = list(self.pending.values()), self.resync
+            self.pending.clear()
+            self.resync = False
+        return updates, resync
+
+class LineFeed:
+    '''Single poller thread turning newly committed snapshots into per-prop updates for every subscriber'''
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.latest = {}
+
+    def subscribe(self, subscriber):
+        '''Add a subscriber unless MAX_STREAMS are already open; returns whether it was added'''
+        with self.lock:
+            if len(self.subscribers) >= MAX_STREAMS:
+                return False
+            self.subscribers.add(subscriber)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='line-feed', daemon=True)
+                self.thread.start()
+            return True
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def changes_since(self, reader, since):
+        '''(key, row) for props whose line or prices differ from what was last sent'''
+        cursor = reader.conn.execute(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM odds_history
+            WHERE recorded_at > ?
+            ORDER BY recorded_at ASC
+        ''', (since,))
+        updates = {}
+        for row in rows_as_dicts(cursor):
+            key = (row['player_name'], row['stat_type'])
+            values = tuple(row[col] for col in SERIES_COLUMNS[1:])
+            if key not in self.latest:
+                previous = reader.conn.execute(f'''
+                    SELECT {', '.join(SERIES_COLUMNS[1:])}
+                    FROM odds_history
+                    WHERE player_name = ? AND stat_type = ? AND recorded_at <= ?
+                    ORDER BY recorded_at DESC LIMIT 1
+                ''', key + (since,)).fetchone()
+                self.latest[key] = previous
+            # Legacy databases rewrite every prop each snapshot; only real moves go out
+            if values != self.latest[key]:
+                updates[key] = row
+            self.latest[key] = values
+        return list(updates.items())
+
+    def run(self):
+        reader = Reader(DB_PATH)
+        seen = reader.snapshot_version() or ''
+        try:
+            while True:
+                time.sleep(POLL_SECONDS)
+                with self.lock:
+                    if not self.subscribers:
+                        self.thread = None
+                        return
+                    subscribers = list(self.subscribers)
+                try:
+                    version = reader.snapshot_version()
+                    if not version or version <= seen:
+                        continue
+                    updates = self.changes_since(reader, seen)
+                    seen = version
+                except sqlite3.Error as e:
+                    print(f'⚠️  Line feed: {e}')
+                    continue
+                for subscriber in subscribers:
+                    subscriber.push(updates)
+        finally:
+            reader.conn.close()
+
+feed = LineFeed()
+
 @app.route('/api/odds-history', methods=['GET'])
 def get_odds_history():
     player_name = request.args.get('player_name')
@@ -17,46 +364,144 @@ def get_odds_history():
         return jsonify({'error': 'player_name and stat_type are required'}), 400
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT player_name, stat_type, draftkings_line, draftkings_over_odds, 
-                   draftkings_under_odds, fanduel_line, fanduel_over_odds, 
-                   fanduel_under_odds, recorded_at
-            FROM odds_history
-            WHERE player_name = ? AND stat_type = ?
-            ORDER BY recorded_at ASC
-        ''', (player_name, stat_type))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        data = []
-        for row in rows:
-            data.append({
-                'player_name': row[0],
-                'stat_type': row[1],
-                'draftkings_line': row[2],
-                'draftkings_over_odds': row[3],
-                'draftkings_under_odds': row[4],
-                'fanduel_line': row[5],
-                'fanduel_over_odds': row[6],
-                'fanduel_under_odds': row[7],
-                'recorded_at': row[8]
-            })
-        
-        return jsonify(data)
+        return cached_json(('odds-history', player_name, stat_type),
+                           lambda reader: query_history(reader, player_name, stat_type))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/odds-history/batch', methods=['GET', 'POST'])
+def get_odds_history_batch():
+    """Histories for many props in one response
+    GET  ?game_id=<id>[&points=N]                      every prop on a game's board
+    POST {"pairs": [[player, stat], ...], "points": N}  (or "game_id" in the body)
+    """
+    body = (request.get_json(silent=True) if request.method == 'POST' else None) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    game_id = body.get('game_id') or request.args.get('game_id')
+    points = body.get('points', request.args.get('points'))
+    
+    try:
+        points = int(points) if points not in (None, '') else None
+        if points is not None and points < 2:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({'error': 'points must be an integer >= 2'}), 400
+    
+    try:
+        pairs = parse_pairs(body.get('pairs') or [])
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if game_id:
+            pairs = sorted(set(pairs).union(props_for_game(game_id)))
+        if not pairs:
+            return jsonify({'error': 'pairs or game_id is required'}), 400
+        if len(pairs) > MAX_BATCH_PAIRS:
+            return jsonify({'error': f'at most {MAX_BATCH_PAIRS} pairs per request'}), 400
         
+        return cached_json(('odds-history-batch', tuple(pairs), points),
+                           lambda reader: {'points': points,
+                                           'series': [history_series(reader, p, s, points) for p, s in pairs]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/line-movement', methods=['GET'])
+def get_line_movement():
+    """Per-prop movement summary materialized by scripts/line_movement.py"""
+    player_name = request.args.get('player_name')
+    stat_type = request.args.get('stat_type')
+    
+    query = 'SELECT * FROM line_movement'
+    params = []
+    if player_name:
+        query += ' WHERE player_name = ?'
+        params.append(player_name)
+        if stat_type:
+            query += ' AND stat_type = ?'
+            params.append(stat_type)
+    
+    def build(reader):
+        if 'line_movement' not in reader.tables:
+            # Summary not built yet
+            return []
+        return rows_as_dicts(reader.conn.execute(query, params))
+    
+    try:
+        return cached_json(('line-movement', player_name, stat_type), build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stream', methods=['GET'])
+def stream_lines():
+    """Server-Sent Events: a `lines` event with every subscribed prop whose line or prices moved
+    ?game_id=<id> and/or ?player_name=<name> (repeatable) narrow the feed; no filter streams everything.
+    A `resync` event means updates were dropped and the client should refetch.
+    Streams idle for STREAM_IDLE_SECONDS are closed (the client reconnects);
+    past MAX_STREAMS open streams new ones get a 503.
+    """
+    players = request.args.getlist('player_name')
+    game_id = request.args.get('game_id')
+    
+    try:
+        pairs = props_for_game(game_id) if game_id else None
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    subscriber = Subscriber(players, pairs)
+    if not feed.subscribe(subscriber):
+        return jsonify({'error': 'too many live streams, retry later'}), 503, {'Retry-After': '30'}
+    
+    def events():
+        try:
+            yield 'retry: 5000\nevent: ready\ndata: {}\n\n'
+            last_event = time.monotonic()
+            while True:
+                updates, resync = subscriber.drain(HEARTBEAT_SECONDS)
+                if resync:
+                    yield 'event: resync\ndata: {}\n\n'
+                if updates:
+                    yield f"event: lines\ndata: {json.dumps(updates, separators=(',', ':'))}\n\n"
+                if updates or resync:
+                    last_event = time.monotonic()
+                elif time.monotonic() - last_event >= STREAM_IDLE_SECONDS:
+                    # Free the worker thread; EventSource reconnects after the retry delay
+                    return
+                else:
+                    # Keeps proxies from timing out and surfaces disconnected clients
+                    yield ': keepalive\n\n'
+        finally:
+            feed.unsubscribe(subscriber)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/health', methods=['GET'])
 def health():
     return jsonify({'status': 'ok', 'database': str(DB_PATH)})
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Odds History API Server')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--threads', type=int, default=32, help='worker threads (waitress); each /api/stream viewer holds one')
+    parser.add_argument('--max-streams', type=int, help='open /api/stream connections allowed (default: half of --threads)')
+    parser.add_argument('--debug', action='store_true', help='Flask debug server with auto-reload')
+    args = parser.parse_args()
+    MAX_STREAMS = args.max_streams if args.max_streams is not None else max(1, args.threads // 2)
+    
     print('Starting Odds History API Server')
     print(f'Database: {DB_PATH}')
-    print('API running on http://localhost:5000')
-    app.run(debug=True, port=5000)
+    print(f'API running on http://localhost:{args.port}')
+    
+    if args.debug:
+        app.run(debug=True, port=args.port, host=args.host)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print('(waitress not installed, using the threaded Flask server)')
+            app.run(debug=False, threaded=True, port=args.port, host=args.host)
+        else:
+            serve(app, host=args.host, port=args.port, threads=args.threads)
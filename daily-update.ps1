@@ -10,16 +10,14 @@ Write-Host "  DAILY WEBSITE UPDATE" -ForegroundColor Cyan
 Write-Host "================================" -ForegroundColor Cyan
 Write-Host ""
 
-Write-Host "Step 1: Updating props and projections..." -ForegroundColor Yellow
-& .\run-projections.ps1 -NoPause
-
-Write-Host ""
-Write-Host "Step 2: Tracking sportsbook odds..." -ForegroundColor Yellow
-python scripts/track_odds_to_supabase.py
+# Activate virtual environment if present
+if (Test-Path ".\.venv\Scripts\Activate.ps1") {
+    & ".\.venv\Scripts\Activate.ps1"
+}
 
-Write-Host ""
-Write-Host "Step 3: Syncing odds to live website..." -ForegroundColor Yellow
-python scripts/sync_odds_to_props.py
+# Props, games, injuries, stats, projections and odds run as one in-process DAG
+Write-Host "Running the daily pipeline..." -ForegroundColor Yellow
+python scripts/pipeline.py
 
 Write-Host ""
 Write-Host "================================" -ForegroundColor Green
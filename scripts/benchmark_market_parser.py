@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: nested Over/Under scan vs the indexed market parser (odds_api.iter_prop_lines)
+Usage: python scripts/benchmark_market_parser.py [--payload event_odds.json] [--alt-lines 5 20 60]
+Without --payload a DraftKings + FanDuel event with alternate lines is generated.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from odds_api import ODDS_API_STAT_MAP, PROP_MARKETS, iter_prop_lines
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+def make_event(players=20, alt_lines=20, seed=7):
+    '''Event payload shaped like /events/{id}/odds, with alt_lines lines per player and market'''
+    rng = random.Random(seed)
+    bookmakers = []
+    for key, title in (('draftkings', 'DraftKings'), ('fanduel', 'FanDuel')):
+        markets = []
+        for market in PROP_MARKETS:
+            outcomes = []
+            for p in range(players):
+                base = rng.choice([0.5, 1.5, 4.5, 9.5, 14.5, 22.5])
+                for a in range(alt_lines):
+                    point = base + a
+                    for side in ('Over', 'Under'):
+                        outcomes.append({'name': side, 'description': f'Player {p}',
+                                         'price': rng.choice([-130, -115, -110, 100, 120]), 'point': point})
+            # The API does not guarantee Over/Under adjacency
+            rng.shuffle(outcomes)
+            markets.append({'key': market, 'outcomes': outcomes})
+        bookmakers.append({'key': key, 'title': title, 'markets': markets})
+    return {'id': 'benchmark', 'bookmakers': bookmakers}
+
+def parse_nested(odds_data):
+    '''The per-Over rescan the odds trackers used before iter_prop_lines'''
+    out = []
+    for bookmaker in odds_data.get('bookmakers', []):
+        sportsbook_name = bookmaker.get('title', '')
+        for market in bookmaker.get('markets', []):
+            stat_type = ODDS_API_STAT_MAP.get(market.get('key'))
+            if not stat_type:
+                continue
+            for outcome in market.get('outcomes', []):
+                player_name = outcome.get('description')
+                line = outcome.get('point')
+                if outcome.get('name') == 'Over':
+                    over_price = outcome.get('price')
+                    under_price = None
+                    for other in market.get('outcomes', []):
+                        if (other.get('description') == player_name and
+                            other.get('name') == 'Under' and
+                            other.get('point') == line):
+                            under_price = other.get('price')
+                            break
+                    if over_price and under_price and line:
+                        out.append((sportsbook_name, stat_type, player_name, line, over_price, under_price))
+    return out
+
+def parse_indexed(odds_data):
+    return [(p['sportsbook'], p['stat_type'], p['player_name'], p['line'], p['over_price'], p['under_price'])
+            for p in iter_prop_lines(odds_data)]
+
+def timed(fn, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(payload)
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--payload', help='recorded event odds JSON (one event)')
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--alt-lines', type=int, nargs='+', default=[1, 5, 20, 60])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, encoding='utf-8') as f:
+            payload = json.load(f)
+        cases = [(os.path.basename(args.payload), payload)]
+    else:
+        cases = [(f'{n} alt lines', make_event(args.players, n)) for n in args.alt_lines]
+
+    print('=' * 60)
+    print('MARKET PARSER BENCHMARK')
+    print('=' * 60)
+    print(f'{"payload":>14} {"outcomes":>9} {"pairs":>7} {"nested":>10} {"indexed":>10} {"speedup":>8}')
+
+    for label, payload in cases:
+        outcomes = sum(len(m.get('outcomes', [])) for b in payload.get('bookmakers', []) for m in b.get('markets', []))
+        nested, nested_secs = timed(parse_nested, payload, args.repeat)
+        indexed, indexed_secs = timed(parse_indexed, payload, args.repeat)
+        if nested != indexed:
+            print(f'❌ {label}: parsers disagree ({len(nested)} vs {len(indexed)} pairs)')
+            sys.exit(1)
+        print(f'{label[-14:]:>14} {outcomes:>9} {len(indexed):>7} {nested_secs * 1000:>8.1f}ms '
+              f'{indexed_secs * 1000:>8.1f}ms {nested_secs / indexed_secs:>7.1f}x')
+
+    print()
+    print('Both parsers produce identical pairs; times are best of --repeat runs')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Load test for api_server.py: a page load firing many /api/odds-history requests at once
+Usage:
+    python api_server.py &                                   # production mode
+    python scripts/benchmark_odds_api.py [--url http://localhost:5000/api] [--concurrency 48] [--rounds 5]
+"""
+
+import argparse
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DB_PATH = Path(__file__).parent.parent / 'odds_history.db'
+
+def load_pairs(db_path, limit):
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    pairs = conn.execute('SELECT DISTINCT player_name, stat_type FROM odds_history LIMIT ?', (limit,)).fetchall()
+    conn.close()
+    return pairs
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def page_load(session, url, pairs, concurrency, etags=None):
+    '''Fire one request per pair concurrently; returns per-request latencies (ms) and status counts'''
+    def one(pair):
+        headers = {'Accept-Encoding': 'gzip'}
+        if etags is not None and pair in etags:
+            headers['If-None-Match'] = etags[pair]
+        started = time.perf_counter()
+        response = session.get(f'{url}/odds-history', headers=headers, timeout=30,
+                               params={'player_name': pair[0], 'stat_type': pair[1]})
+        elapsed = (time.perf_counter() - started) * 1000
+        if etags is not None and response.headers.get('ETag'):
+            etags[pair] = response.headers['ETag']
+        return elapsed, response.status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, pairs))
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return [r[0] for r in results], statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000/api')
+    parser.add_argument('--db', default=str(DB_PATH), help='database to draw (player, stat) pairs from')
+    parser.add_argument('--props', type=int, default=150, help='history requests per page load')
+    parser.add_argument('--concurrency', type=int, default=48)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.db, args.props)
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=args.concurrency))
+
+    print('=' * 60)
+    print(f'ODDS API LOAD TEST: {len(pairs)} histories, {args.concurrency} concurrent')
+    print('=' * 60)
+    print(f'{"round":>12} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8} {"total":>8}  statuses')
+
+    etags = {}
+    for i in range(args.rounds):
+        # Round 1 is cold, later rounds hit the response cache, the last one revalidates with ETags
+        revalidate = i == args.rounds - 1 and args.rounds > 1
+        label = 'cold' if i == 0 else ('etag' if revalidate else f'warm {i}')
+        started = time.perf_counter()
+        latencies, statuses = page_load(session, args.url, pairs, args.concurrency, etags if revalidate or i == 0 else None)
+        total = (time.perf_counter() - started) * 1000
+        print(f'{label:>12} {statistics.median(latencies):>6.1f}ms {percentile(latencies, 95):>6.1f}ms '
+              f'{percentile(latencies, 99):>6.1f}ms {max(latencies):>6.1f}ms {total:>6.0f}ms  {statuses}')
+
+if __name__ == '__main__':
+    main()
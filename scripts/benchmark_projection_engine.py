@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: scalar calculate_projection() vs the vectorized projection engine
+Usage: python scripts/benchmark_projection_engine.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from projection_engine import STAT_COLUMNS, build_board, project_board
+import update_projections_with_defense as model
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+TEAMS = sorted(set(model.DEFENSIVE_MATCHUPS) & set(model.NBA_TEAM_STATS))
+POSITIONS = ['PG', 'SG', 'SF', 'PF', 'C']
+STAT_TYPES = list(STAT_COLUMNS)
+STAT_FIELDS = sorted({col for cols in STAT_COLUMNS.values() for col in cols})
+
+def make_board(n, seed=7):
+    '''Random props with 0-15 games each'''
+    rng = random.Random(seed)
+    props = []
+    for _ in range(n):
+        games = rng.choice([0, 1, 5, 10, 15, 15, 15])
+        player_stats = [{field: rng.randint(0, 30) for field in STAT_FIELDS} for _ in range(games)]
+        team, opponent = rng.sample(TEAMS, 2)
+        props.append({
+            'player_stats': player_stats,
+            'line': rng.choice([0.5, 1.5, 4.5, 9.5, 14.5, 22.5, 30.5]),
+            'stat_type': rng.choice(STAT_TYPES),
+            'team': team,
+            'opponent': opponent,
+            'position': rng.choice(POSITIONS),
+        })
+    return props
+
+def run_scalar(props):
+    return [
+        model.calculate_projection(p['player_stats'], p['line'], p['stat_type'], p['opponent'],
+                                   p['position'], p['team'], 'Benchmark Player')
+        for p in props
+    ]
+
+def run_vectorized(props):
+    entries = [
+        (p['player_stats'], p['line'], p['stat_type'],
+         model.get_injury_adjustment('Benchmark Player'),
+         model.get_usage_boost('Benchmark Player', p['team'], p['position'], p['stat_type']),
+         model.get_matchup_adjustment(p['team'], p['opponent'], p['position'], p['stat_type']))
+        for p in props
+    ]
+    packed = time.perf_counter()
+    board = build_board(entries)
+    results = project_board(board)
+    return results, time.perf_counter() - packed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print('=' * 60)
+    print('PROJECTION ENGINE BENCHMARK')
+    print('=' * 60)
+    print(f'{"props":>8} {"scalar":>10} {"vector":>10} {"engine":>10} {"speedup":>8}  max |diff|')
+
+    for n in args.sizes:
+        props = make_board(n)
+
+        started = time.perf_counter()
+        scalar = run_scalar(props)
+        scalar_secs = time.perf_counter() - started
+
+        started = time.perf_counter()
+        (projection, prob_over, confidence), engine_secs = run_vectorized(props)
+        vector_secs = time.perf_counter() - started
+
+        proj_diff = np.abs(projection - np.array([float(r[0]) for r in scalar])).max()
+        prob_diff = np.abs(prob_over - np.array([float(r[1]) for r in scalar])).max()
+        conf_mismatch = sum(1 for r, c in zip(scalar, confidence) if r[2] != c)
+
+        print(f'{n:>8} {scalar_secs:>9.3f}s {vector_secs:>9.3f}s {engine_secs:>9.3f}s '
+              f'{scalar_secs / vector_secs:>7.1f}x  proj {proj_diff:.2g}, prob {prob_diff:.2g}, '
+              f'confidence mismatches {conf_mismatch}')
+
+    print()
+    print('vector = packing + adjustments + engine, engine = build_board + project_board only')
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ Debug player name mismatches between props and odds_history
 import os
 from dotenv import load_dotenv
 from supabase import create_client
+from name_resolver import NameIndex
 
 load_dotenv()
 
@@ -61,10 +62,12 @@ print('PLAYERS IN ODDS_HISTORY BUT NOT IN PROPS')
 print('=' * 60)
 
 missing_players = odds_players - props_players
+board = NameIndex(props_players)
 if missing_players:
     print(f'Found {len(missing_players)} players:')
     for player in sorted(list(missing_players)[:20]):
-        print(f'  - {player}')
+        match = board.resolve(player)
+        print(f'  - {player}' + (f'  -> resolves to {match}' if match else ''))
     if len(missing_players) > 20:
         print(f'  ... and {len(missing_players) - 20} more')
 else:
@@ -112,3 +115,7 @@ for key in list(props_map.keys())[:20]:
 
 print()
 print(f'Total matched: {matched}/20 sampled')
+print()
+for player in odds_players:
+    board.resolve(player)
+board.report('Odds -> props board')
@@ -1,9 +1,9 @@
 import os
 import sys
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 import requests
 from dotenv import load_dotenv
-from supabase import create_client
+from pipeline_context import get_context
 
 load_dotenv()
 
@@ -12,13 +12,13 @@ try:
 except Exception:
     pass
 
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
 
 BALLDONTLIE_API_KEY = os.getenv('BALLDONTLIE_API_KEY') or 'd096acdb-bd8a-419a-b921-05a24a0f44f9'
 
+# Game lists are cached on disk for 30 minutes
+session = context.session
+
 TEAM_ABBR_MAP = {
     'ATL': 'ATL', 'BOS': 'BOS', 'BKN': 'BKN', 'CHA': 'CHA', 'CHI': 'CHI',
     'CLE': 'CLE', 'DAL': 'DAL', 'DEN': 'DEN', 'DET': 'DET', 'GSW': 'GSW',
@@ -42,10 +42,10 @@ def fetch_games_for_dates(dates):
     for d in dates:
         url = f'https://api.balldontlie.io/v1/games?dates[]={d}'
         headers = {'Authorization': BALLDONTLIE_API_KEY}
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = session.get(url, headers=headers, timeout=15)
         if resp.status_code == 401:
             url = f'https://api.balldontlie.io/v1/games?dates[]={d}&api_key={BALLDONTLIE_API_KEY}'
-            resp = requests.get(url, timeout=15)
+            resp = session.get(url, timeout=15)
         if resp.status_code != 200:
             print(f'⚠️  BallDontLie status {resp.status_code} for {d}')
             continue
@@ -78,17 +78,10 @@ def upsert_games(games):
     for game in games:
         try:
             # Build day range for the game date in UTC
-            day = game['date']
-            start = f"{day}T00:00:00+00:00"
-            end = f"{day}T23:59:59+00:00"
-            # Look for existing game with same home/away on that day
-            existing = supabase.table('games').select('id')\
-                .eq('home_team_abbr', game['home_team_abbr'])\
-                .eq('away_team_abbr', game['away_team_abbr'])\
-                .gte('game_time', start)\
-                .lte('game_time', end)\
-                .limit(1)\
-                .execute().data
+            start = datetime.fromisoformat(game['date']).replace(tzinfo=timezone.utc)
+            end = start + timedelta(hours=23, minutes=59, seconds=59)
+            # Look for existing game with same home/away on that day (in the loaded games table)
+            existing = context.find_game(game['home_team_abbr'], game['away_team_abbr'], start, end)
             payload = {
                 'home_team': game['home_team'],
                 'home_team_abbr': game['home_team_abbr'],
@@ -98,9 +91,11 @@ def upsert_games(games):
                 'status': 1,
             }
             if existing:
-                supabase.table('games').update(payload).eq('id', existing[0]['id']).execute()
+                context.supabase.table('games').update(payload).eq('id', existing['id']).execute()
+                existing.update(payload)
             else:
-                supabase.table('games').insert(payload).execute()
+                response = context.supabase.table('games').insert(payload).execute()
+                context.add_rows('games', response.data)
             inserted += 1
         except Exception as e:
             print(f'⚠️  Upsert error: {e}')
@@ -1,15 +1,15 @@
 import os
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import uuid
 from dotenv import load_dotenv
-from supabase import create_client
+from pipeline_context import get_context
 
 load_dotenv()
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
+
+# Scoreboards are cached on disk for 10 minutes
+session = context.session
 
 def get_todays_real_games():
     """Fetch today's real NBA games from ESPN API"""
@@ -25,7 +25,7 @@ def get_todays_real_games():
     
     try:
         print(f'📡 Fetching games for {date_str} ({today.strftime("%B %d, %Y")})...')
-        response = requests.get(url)
+        response = session.get(url)
         data = response.json()
         
         events = data.get('events', [])
@@ -36,7 +36,7 @@ def get_todays_real_games():
             tomorrow = today + timedelta(days=1)
             date_str = tomorrow.strftime('%Y%m%d')
             url = f'https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard?dates={date_str}'
-            response = requests.get(url)
+            response = session.get(url)
             data = response.json()
             events = data.get('events', [])
             print(f'✅ Found {len(events)} games for tomorrow ({tomorrow.strftime("%B %d, %Y")})\n')
@@ -62,25 +62,21 @@ def get_todays_real_games():
             }
             
             # Update existing game if it exists for this matchup today
-            day_start = today.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-            day_end = today.replace(hour=23, minute=59, second=59, microsecond=0).isoformat()
+            day_start = today.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+            day_end = today.replace(hour=23, minute=59, second=59, microsecond=0, tzinfo=timezone.utc)
             
-            existing = supabase.table('games').select('id')\
-                .eq('home_team_abbr', game_data['home_team_abbr'])\
-                .eq('away_team_abbr', game_data['away_team_abbr'])\
-                .gte('game_time', day_start)\
-                .lte('game_time', day_end)\
-                .limit(1)\
-                .execute().data
+            existing = context.find_game(game_data['home_team_abbr'], game_data['away_team_abbr'], day_start, day_end)
             
             if existing:
                 # Update existing game
-                supabase.table('games').update({
+                changes = {
                     'home_team': game_data['home_team'],
                     'away_team': game_data['away_team'],
                     'game_time': game_data['game_time'],
                     'status': 1,
-                }).eq('id', existing[0]['id']).execute()
+                }
+                context.supabase.table('games').update(changes).eq('id', existing['id']).execute()
+                existing.update(changes)
                 print(f'{i+1}. {away_team["team"]["abbreviation"]} @ {home_team["team"]["abbreviation"]} (updated)')
             else:
                 # Insert new game
@@ -90,7 +86,8 @@ def get_todays_real_games():
         # Insert new games
         if games_to_insert:
             print(f'\n✅ Inserting {len(games_to_insert)} new games into database...')
-            supabase.table('games').insert(games_to_insert).execute()
+            context.supabase.table('games').insert(games_to_insert).execute()
+            context.add_rows('games', games_to_insert)
         
         print('\n' + '=' * 60)
         print('✅ SUCCESS! NBA GAMES UPDATED FROM ESPN')
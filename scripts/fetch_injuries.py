@@ -1,17 +1,16 @@
 import os
 import requests
 from dotenv import load_dotenv
-from supabase import create_client
+from pipeline_context import get_context
 from datetime import datetime, timezone
 
 load_dotenv()
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
 
 BALLDONTLIE_API = 'https://api.balldontlie.io/v1'
 
+session = context.session
+
 def fetch_injuries():
     """Fetch current NBA player injuries from Ball Don't Lie API"""
     print('🏥 FETCHING NBA INJURIES')
@@ -43,7 +42,7 @@ def fetch_espn_injuries():
     """Fetch injuries from ESPN API"""
     try:
         url = 'https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard'
-        response = requests.get(url, timeout=10)
+        response = session.get(url, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -82,7 +81,7 @@ def fetch_espn_injuries():
             # Upsert injuries to Supabase
             for injury in injuries:
                 try:
-                    supabase.table('player_injuries').upsert(injury, on_conflict='player_name').execute()
+                    context.supabase.table('player_injuries').upsert(injury, on_conflict='player_name').execute()
                 except Exception as e:
                     print(f'⚠️  Could not upsert injury for {injury.get("player_name")}: {e}')
             
@@ -1,37 +1,23 @@
 import os
 import time
+import threading
+import argparse
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from supabase import create_client
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from datetime import datetime
+from name_resolver import build_index
+from pipeline_context import get_context
 
 load_dotenv()
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
-
-print('🏀 Fetching NBA Player Stats (Incremental Cache Mode)')
-print('=' * 60)
-
-# Get unique players from props
-print('\n📊 Fetching players from props...')
-props = supabase.table('props').select('player_name').execute()
-unique_players = list(set([p['player_name'] for p in props.data]))
-print(f'✓ Found {len(unique_players)} unique players\n')
-
-# Create a session with retry logic
-session = requests.Session()
-retry = Retry(
-    total=3,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
-)
-adapter = HTTPAdapter(max_retries=retry)
-session.mount('http://', adapter)
-session.mount('https://', adapter)
+context = get_context()
+
+# Point at a local replay server (scripts/replay_server.py) to test without stats.nba.com
+NBA_STATS_BASE_URL = os.getenv('NBA_STATS_BASE_URL', 'https://stats.nba.com/stats').rstrip('/')
+
+# The shared session retries 5xx; 429s are left to the rate limiter so it can back off.
+# commonallplayers is served from the shared disk cache for a day.
+session = context.session
 
 # NBA Stats API with enhanced headers to mimic real browser
 NBA_HEADERS = {
@@ -50,6 +36,90 @@ NBA_HEADERS = {
     'x-nba-stats-token': 'true',
 }
 
+# stats.nba.com starts returning 429s / dropping connections above roughly one request per second
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 2
+DEFAULT_WORKERS = 4
+
+SEASON = '2025-26'
+PLAYER_STATS_UPSERT_CHUNK = 500
+
+# Box score columns shared by playergamelog and leaguegamelog
+GAME_LOG_COLUMNS = ('GAME_DATE', 'MATCHUP', 'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA')
+
+class TokenBucket:
+    '''Shared rate limiter: token bucket with multiplicative backoff on 429s'''
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_throttle(self, retry_after=None):
+        '''Halve the rate and pause every worker after a 429'''
+        with self.lock:
+            self.throttled += 1
+            # Requests already in flight when the first 429 landed don't cut the rate again
+            if time.monotonic() >= self.paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            pause = retry_after if retry_after else 2.0 / self.rate
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            return pause
+
+    def on_success(self):
+        '''Creep back toward the configured rate while requests succeed'''
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + 0.05 * self.max_rate)
+
+limiter = TokenBucket()
+print_lock = threading.Lock()
+
+def log(message):
+    with print_lock:
+        print(message, flush=True)
+
+def nba_get(url, attempts=5):
+    '''GET a stats.nba.com endpoint through the shared limiter; returns parsed JSON or None'''
+    for attempt in range(attempts):
+        limiter.acquire()
+        try:
+            response = session.get(url, headers=NBA_HEADERS, timeout=30)
+            if response.status_code == 200:
+                limiter.on_success()
+                return response.json()
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                pause = limiter.on_throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                log(f'      ⚠️  Rate limited. Backing off {pause:.0f}s (rate now {limiter.rate:.2f}/s)')
+            else:
+                log(f'      ⚠️  API returned status {response.status_code} (attempt {attempt + 1}/{attempts})')
+        except requests.exceptions.ConnectionError:
+            # stats.nba.com often drops connections instead of sending 429
+            pause = limiter.on_throttle()
+            log(f'      ⚠️  Connection error, backing off {pause:.0f}s...')
+        except Exception as e:
+            log(f'      ⚠️  Request failed: {str(e)[:50]}')
+    return None
+
 # Cache the all players response
 ALL_PLAYERS_CACHE = None
 
@@ -57,83 +127,61 @@ def get_all_players():
     global ALL_PLAYERS_CACHE
     if ALL_PLAYERS_CACHE:
         return ALL_PLAYERS_CACHE
-    
-    url = 'https://stats.nba.com/stats/commonallplayers?LeagueID=00&Season=2025-26&IsOnlyCurrentSeason=1'
-    
+
+    url = f'{NBA_STATS_BASE_URL}/commonallplayers?LeagueID=00&Season={SEASON}&IsOnlyCurrentSeason=1'
+
     print('📥 Fetching player list from NBA API...')
-    for attempt in range(5):
-        try:
-            time.sleep(2 * (attempt + 1))
-            response = session.get(url, headers=NBA_HEADERS, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                ALL_PLAYERS_CACHE = data
-                print(f'✓ Successfully loaded player database\n')
-                return data
-            elif response.status_code == 429:
-                wait_time = 10 * (attempt + 1)
-                print(f'      ⚠️  Rate limited. Waiting {wait_time}s...')
-                time.sleep(wait_time)
-            else:
-                print(f'      ⚠️  API returned status {response.status_code}, retrying in {3 * (attempt + 1)}s...')
-                time.sleep(3 * (attempt + 1))
-        except requests.exceptions.ConnectionError as e:
-            print(f'      ⚠️  Connection error, retrying in {5 * (attempt + 1)}s...')
-            time.sleep(5 * (attempt + 1))
-        except Exception as e:
-            print(f'      ⚠️  Request failed: {str(e)[:50]}, retrying in {5 * (attempt + 1)}s...')
-            time.sleep(5 * (attempt + 1))
-    
+    data = nba_get(url)
+    if data:
+        ALL_PLAYERS_CACHE = data
+        print(f'✓ Successfully loaded player database\n')
+        return data
+
     print('❌ Failed to fetch player list after 5 attempts')
     return None
 
+# Name index over commonallplayers, built once per run
+PLAYER_INDEX = None
+PLAYER_IDS = {}
+index_lock = threading.Lock()
+
+def get_player_index():
+    global PLAYER_INDEX, PLAYER_IDS
+    with index_lock:
+        if PLAYER_INDEX is not None:
+            return PLAYER_INDEX
+
+        all_players = get_all_players()
+        if not all_players:
+            return None
+
+        try:
+            players = all_players['resultSets'][0]['rowSet']
+            headers = all_players['resultSets'][0]['headers']
+            name_idx = headers.index('DISPLAY_FIRST_LAST')
+            id_idx = headers.index('PERSON_ID')
+        except Exception as e:
+            print(f'      ❌ Error parsing player data: {e}')
+            return None
+
+        PLAYER_IDS = {player[name_idx]: player[id_idx] for player in players}
+        PLAYER_INDEX = build_index('nba', PLAYER_IDS)
+        return PLAYER_INDEX
+
 def find_player(player_name):
-    all_players = get_all_players()
-    if not all_players:
-        return None
-    
-    try:
-        players = all_players['resultSets'][0]['rowSet']
-        headers = all_players['resultSets'][0]['headers']
-        name_idx = headers.index('DISPLAY_FIRST_LAST')
-        id_idx = headers.index('PERSON_ID')
-        
-        import unicodedata
-        def normalize_name(name):
-            nfkd = unicodedata.normalize('NFKD', name)
-            return ''.join([c for c in nfkd if not unicodedata.combining(c)]).lower()
-        
-        search_name = normalize_name(player_name)
-        
-        # Try exact match first (normalized)
-        for player in players:
-            if normalize_name(player[name_idx]) == search_name:
-                return {'id': player[id_idx], 'name': player[name_idx]}
-        
-        # Try partial match (normalized)
-        for player in players:
-            db_name = normalize_name(player[name_idx])
-            if search_name in db_name or db_name in search_name:
-                return {'id': player[id_idx], 'name': player[name_idx]}
-        
-        # Try last name only match
-        search_last = search_name.split()[-1] if ' ' in search_name else search_name
-        for player in players:
-            db_name = normalize_name(player[name_idx])
-            db_last = db_name.split()[-1] if ' ' in db_name else db_name
-            if search_last == db_last and len(search_last) > 3:
-                return {'id': player[id_idx], 'name': player[name_idx]}
-        
+    index = get_player_index()
+    if not index:
         return None
-    except Exception as e:
-        print(f'      ❌ Error parsing player data: {e}')
+
+    name = index.resolve(player_name)
+    if not name:
         return None
+    return {'id': PLAYER_IDS[name], 'name': name}
 
 def get_latest_cached_game_date(player_name):
     """Get the most recent game date we have cached for a player"""
     try:
-        result = supabase.table('player_stats')\
+        result = context.supabase.table('player_stats')\
             .select('game_date')\
             .eq('player_name', player_name)\
             .order('game_date', desc=True)\
@@ -146,159 +194,220 @@ def get_latest_cached_game_date(player_name):
     except:
         return None
 
+def build_stat_row(player_id, player_name, game, idx_map):
+    """Map one playergamelog/leaguegamelog row to a player_stats row (None for DNPs)"""
+    minutes = game[idx_map['MIN']]
+    if not minutes or minutes == 0:
+        return None
+
+    matchup = game[idx_map['MATCHUP']] or ''
+    opponent = matchup.split('vs.')[-1].split('@')[-1].strip() if ('vs.' in matchup or '@' in matchup) else 'UNK'
+
+    return {
+        'player_name': player_name,
+        'player_id': f'nba-{player_id}',
+        'game_date': game[idx_map['GAME_DATE']],
+        'points': game[idx_map['PTS']] or 0,
+        'rebounds': game[idx_map['REB']] or 0,
+        'assists': game[idx_map['AST']] or 0,
+        'steals': game[idx_map['STL']] or 0,
+        'blocks': game[idx_map['BLK']] or 0,
+        'turnovers': game[idx_map['TOV']] or 0,
+        'three_pointers_made': game[idx_map['FG3M']] or 0,
+        'field_goals_made': game[idx_map['FGM']] or 0,
+        'field_goals_attempted': game[idx_map['FGA']] or 0,
+        'free_throws_made': game[idx_map['FTM']] or 0,
+        'free_throws_attempted': game[idx_map['FTA']] or 0,
+        'minutes': minutes,
+        'opponent': opponent,
+    }
+
 def fetch_player_stats(player_id, player_name, latest_cached_date=None):
-    url = f'https://stats.nba.com/stats/playergamelog?PlayerID={player_id}&Season=2025-26&SeasonType=Regular+Season'
-    
-    for attempt in range(5):
+    url = f'{NBA_STATS_BASE_URL}/playergamelog?PlayerID={player_id}&Season={SEASON}&SeasonType=Regular+Season'
+
+    data = nba_get(url)
+    if not data:
+        return []
+
+    games = data['resultSets'][0]['rowSet']
+    headers = data['resultSets'][0]['headers']
+
+    idx_map = {h: headers.index(h) for h in GAME_LOG_COLUMNS}
+
+    stats = []
+    for game in games[:15]:  # Last 15 games
+        # Skip games we already have cached
+        if latest_cached_date and game[idx_map['GAME_DATE']] <= latest_cached_date:
+            continue
+
+        row = build_stat_row(player_id, player_name, game, idx_map)
+        if row:
+            stats.append(row)
+
+    return stats
+
+def save_player_stats(rows):
+    """Bulk upsert on UNIQUE(player_name, game_date); rows already stored are left untouched"""
+    saved = 0
+    for start in range(0, len(rows), PLAYER_STATS_UPSERT_CHUNK):
+        chunk = rows[start:start + PLAYER_STATS_UPSERT_CHUNK]
+        context.supabase.table('player_stats')\
+            .upsert(chunk, on_conflict='player_name,game_date', ignore_duplicates=True)\
+            .execute()
+        saved += len(chunk)
+    return saved
+
+def get_stats_watermark():
+    """Most recent game_date in player_stats across all players (one query)"""
+    result = context.supabase.table('player_stats')\
+        .select('game_date')\
+        .order('game_date', desc=True)\
+        .limit(1)\
+        .execute()
+    return result.data[0]['game_date'] if result.data else None
+
+def fetch_league_game_log(date_from=None, date_to=None):
+    """Every player's box score between two YYYY-MM-DD dates in a single leaguegamelog request"""
+    def nba_date(d):
+        return datetime.strptime(d, '%Y-%m-%d').strftime('%m/%d/%Y') if d else ''
+
+    url = (f'{NBA_STATS_BASE_URL}/leaguegamelog?LeagueID=00&Season={SEASON}&SeasonType=Regular+Season'
+           f'&PlayerOrTeam=P&Sorter=DATE&Direction=DESC&Counter=0'
+           f'&DateFrom={nba_date(date_from)}&DateTo={nba_date(date_to)}')
+
+    data = nba_get(url)
+    if not data:
+        return None
+
+    games = data['resultSets'][0]['rowSet']
+    headers = data['resultSets'][0]['headers']
+    idx_map = {h: headers.index(h) for h in GAME_LOG_COLUMNS + ('PLAYER_ID', 'PLAYER_NAME')}
+
+    rows = []
+    for game in games:
+        row = build_stat_row(game[idx_map['PLAYER_ID']], game[idx_map['PLAYER_NAME']], game, idx_map)
+        if row:
+            rows.append(row)
+    return rows
+
+def ingest_league(since=None, until=None):
+    """League-wide mode: one watermark query, one game log request, one bulk upsert"""
+    watermark = get_stats_watermark()
+    # Re-pull the watermark day itself so games that finished after the last run are picked up
+    date_from = since or watermark
+    print(f'📍 Watermark: {watermark or "empty table"} -> fetching {date_from or "season start"} to {until or "today"}')
+
+    rows = fetch_league_game_log(date_from, until)
+    if rows is None:
+        print('❌ Failed to fetch league game log')
+        return 0
+
+    if date_from:
+        rows = [r for r in rows if r['game_date'] >= date_from]
+    players = len({r['player_name'] for r in rows})
+    print(f'✓ {len(rows)} box scores for {players} players')
+
+    saved = save_player_stats(rows)
+    print(f'✅ Upserted {saved} rows (existing player/date pairs skipped)')
+    return saved
+
+def process_player(player_name):
+    """Refresh one player's cached games; returns ('updated' | 'cached' | 'error', message)"""
+    # Check what we already have cached
+    latest_cached = get_latest_cached_game_date(player_name)
+
+    if latest_cached:
+        # If cache is less than 2 days old, skip this player
         try:
-            time.sleep(3 + attempt)
-            response = session.get(url, headers=NBA_HEADERS, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                games = data['resultSets'][0]['rowSet']
-                headers = data['resultSets'][0]['headers']
-                
-                idx_map = {h: headers.index(h) for h in ['GAME_DATE', 'MATCHUP', 'MIN', 'PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA']}
-                
-                stats = []
-                for game in games[:15]:  # Last 15 games
-                    game_date = game[idx_map['GAME_DATE']]
-                    
-                    # Skip games we already have cached
-                    if latest_cached_date and game_date <= latest_cached_date:
-                        continue
-                    
-                    minutes = game[idx_map['MIN']]
-                    if not minutes or minutes == 0:
-                        continue
-                    
-                    matchup = game[idx_map['MATCHUP']] or ''
-                    opponent = matchup.split('vs.')[-1].split('@')[-1].strip() if ('vs.' in matchup or '@' in matchup) else 'UNK'
-                    
-                    stats.append({
-                        'player_name': player_name,
-                        'player_id': f'nba-{player_id}',
-                        'game_date': game_date,
-                        'points': game[idx_map['PTS']] or 0,
-                        'rebounds': game[idx_map['REB']] or 0,
-                        'assists': game[idx_map['AST']] or 0,
-                        'steals': game[idx_map['STL']] or 0,
-                        'blocks': game[idx_map['BLK']] or 0,
-                        'turnovers': game[idx_map['TOV']] or 0,
-                        'three_pointers_made': game[idx_map['FG3M']] or 0,
-                        'field_goals_made': game[idx_map['FGM']] or 0,
-                        'field_goals_attempted': game[idx_map['FGA']] or 0,
-                        'free_throws_made': game[idx_map['FTM']] or 0,
-                        'free_throws_attempted': game[idx_map['FTA']] or 0,
-                        'minutes': minutes,
-                        'opponent': opponent,
-                    })
-                
-                return stats
-            elif response.status_code == 429:
-                wait_time = 15 * (attempt + 1)
-                print(f'      ⚠️  Rate limited. Waiting {wait_time}s...')
-                time.sleep(wait_time)
-            else:
-                print(f'      ⚠️  Stats API returned {response.status_code}, retrying in {5 * (attempt + 1)}s...')
-                time.sleep(5 * (attempt + 1))
-        except requests.exceptions.ConnectionError:
-            print(f'      ⚠️  Connection error, retrying in {7 * (attempt + 1)}s...')
-            time.sleep(7 * (attempt + 1))
-        except Exception as e:
-            print(f'      ⚠️  Request failed: {str(e)[:50]}, retrying in {7 * (attempt + 1)}s...')
-            time.sleep(7 * (attempt + 1))
-    
-    return []
-
-# Process players
-success = 0
-errors = 0
-skipped_cached = 0
-rate_limited = False
-
-for i, player_name in enumerate(unique_players, 1):
-    print(f'[{i}/{len(unique_players)}] 🔍 {player_name}...')
-    
-    if rate_limited and i % 10 == 0:
-        print('   ⏸️  Taking a 30s break to avoid rate limiting...')
-        time.sleep(30)
-        rate_limited = False
-    
-    try:
-        # Check what we already have cached
-        latest_cached = get_latest_cached_game_date(player_name)
-        
+            days_old = (datetime.now() - datetime.strptime(latest_cached, '%Y-%m-%d')).days
+            if days_old < 2:
+                return 'cached', f'✓ Cache up-to-date (latest: {latest_cached})'
+        except ValueError:
+            pass
+
+    # Find player
+    player = find_player(player_name)
+    if not player:
+        return 'error', '⚠️  Not found'
+
+    # Fetch only new stats
+    stats = fetch_player_stats(player['id'], player['name'], latest_cached)
+
+    if not stats:
         if latest_cached:
-            # Check how recent the cache is
+            return 'cached', f'✓ No new games since {latest_cached}'
+        return 'error', '⚠️  No stats found'
+
+    # Save new games to database (duplicates are skipped by the unique constraint)
+    save_player_stats(stats)
+
+    latest = stats[0]
+    return 'updated', (f'✅ Saved {len(stats)} NEW games (latest: {latest["game_date"]} - {latest["points"]} PTS, '
+                       f'{latest["rebounds"]} REB, {latest["assists"]} AST vs {latest["opponent"]})')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fetch NBA player game logs into player_stats')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='concurrent player fetches')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='max stats.nba.com requests per second')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help='token bucket burst size')
+    parser.add_argument('--league', action='store_true', help='ingest the league-wide game log instead of per-player logs')
+    parser.add_argument('--since', help='league mode: first game date (YYYY-MM-DD, default: stored watermark)')
+    parser.add_argument('--until', help='league mode: last game date (YYYY-MM-DD, default: today)')
+    args = parser.parse_args(argv)
+
+    global limiter
+    limiter = TokenBucket(rate=args.rate, burst=args.burst)
+
+    if args.league:
+        print('🏀 Fetching NBA Player Stats (League Game Log Mode)')
+        print('=' * 60)
+        started = time.monotonic()
+        ingest_league(args.since, args.until)
+        print(f'⏱️  Done in {time.monotonic() - started:.1f}s')
+        return
+
+    print('🏀 Fetching NBA Player Stats (Incremental Cache Mode)')
+    print('=' * 60)
+    print(f'⚙️  {args.workers} workers, {args.rate:g} req/s (burst {args.burst}) against {NBA_STATS_BASE_URL}')
+
+    # Get unique players from props
+    print('\n📊 Fetching players from props...')
+    unique_players = sorted(set([p['player_name'] for p in context.props()]))
+    print(f'✓ Found {len(unique_players)} unique players\n')
+
+    # Load the player directory and name index once before fanning out
+    get_player_index()
+
+    started = time.monotonic()
+    counts = {'updated': 0, 'cached': 0, 'error': 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(process_player, name): name for name in unique_players}
+        for done, future in enumerate(as_completed(futures), 1):
+            player_name = futures[future]
             try:
-                cached_dt = datetime.strptime(latest_cached, '%Y-%m-%d')
-                now = datetime.now()
-                days_old = (now - cached_dt).days
-                
-                # If cache is less than 2 days old, skip this player
-                if days_old < 2:
-                    print(f'  ✓ Cache up-to-date (latest: {latest_cached}), skipping...\n')
-                    skipped_cached += 1
-                    continue
-                else:
-                    print(f'  📦 Cache found (latest: {latest_cached}), fetching new games only...')
-            except:
-                pass
-        
-        # Find player
-        player = find_player(player_name)
-        if not player:
-            print(f'  ⚠️  Not found\n')
-            errors += 1
-            time.sleep(2)
-            continue
-        
-        # Fetch only new stats
-        stats = fetch_player_stats(player['id'], player['name'], latest_cached)
-        
-        if not stats or len(stats) == 0:
-            if latest_cached:
-                print(f'  ✓ No new games since {latest_cached}\n')
-                skipped_cached += 1
-            else:
-                print(f'  ⚠️  No stats found\n')
-                errors += 1
-            time.sleep(2)
-            continue
-        
-        # Save new games to database
-        for stat in stats:
-            # Double-check to avoid duplicates
-            existing = supabase.table('player_stats')\
-                .select('id')\
-                .eq('player_name', stat['player_name'])\
-                .eq('game_date', stat['game_date'])\
-                .execute()
-            
-            if not existing.data:
-                supabase.table('player_stats').insert(stat).execute()
-        
-        print(f'  ✅ Saved {len(stats)} NEW games')
-        print(f'     Latest: {stats[0]["game_date"]} - {stats[0]["points"]} PTS, {stats[0]["rebounds"]} REB, {stats[0]["assists"]} AST vs {stats[0]["opponent"]}\n')
-        success += 1
-        
-        time.sleep(4)
-        
-    except Exception as e:
-        print(f'  ❌ Error: {str(e)[:80]}\n')
-        errors += 1
-        time.sleep(5)
-
-print('\n' + '=' * 60)
-print('📈 SUMMARY')
-print('=' * 60)
-print(f'✅ Updated: {success} players (new games added)')
-print(f'📦 Cached: {skipped_cached} players (already up-to-date)')
-print(f'❌ Errors: {errors} players')
-print(f'📊 Total: {len(unique_players)} players')
-print('=' * 60)
-print('\n💡 Incremental caching is active!')
-print('   Only new games are fetched, making runs much faster.')
-print('=' * 60)
\ No newline at end of file
+                status, message = future.result()
+            except Exception as e:
+                status, message = 'error', f'❌ Error: {str(e)[:80]}'
+            counts[status] += 1
+            log(f'[{done}/{len(unique_players)}] {player_name}: {message}')
+
+    elapsed = time.monotonic() - started
+
+    print('\n' + '=' * 60)
+    print('📈 SUMMARY')
+    print('=' * 60)
+    print(f'✅ Updated: {counts["updated"]} players (new games added)')
+    print(f'📦 Cached: {counts["cached"]} players (already up-to-date)')
+    print(f'❌ Errors: {counts["error"]} players')
+    print(f'📊 Total: {len(unique_players)} players in {elapsed:.1f}s ({limiter.throttled} rate-limit backoffs)')
+    if PLAYER_INDEX:
+        PLAYER_INDEX.report('Props -> NBA directory')
+        PLAYER_INDEX.save()
+    print('=' * 60)
+    print('\n💡 Incremental caching is active!')
+    print('   Only new games are fetched, making runs much faster.')
+    print('=' * 60)
+
+if __name__ == '__main__':
+    main()
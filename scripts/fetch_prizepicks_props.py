@@ -3,14 +3,19 @@
 """
 Fetch NBA player props from PrizePicks directly
 Store in Supabase without Edge Functions
+The board is synced by PrizePicks external_id: new props are inserted,
+moved lines updated and props that left the board retired (retired_at),
+so unchanged rows keep their projections, odds and game links.
 """
 
 import os
 import sys
 import requests
 from dotenv import load_dotenv
-from supabase import create_client
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from fix_team_abbreviations import TEAM_FIX_MAP
+from name_resolver import build_index, load_index
+from pipeline_context import get_context
 
 # Force UTF-8 encoding for Windows console
 if sys.platform == 'win32':
@@ -18,11 +23,8 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
-# Supabase client
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+# Supabase client and HTTP session shared with the other pipeline stages
+context = get_context()
 
 # Team abbreviations mapping
 TEAM_ABBR_MAP = {
@@ -39,8 +41,32 @@ TEAM_ABBR_MAP = {
     'Utah Jazz': 'UTA', 'Washington Wizards': 'WAS'
 }
 
+# Games (and, by cascade, their props) are deleted this long after tip-off
+PURGE_AFTER_HOURS = 36
+
+# Rows per insert/upsert request and ids per in_() filter
+WRITE_BATCH = 100
+
+# Columns a board refresh owns; everything else (projections, odds, game links) is left alone
+BOARD_COLUMNS = ('player_name', 'player_id', 'team', 'stat_type', 'line', 'prizepicks_odds')
+
 def get_team_abbr(team_name):
-    return TEAM_ABBR_MAP.get(team_name, team_name[:3].upper())
+    abbr = TEAM_ABBR_MAP.get(team_name, team_name[:3].upper())
+    # Same spelling fix_team_abbreviations.py would apply, so fixed rows don't look changed
+    return TEAM_FIX_MAP.get(abbr, abbr)
+
+def _same(a, b):
+    # Supabase returns DECIMAL columns as strings or floats
+    if a is None or b is None:
+        return a is b
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return a == b
+
+def _batches(items, size=WRITE_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i+size]
 
 def fetch_prizepicks_props():
     """Fetch props from PrizePicks API"""
@@ -55,7 +81,7 @@ def fetch_prizepicks_props():
             'Referer': 'https://app.prizepicks.com/',
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = context.session.get(url, headers=headers, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -80,8 +106,8 @@ def fetch_prizepicks_props():
         print(f'[-] Error fetching from PrizePicks: {e}')
         return [], {}, {}
 
-def store_games_from_projections(projections, players_map):
-    """Build and store games from projection data"""
+def sync_games_from_projections(projections, players_map):
+    """Build games from projection data; insert new ones and update moved ones by external_id"""
     print('[*] Building games from projections...')
     
     # Build games from projections by grouping players by game_id
@@ -108,11 +134,11 @@ def store_games_from_projections(projections, players_map):
         if team_name:
             games_by_id[game_id]['teams'].add(team_name)
     
-    # Create game inserts
-    game_inserts = []
+    # Board games keyed by PrizePicks id
+    board_games = {}
     
     for game_id, game_info in games_by_id.items():
-        teams = list(game_info['teams'])
+        teams = sorted(game_info['teams'])
         
         if len(teams) >= 2:
             home_team = teams[0]
@@ -123,7 +149,7 @@ def store_games_from_projections(projections, players_map):
         else:
             continue
         
-        game_inserts.append({
+        board_games[game_id] = {
             'external_id': game_id,
             'home_team': home_team,
             'away_team': away_team,
@@ -131,28 +157,59 @@ def store_games_from_projections(projections, players_map):
             'away_team_abbr': get_team_abbr(away_team),
             'game_time': game_info['scheduled_at'] or datetime.now(timezone.utc).isoformat(),
             'status': 'scheduled'
-        })
+        }
     
-    print(f'[*] Built {len(game_inserts)} games from projections')
+    print(f'[*] Built {len(board_games)} games from projections')
+    
+    existing = {g['external_id']: g for g in context.games() if g.get('external_id')}
+    game_inserts = []
+    updated = 0
+    
+    for external_id, game in board_games.items():
+        current = existing.get(external_id)
+        if current is None:
+            game_inserts.append(game)
+            continue
+        # Home/away come from an unordered team set; only a different matchup or tip-off is a change
+        changes = {}
+        if {current.get('home_team_abbr'), current.get('away_team_abbr')} != {game['home_team_abbr'], game['away_team_abbr']}:
+            changes.update({k: game[k] for k in ('home_team', 'away_team', 'home_team_abbr', 'away_team_abbr')})
+        if _tipoff_moved(current.get('game_time'), game['game_time']):
+            changes['game_time'] = game['game_time']
+        if changes:
+            try:
+                context.supabase.table('games').update(changes).eq('id', current['id']).execute()
+                current.update(changes)
+                updated += 1
+            except Exception as e:
+                print(f'[!] Error updating game {external_id}: {e}')
     
     if game_inserts:
         try:
-            supabase.table('games').insert(game_inserts).execute()
+            response = context.supabase.table('games').insert(game_inserts).execute()
+            context.add_rows('games', response.data)
             print(f'[+] Inserted {len(game_inserts)} games')
         except Exception as e:
             print(f'[!] Error inserting games: {e}')
     
-    # Get all games to build ID map
-    result = supabase.table('games').select('id, external_id').execute()
-    game_id_map = {g['external_id']: g['id'] for g in result.data}
+    print(f'[+] Games: {len(game_inserts)} new, {updated} updated, {len(board_games) - len(game_inserts) - updated} unchanged')
+    
+    game_id_map = {g['external_id']: g['id'] for g in context.games() if g.get('external_id')}
     
     print(f'[*] Game ID map has {len(game_id_map)} entries')
     
     return game_id_map
 
-def store_props(projections, players_map, game_id_map):
-    """Store props in Supabase"""
-    print('[*] Storing props...')
+def _tipoff_moved(current, new):
+    '''Compare tip-offs as instants (Supabase normalizes the offset)'''
+    try:
+        return datetime.fromisoformat(current.replace('Z', '+00:00')) != datetime.fromisoformat(new.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return current != new
+
+def board_props(projections, players_map, game_id_map):
+    """Main-line props on the board, as props rows keyed by PrizePicks external_id"""
+    print('[*] Building props...')
     
     # Define key stat types we want to track
     KEY_STAT_TYPES = {
@@ -263,8 +320,8 @@ def store_props(projections, players_map, game_id_map):
     print('=' * 60)
     print()
     
-    # Insert props
-    prop_inserts = []
+    # Build props rows
+    board = {}
     skipped_no_player = 0
     skipped_no_game = 0
     
@@ -290,41 +347,103 @@ def store_props(projections, players_map, game_id_map):
         
         line = attrs.get('line_score', 0)
         
-        prop_inserts.append({
+        board[proj['id']] = {
             'game_id': db_game_id,
             'external_id': proj['id'],
             'player_name': player_name,
             'player_id': player_id,
-            'team': team,
+            'team': TEAM_FIX_MAP.get(team, team),
             'stat_type': attrs.get('stat_type', ''),
             'line': float(line),
             'prizepicks_odds': float(line),
-            'projection': None,
-            'edge': None,
-            'probability_over': None,
-            'confidence': None
-        })
+        }
     
-    print(f'[*] Prepared {len(prop_inserts)} props for insert')
+    print(f'[*] Prepared {len(board)} props')
     print(f'    Skipped: {skipped_no_player} (no player), {skipped_no_game} (no game match)')
+
+    # Persist board names for the odds/injury scripts and check them against the NBA directory
+    board_names = {p['player_name'] for p in board.values()}
+    build_index('board', board_names)
+    nba_index = load_index('nba')
+    for name in board_names:
+        nba_index.resolve(name)
+    nba_index.report('Board -> NBA directory')
+    nba_index.save()
+    
+    return board
+
+def sync_props(board):
+    """Insert new props, update moved ones and retire the ones that left the board; returns write counts"""
+    print('[*] Syncing props...')
+    existing = {p['external_id']: p for p in context.props(include_retired=True) if p.get('external_id')}
+    now = datetime.now(timezone.utc).isoformat()
+    
+    inserts = []
+    changed = []
+    unchanged = 0
+    
+    for external_id, prop in board.items():
+        current = existing.get(external_id)
+        if current is None:
+            inserts.append(prop)
+        elif current.get('retired_at') or not all(_same(current.get(col), prop[col]) for col in BOARD_COLUMNS):
+            # Back on the board or moved: board columns only, game link and projections stay
+            changed.append(dict({col: prop[col] for col in BOARD_COLUMNS}, id=current['id'], external_id=external_id, retired_at=None))
+        else:
+            unchanged += 1
+    
+    # Active rows that are no longer offered (including rows without a PrizePicks id)
+    retired = [p for p in context.props() if p.get('external_id') not in board]
     
-    if prop_inserts:
+    counts = {'inserted': 0, 'updated': 0, 'retired': 0, 'unchanged': unchanged, 'errors': 0}
+    
+    for batch in _batches(inserts):
         try:
-            # Insert in batches
-            batch_size = 100
-            total_inserted = 0
-            for i in range(0, len(prop_inserts), batch_size):
-                batch = prop_inserts[i:i+batch_size]
-                supabase.table('props').insert(batch).execute()
-                total_inserted += len(batch)
-            
-            print(f'[+] Inserted {total_inserted} props total')
-            return total_inserted
+            response = context.supabase.table('props').insert(batch).execute()
+            context.add_rows('props', response.data)
+            counts['inserted'] += len(batch)
         except Exception as e:
+            counts['errors'] += len(batch)
             print(f'[-] Error inserting props: {e}')
-            return 0
     
-    return 0
+    for batch in _batches(changed):
+        try:
+            context.supabase.table('props').upsert(batch, on_conflict='id').execute()
+            context.update_rows('props', {row['id']: row for row in batch})
+            counts['updated'] += len(batch)
+        except Exception as e:
+            counts['errors'] += len(batch)
+            print(f'[-] Error updating props: {e}')
+    
+    for batch in _batches([p['id'] for p in retired]):
+        try:
+            context.supabase.table('props').update({'retired_at': now}).in_('id', batch).execute()
+            context.update_rows('props', {prop_id: {'retired_at': now} for prop_id in batch})
+            counts['retired'] += len(batch)
+        except Exception as e:
+            counts['errors'] += len(batch)
+            print(f'[-] Error retiring props: {e}')
+    
+    print(f"[+] Props: {counts['inserted']} new, {counts['updated']} updated, "
+          f"{counts['retired']} retired, {counts['unchanged']} unchanged")
+    if counts['errors']:
+        print(f"[!] {counts['errors']} props could not be written; the next run retries them")
+    return counts
+
+def purge_finished_games():
+    """Delete games that tipped off more than PURGE_AFTER_HOURS ago (their props go with them)"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=PURGE_AFTER_HOURS)).isoformat()
+    try:
+        response = context.supabase.table('games').delete().lt('game_time', cutoff).execute()
+    except Exception as e:
+        print(f'[!] Could not purge finished games: {e}')
+        return 0
+    purged = {g['id'] for g in response.data or []}
+    if purged:
+        context.remove_rows('games', lambda g: g['id'] not in purged)
+        context.remove_rows('props', lambda p: p.get('game_id') not in purged)
+        print(f'[+] Purged {len(purged)} finished games and their props')
+    return len(purged)
 
 def main():
     print('=' * 60)
@@ -332,47 +451,38 @@ def main():
     print('=' * 60)
     print()
     
-    # Clear existing data
-    print('[*] Clearing old data...')
-    try:
-        supabase.table('props').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-        supabase.table('games').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
-        print('[+] Cleared old data')
-    except Exception as e:
-        print(f'[!] Could not clear old data: {e}')
-    
-    print()
-    
     # Fetch from PrizePicks
     projections, players_map, games_map = fetch_prizepicks_props()
     
     if not projections:
+        # Keep the current board rather than retiring everything on a failed fetch
         print('[-] No props found from PrizePicks')
         return
     
     print()
     
-    # Store games (built from projections, not from games_map)
-    game_id_map = store_games_from_projections(projections, players_map)
+    # Sync games (built from projections, not from games_map)
+    game_id_map = sync_games_from_projections(projections, players_map)
     
     print()
     
-    # Store props
-    props_count = store_props(projections, players_map, game_id_map)
+    # Sync props
+    counts = sync_props(board_props(projections, players_map, game_id_map))
+    purge_finished_games()
     
     print()
     print('=' * 60)
     print('PROPS FETCH COMPLETE')
     print('=' * 60)
     print(f'Games: {len(game_id_map)}')
-    print(f'Props: {props_count}')
+    print(f"Props: {counts['inserted']} new, {counts['updated']} updated, {counts['retired']} retired, {counts['unchanged']} unchanged")
     print()
     
-    if props_count > 0:
+    if counts['inserted'] + counts['updated'] + counts['unchanged'] > 0:
         print('[+] Success! Props are now in Supabase')
         print('    Next: Run .\\run-projections.ps1 to calculate projections')
     else:
-        print('[!] No props were inserted. Check the errors above.')
+        print('[!] No props are on the board. Check the errors above.')
 
 if __name__ == '__main__':
     main()
@@ -6,41 +6,28 @@ Store odds in LOCAL SQLite database - NO SUPABASE NEEDED!
 
 import os
 import sys
-from datetime import datetime, timezone
-import requests
 import json
 import sqlite3
+from name_resolver import load_index
+from odds_snapshot import SnapshotWriter, connect, describe
+from odds_api import ODDS_API_KEY, PROP_MARKETS, fetch_all_event_odds, get_nba_games, iter_prop_lines, quota_summary
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
-# The Odds API configuration
-ODDS_API_KEY = os.getenv('ODDS_API_KEY', 'dd30c0f0f1f494e7c0a5cef66366da2b')
-BASE_URL = "https://api.the-odds-api.com/v4"
-
 # SQLite database file - stored locally, no cloud needed!
 DB_FILE = 'odds_history.db'
 
-# Stat type mapping from The Odds API to our database
-ODDS_API_STAT_MAP = {
-    'player_points': 'Points',
-    'player_rebounds': 'Rebounds',
-    'player_assists': 'Assists',
-    'player_threes': '3-PT Made',
-    'player_blocks': 'Blocked Shots',
-    'player_steals': 'Steals',
-    'player_turnovers': 'Turnovers',
-    'player_points_rebounds_assists': 'Pts+Rebs+Asts',
-    'player_points_rebounds': 'Pts+Rebs',
-    'player_points_assists': 'Pts+Asts',
-    'player_rebounds_assists': 'Rebs+Asts',
-    'player_blocks_steals': 'Blks+Stls'
-}
+# Also request the yes/no markets (not stored, they have no over/under line)
+MARKETS = PROP_MARKETS + ['player_double_double', 'player_triple_double']
+
+# Odds API spellings are mapped onto the props board names saved by fetch_prizepicks_props.py
+board_names = load_index('board')
 
 def setup_database():
     """Create SQLite database and table if it doesn't exist"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = connect(DB_FILE)
     cursor = conn.cursor()
     
     # Create odds_history table
@@ -74,149 +61,51 @@ def setup_database():
     conn.close()
     print('✅ Local SQLite database ready!')
 
-def save_odds_to_db(player_name, stat_type, sportsbook, line, over_odds, under_odds, game_id=None):
-    """Save odds to SQLite database"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO odds_history 
-            (player_name, stat_type, sportsbook, line, over_odds, under_odds, recorded_at, game_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            player_name,
-            stat_type,
-            sportsbook,
-            float(line),
-            int(over_odds),
-            int(under_odds),
-            datetime.now(timezone.utc).isoformat(),
-            game_id
-        ))
-        
-        conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f'⚠️  Error saving to DB: {e}')
-        return False
-
-def get_nba_games():
-    """Fetch upcoming NBA games from The Odds API"""
-    try:
-        url = f"{BASE_URL}/sports/basketball_nba/events"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'dateFormat': 'iso'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        games = response.json()
-        print(f"✅ Found {len(games)} upcoming NBA games")
-        return games
-        
-    except Exception as e:
-        print(f"❌ Error fetching games: {e}")
-        return []
-
-def get_player_prop_odds(game_id):
-    """Fetch player prop odds for a specific game"""
-    try:
-        bookmakers = 'draftkings,fanduel'
-        
-        # Request ALL available player prop markets including combos
-        markets = ','.join([
-            'player_points',
-            'player_rebounds', 
-            'player_assists',
-            'player_threes',
-            'player_blocks',
-            'player_steals',
-            'player_turnovers',
-            'player_points_rebounds_assists',
-            'player_points_rebounds',
-            'player_points_assists',
-            'player_rebounds_assists',
-            'player_blocks_steals',
-            'player_double_double',
-            'player_triple_double',
-        ])
-        
-        url = f"{BASE_URL}/sports/basketball_nba/events/{game_id}/odds"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'regions': 'us',
-            'markets': markets,
-            'oddsFormat': 'american',
-            'bookmakers': bookmakers
-        }
-        
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data
-        
-    except Exception as e:
-        print(f"⚠️  Error fetching odds for game {game_id}: {e}")
-        return None
+# Every outcome of a run is staged here and written in one transaction at the end
+SNAPSHOT_COLUMNS = ('player_name', 'stat_type', 'sportsbook', 'line', 'over_odds',
+                    'under_odds', 'recorded_at', 'game_id')
 
 sportsbook_odds_cache = {}
 
-def store_odds(odds_data, game_id=None):
-    """Parse odds data and store in memory cache AND database"""
+def store_odds(odds_data, writer, game_id=None):
+    """Parse odds data into the memory cache and stage rows for the database"""
     if not odds_data or 'bookmakers' not in odds_data:
         return 0, 0
     
     count = 0
     saved_count = 0
     
-    for bookmaker in odds_data.get('bookmakers', []):
-        sportsbook_name = bookmaker.get('title', '')
-        
-        for market in bookmaker.get('markets', []):
-            market_key = market.get('key')
-            stat_type = ODDS_API_STAT_MAP.get(market_key)
-            
-            if not stat_type:
-                continue
-            
-            for outcome in market.get('outcomes', []):
-                player_name = outcome.get('description')
-                line = outcome.get('point')
-                
-                if outcome.get('name') == 'Over':
-                    over_price = outcome.get('price')
-                    
-                    # Find corresponding under
-                    under_price = None
-                    for other in market.get('outcomes', []):
-                        if (other.get('description') == player_name and 
-                            other.get('name') == 'Under' and 
-                            other.get('point') == line):
-                            under_price = other.get('price')
-                            break
-                    
-                    if over_price and under_price and line:
-                        key = (player_name, stat_type)
-                        
-                        if key not in sportsbook_odds_cache:
-                            sportsbook_odds_cache[key] = {}
-                        
-                        sportsbook_odds_cache[key][sportsbook_name] = {
-                            'line': float(line),
-                            'over': int(over_price),
-                            'under': int(under_price)
-                        }
-                        count += 1
-                        
-                        # Save to local SQLite database
-                        if save_odds_to_db(player_name, stat_type, sportsbook_name, 
-                                          line, over_price, under_price, game_id):
-                            saved_count += 1
+    for prop in iter_prop_lines(odds_data):
+        sportsbook_name = prop['sportsbook']
+        stat_type = prop['stat_type']
+        line = prop['line']
+        over_price = prop['over_price']
+        under_price = prop['under_price']
+        player_name = board_names.canonical(prop['player_name'])
+        key = (player_name, stat_type)
+        
+        if key not in sportsbook_odds_cache:
+            sportsbook_odds_cache[key] = {}
+        
+        sportsbook_odds_cache[key][sportsbook_name] = {
+            'line': float(line),
+            'over': int(over_price),
+            'under': int(under_price)
+        }
+        count += 1
+        
+        # Staged for the single snapshot write in main()
+        writer.add({
+            'player_name': player_name,
+            'stat_type': stat_type,
+            'sportsbook': sportsbook_name,
+            'line': float(line),
+            'over_odds': int(over_price),
+            'under_odds': int(under_price),
+            'recorded_at': writer.recorded_at,
+            'game_id': game_id
+        })
+        saved_count += 1
     
     return count, saved_count
 
@@ -249,45 +138,57 @@ def main():
         print('❌ No games found')
         return
     
+    print(f"✅ Found {len(games)} upcoming NBA games")
     print()
     
-    # Step 2: Fetch odds for each game
+    # Step 2: Fetch odds for every game at once
     print('💰 Step 2: Fetching DraftKings & FanDuel odds...')
     print('   (Storing in local database for line movement tracking)')
+    results, fetch_secs = fetch_all_event_odds(games, MARKETS)
+    print(f'   Fetched {len(results)} events in {fetch_secs:.1f}s ({quota_summary()})')
     
     total_odds = 0
     total_saved = 0
+    writer = SnapshotWriter(DB_FILE, 'odds_history', SNAPSHOT_COLUMNS, conflict='ABORT')
     
-    for i, game in enumerate(games[:10], 1):
+    for i, (game, odds_data) in enumerate(results, 1):
         game_id = game.get('id')
         home_team = game.get('home_team')
         away_team = game.get('away_team')
         
-        print(f'\n  [{i}/{min(10, len(games))}] {away_team} @ {home_team}')
-        
-        odds_data = get_player_prop_odds(game_id)
+        print(f'\n  [{i}/{len(results)}] {away_team} @ {home_team}')
         
         if odds_data:
-            count, saved = store_odds(odds_data, game_id)
+            count, saved = store_odds(odds_data, writer, game_id)
             total_odds += count
             total_saved += saved
             if count > 0:
-                print(f'      ✅ {count} odds ({saved} saved to local DB)')
+                print(f'      ✅ {count} odds ({saved} staged for local DB)')
             else:
                 print(f'      ⚠️  No odds available')
         else:
             print(f'      ⚠️  No odds available')
     
+    print()
+    try:
+        timings = writer.flush()
+        total_saved = timings['inserted']
+        print(f'💾 Snapshot: {describe(timings)}')
+    except sqlite3.Error as e:
+        total_saved = 0
+        print(f'⚠️  Error saving to DB: {e}')
+    
     print()
     print('=' * 60)
     print('✅ SPORTSBOOK ODDS FETCH COMPLETE')
     print('=' * 60)
     print(f'📊 Total odds fetched: {total_odds}')
     print(f'💾 Total odds saved to local database: {total_saved}')
+    board_names.report('Odds -> props board')
     print()
     
     # Show database stats
-    conn = sqlite3.connect(DB_FILE)
+    conn = connect(DB_FILE)
     cursor = conn.cursor()
     cursor.execute('SELECT COUNT(*) FROM odds_history')
     total_records = cursor.fetchone()[0]
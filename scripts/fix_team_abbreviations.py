@@ -1,7 +1,7 @@
 import os
 import sys
 from dotenv import load_dotenv
-from supabase import create_client
+from pipeline_context import get_context
 
 load_dotenv()
 
@@ -10,10 +10,7 @@ try:
 except Exception:
     pass
 
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
 
 # Mapping from incorrect team abbreviations to correct ones
 TEAM_FIX_MAP = {
@@ -54,8 +51,7 @@ def main():
     
     # Fix props table
     print('Fetching props...')
-    props_response = supabase.table('props').select('*').execute()
-    props = props_response.data
+    props = context.props()
     print(f'Found {len(props)} props\n')
     
     fixed_props = 0
@@ -74,9 +70,10 @@ def main():
             correct_team = TEAM_FIX_MAP[current_team]
             
             # Update the database
-            supabase.table('props').update({
+            context.supabase.table('props').update({
                 'team': correct_team
             }).eq('id', prop_id).execute()
+            prop['team'] = correct_team
             
             print(f'Fixed prop: {prop["player_name"]} - {current_team} → {correct_team}')
             fixed_props += 1
@@ -85,8 +82,7 @@ def main():
     
     # Fix games table
     print(f'\nFetching games...')
-    games_response = supabase.table('games').select('*').execute()
-    games = games_response.data
+    games = context.games()
     print(f'Found {len(games)} games\n')
     
     fixed_games = 0
@@ -115,7 +111,8 @@ def main():
             print(f'Fixed game away: {away_team} → {correct_away}')
         
         if needs_update:
-            supabase.table('games').update(updates).eq('id', game_id).execute()
+            context.supabase.table('games').update(updates).eq('id', game_id).execute()
+            game.update(updates)
             fixed_games += 1
         else:
             unchanged_games += 1
@@ -0,0 +1,341 @@
+"""
+Local columnar store of player game logs
+One directory per season under .cache/game_logs, one .npy file per column,
+memory-mapped on load. Text columns are dictionary-encoded (codes + vocab).
+Game logs never change once written, so Supabase is only asked for rows
+created since the last sync (player_stats.created_at, kept in sync.json).
+Keying on creation time rather than game date also picks up backfills, such
+as the last 15 games of a newly tracked player.
+
+Usage:
+    python scripts/game_log_store.py            # bootstrap / top up from Supabase
+    python scripts/game_log_store.py --rebuild  # drop the store and reload everything
+    python scripts/game_log_store.py --info     # partitions, rows, load time
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+STORE_DIR = os.getenv('GAME_LOG_STORE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'game_logs')
+
+# Dictionary-encoded text columns
+TEXT_COLUMNS = ('player_name', 'player_id', 'opponent')
+
+# Numeric player_stats columns and their on-disk dtypes
+NUMERIC_COLUMNS = {
+    'minutes': 'f4',
+    'points': 'i2',
+    'rebounds': 'i2',
+    'assists': 'i2',
+    'steals': 'i2',
+    'blocks': 'i2',
+    'turnovers': 'i2',
+    'three_pointers_made': 'i2',
+    'field_goals_made': 'i2',
+    'field_goals_attempted': 'i2',
+    'free_throws_made': 'i2',
+    'free_throws_attempted': 'i2',
+}
+
+PAGE_SIZE = 1000
+
+# Re-read rows created this long before the last sync, so rows from a
+# transaction that committed late are not skipped (duplicates are dropped)
+SYNC_OVERLAP = timedelta(minutes=10)
+
+def season_for(game_date):
+    '''NBA season label for a YYYY-MM-DD date (October onwards belongs to the next season)'''
+    year, month = int(game_date[:4]), int(game_date[5:7])
+    start = year if month >= 10 else year - 1
+    return f'{start}-{str(start + 1)[-2:]}'
+
+def _number(value):
+    if value is None or value == '':
+        return 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # 'MM:SS' minutes from older imports
+        mins, _, secs = str(value).partition(':')
+        return float(mins) + float(secs or 0) / 60
+
+class SeasonPartition:
+    '''Column arrays for one season, sorted by (player code, game_date desc)'''
+
+    def __init__(self, path):
+        self.path = path
+        self.vocab = {col: [] for col in TEXT_COLUMNS}
+        self.columns = {}
+        self.size = 0
+        self.player_slices = {}
+
+    def load(self):
+        meta_path = os.path.join(self.path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+
+        columns = {}
+        for col in ('game_date',) + TEXT_COLUMNS + tuple(NUMERIC_COLUMNS):
+            columns[col] = np.load(os.path.join(self.path, f'{col}.npy'), mmap_mode='r')
+            # meta.json is written last; a length mismatch means an interrupted save
+            if len(columns[col]) != meta['rows']:
+                return False
+
+        self.vocab = meta['vocab']
+        self.columns = columns
+        self.size = meta['rows']
+        self._index()
+        return True
+
+    def _index(self):
+        codes = np.asarray(self.columns['player_name'])
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if self.size else np.array([], dtype=int)
+        ends = np.r_[starts[1:], self.size]
+        names = self.vocab['player_name']
+        self.player_slices = {names[codes[s]]: (s, e) for s, e in zip(starts, ends)}
+
+    def rows(self, player_name, limit):
+        '''Newest-first player_stats dicts for one player'''
+        bounds = self.player_slices.get(player_name)
+        if not bounds:
+            return []
+        start, end = bounds
+        end = min(end, start + limit)
+        cols = self.columns
+        out = []
+        for i in range(start, end):
+            row = {
+                'player_name': player_name,
+                'player_id': self.vocab['player_id'][cols['player_id'][i]],
+                'opponent': self.vocab['opponent'][cols['opponent'][i]],
+                'game_date': str(cols['game_date'][i]),
+                'minutes': float(cols['minutes'][i]),
+            }
+            for col, dtype in NUMERIC_COLUMNS.items():
+                if dtype != 'f4':
+                    row[col] = int(cols[col][i])
+            out.append(row)
+        return out
+
+    def merge(self, new_rows):
+        '''Add rows (newer copies win on (player_name, game_date)) and rewrite the partition'''
+        vocab = {col: list(self.vocab[col]) for col in TEXT_COLUMNS}
+        lookup = {col: {v: i for i, v in enumerate(vocab[col])} for col in TEXT_COLUMNS}
+
+        def encode(col, value):
+            value = value if value is not None else ''
+            code = lookup[col].get(value)
+            if code is None:
+                code = lookup[col][value] = len(vocab[col])
+                vocab[col].append(value)
+            return code
+
+        # New rows first so np.unique keeps them over stored copies
+        columns = {'game_date': np.array([r['game_date'] for r in new_rows], dtype='datetime64[D]')}
+        for col in TEXT_COLUMNS:
+            columns[col] = np.array([encode(col, r.get(col)) for r in new_rows], dtype='i4')
+        for col, dtype in NUMERIC_COLUMNS.items():
+            columns[col] = np.array([_number(r.get(col)) for r in new_rows], dtype=dtype)
+        if self.size:
+            columns = {col: np.concatenate([values, np.asarray(self.columns[col])]) for col, values in columns.items()}
+
+        keys = np.stack([columns['player_name'].astype('i8'), columns['game_date'].astype('i8')], axis=1)
+        _, keep = np.unique(keys, axis=0, return_index=True)
+        columns = {col: values[keep] for col, values in columns.items()}
+        n = len(keep)
+
+        # Player code ascending, newest game first within a player
+        order = np.lexsort((-columns['game_date'].astype('i8'), columns['player_name']))
+        columns = {col: values[order] for col, values in columns.items()}
+
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self.columns = {}
+        for col, values in columns.items():
+            tmp = os.path.join(self.path, f'{col}.tmp.npy')
+            np.save(tmp, values)
+            os.replace(tmp, os.path.join(self.path, f'{col}.npy'))
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'rows': n, 'vocab': vocab}, f)
+
+        self.vocab = vocab
+        self.columns = columns
+        self.size = n
+        self._index()
+
+    def contains(self, player_name, game_date):
+        bounds = self.player_slices.get(player_name)
+        if not bounds:
+            return False
+        dates = self.columns['game_date'][bounds[0]:bounds[1]]
+        return bool((dates == np.datetime64(game_date, 'D')).any())
+
+    def max_date(self):
+        if not self.size:
+            return None
+        return str(np.asarray(self.columns['game_date']).max())
+
+class GameLogStore:
+    '''All season partitions on disk, newest season first'''
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.partitions = {}
+        self.incomplete = False
+        self.synced_through = None
+
+    def load(self):
+        started = time.perf_counter()
+        self.partitions = {}
+        self.incomplete = False
+        self.synced_through = None
+        try:
+            with open(os.path.join(self.root, 'sync.json'), encoding='utf-8') as f:
+                self.synced_through = json.load(f).get('synced_through')
+        except (OSError, ValueError):
+            pass
+        if os.path.isdir(self.root):
+            for season in sorted(os.listdir(self.root), reverse=True):
+                if not os.path.isdir(os.path.join(self.root, season)):
+                    continue
+                partition = SeasonPartition(os.path.join(self.root, season))
+                if partition.load():
+                    self.partitions[season] = partition
+                else:
+                    # Interrupted write: the watermark can't be trusted until a full reload
+                    self.incomplete = True
+        self.load_secs = time.perf_counter() - started
+        return self
+
+    @property
+    def rows(self):
+        return sum(p.size for p in self.partitions.values())
+
+    def player_names(self):
+        return {name for p in self.partitions.values() for name in p.player_slices}
+
+    @property
+    def watermark(self):
+        dates = [p.max_date() for p in self.partitions.values() if p.size]
+        return max(dates) if dates else None
+
+    def add(self, rows):
+        '''Merge player_stats rows into their season partitions'''
+        by_season = {}
+        for row in rows:
+            if row.get('player_name') and row.get('game_date'):
+                by_season.setdefault(season_for(row['game_date']), []).append(row)
+        for season, season_rows in by_season.items():
+            partition = self.partitions.get(season) or SeasonPartition(os.path.join(self.root, season))
+            partition.merge(season_rows)
+            self.partitions[season] = partition
+        self.partitions = dict(sorted(self.partitions.items(), reverse=True))
+        return sum(len(r) for r in by_season.values())
+
+    def contains(self, player_name, game_date):
+        partition = self.partitions.get(season_for(game_date)) if game_date else None
+        return bool(partition and partition.contains(player_name, game_date))
+
+    def recent_games(self, player_names, games_per_player=15):
+        '''{player_name: newest-first rows}, reaching into older seasons when a window is short'''
+        stats_by_player = {}
+        for name in player_names:
+            if not name:
+                continue
+            window = []
+            for partition in self.partitions.values():
+                window.extend(partition.rows(name, games_per_player - len(window)))
+                if len(window) >= games_per_player:
+                    break
+            stats_by_player[name] = window
+        return stats_by_player
+
+    def sync(self, client, page_size=PAGE_SIZE):
+        '''Bootstrap from player_stats on first use, otherwise fetch rows created since the last sync
+
+        Returns (previous created_at watermark, rows added).
+        '''
+        # An interrupted write, or a store saved before created_at was tracked, is reloaded in full
+        if self.incomplete or (self.partitions and not self.synced_through):
+            self.clear()
+        since = self.synced_through
+        fetched = []
+        offset = 0
+        while True:
+            query = client.table('player_stats').select('*')
+            if since:
+                start = datetime.fromisoformat(since.replace('Z', '+00:00')) - SYNC_OVERLAP
+                query = query.gte('created_at', start.isoformat())
+            response = query.order('created_at').order('id')\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            rows = response.data or []
+            fetched.extend(rows)
+            if len(rows) < page_size:
+                break
+            offset += page_size
+
+        created = [r['created_at'] for r in fetched if r.get('created_at')]
+        new_rows = [r for r in fetched if not self.contains(r.get('player_name'), r.get('game_date'))]
+        if new_rows:
+            self.add(new_rows)
+        if created:
+            self._save_sync(max(created + ([since] if since else [])))
+        return since, len(new_rows)
+
+    def _save_sync(self, synced_through):
+        # Written after the partitions, so a crash re-reads rather than skips rows
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, 'sync.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'synced_through': synced_through}, f)
+        os.replace(path + '.tmp', path)
+        self.synced_through = synced_through
+
+    def clear(self):
+        self.partitions = {}
+        self.incomplete = False
+        self.synced_through = None
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description='Maintain the local game log store')
+    parser.add_argument('--rebuild', action='store_true', help='delete the store and bootstrap from scratch')
+    parser.add_argument('--info', action='store_true', help='show partitions without contacting Supabase')
+    args = parser.parse_args()
+
+    store = GameLogStore()
+    if args.rebuild:
+        store.clear()
+    store.load()
+
+    if not args.info:
+        load_dotenv()
+        client = create_client(os.getenv('VITE_SUPABASE_URL'), os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY'))
+        started = time.perf_counter()
+        watermark, fetched = store.sync(client)
+        print(f'📥 Synced {fetched} rows created since {watermark or "the beginning"} in {time.perf_counter() - started:.1f}s')
+        store.load()
+
+    print(f'📦 {store.root}')
+    for season, partition in store.partitions.items():
+        print(f'   {season}: {partition.size} games, {len(partition.player_slices)} players, latest {partition.max_date()}')
+    print(f'✅ {store.rows} rows loaded in {store.load_secs * 1000:.1f} ms (watermark {store.watermark})')
+
+if __name__ == '__main__':
+    main()
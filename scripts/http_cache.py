@@ -0,0 +1,192 @@
+"""
+On-disk HTTP response cache shared by the external fetchers
+GET responses for slow-changing resources (player directory, injury report,
+scoreboards, Odds API event list) are kept under .cache/http with a
+per-endpoint TTL. Expired entries are revalidated with ETag/Last-Modified,
+and the directory is trimmed least-recently-used first once it grows past
+HTTP_CACHE_MAX_MB.
+
+Usage:
+    from http_cache import get_session
+    session = get_session()
+    response = session.get(url, params=params, timeout=10)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.getenv('HTTP_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'http')
+MAX_BYTES = int(float(os.getenv('HTTP_CACHE_MAX_MB', '100')) * 1024 * 1024)
+DISABLED = os.getenv('HTTP_CACHE_DISABLE') == '1'
+
+# (regex on the URL without its query string, TTL seconds); first match wins,
+# unlisted URLs (game logs, per-event odds) are never cached
+ENDPOINT_TTLS = [
+    (r'/commonallplayers$', 24 * 3600),
+    (r'sportsethos\.com/live-injury-report/?$', 15 * 60),
+    (r'site\.api\.espn\.com/apis/site/v2/sports/basketball/nba/scoreboard$', 10 * 60),
+    (r'api\.balldontlie\.io/v1/games$', 30 * 60),
+    (r'/sports/basketball_nba/events$', 10 * 60),
+]
+
+# Credentials never become part of a cache key
+IGNORED_PARAMS = {'apikey', 'api_key'}
+
+def ttl_for(url):
+    base = url.split('?')[0]
+    for pattern, ttl in ENDPOINT_TTLS:
+        if re.search(pattern, base):
+            return ttl
+    return 0
+
+def cache_key(url, params=None):
+    '''Stable key from the URL and query params, minus API keys'''
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    query = sorted((k, str(v)) for k, v in query if k.lower() not in IGNORED_PARAMS)
+    canonical = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+class CachedSession(requests.Session):
+    '''requests.Session whose GETs go through the on-disk cache'''
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+        self.lock = threading.Lock()
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json'), os.path.join(self.cache_dir, f'{key}.body')
+
+    def _read(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _write(self, key, url, response):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': response.url.split('?')[0] if response.url else url,
+            'stored_at': time.time(),
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')},
+        }
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(response.content)
+        os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._evict()
+
+    def _touch(self, key, meta=None):
+        meta_path, _ = self._paths(key)
+        if meta is not None:
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + '.tmp', meta_path)
+        else:
+            os.utime(meta_path)
+
+    def _evict(self):
+        '''Drop least recently used entries until the cache fits in max_bytes'''
+        with self.lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                key = name[:-5]
+                meta_path, body_path = self._paths(key)
+                try:
+                    size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+                    used = os.path.getmtime(meta_path)
+                except OSError:
+                    continue
+                entries.append((used, key, size))
+                total += size
+            for _, key, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+
+    def _from_cache(self, url, meta, body):
+        response = requests.Response()
+        response.status_code = meta.get('status', 200)
+        response._content = body
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.encoding = meta.get('encoding')
+        response.url = url
+        response.from_cache = True
+        return response
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        ttl = ttl_for(url) if method.upper() == 'GET' and not DISABLED else 0
+        if not ttl:
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        key = cache_key(url, params)
+        meta, body = self._read(key)
+        if meta and time.time() - meta['stored_at'] < ttl:
+            self.stats['hit'] += 1
+            self._touch(key)
+            return self._from_cache(url, meta, body)
+
+        # Stale entry: ask the server whether it changed
+        headers = dict(headers or {})
+        if meta:
+            cached_headers = CaseInsensitiveDict(meta.get('headers', {}))
+            if cached_headers.get('ETag'):
+                headers['If-None-Match'] = cached_headers['ETag']
+            if cached_headers.get('Last-Modified'):
+                headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        response = super().request(method, url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and meta:
+            self.stats['revalidated'] += 1
+            meta['stored_at'] = time.time()
+            self._touch(key, meta)
+            return self._from_cache(url, meta, body)
+
+        self.stats['miss'] += 1
+        if response.status_code == 200:
+            self._write(key, url, response)
+        response.from_cache = False
+        return response
+
+def get_session(retry=None, pool_maxsize=10, cache=True):
+    '''Session factory used by every fetcher: optional urllib3 Retry, shared disk cache'''
+    session = CachedSession() if cache else requests.Session()
+    adapter = HTTPAdapter(max_retries=retry if retry is not None else 0, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
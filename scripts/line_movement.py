@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Line-movement analytics over odds_history.db
+One window-function pass over the whole odds_history table (legacy wide rows
+or the compact tables) computes, per prop and book, the opening and current
+line, total and recent movement and steam moves for the prop's current game
+(its event, or its slate date in legacy databases). The two books are then
+combined with DraftKings vs FanDuel divergence and no-vig probabilities and
+materialized into the line_movement table, so readers get one row per prop
+without touching history.
+
+Usage:
+    python scripts/line_movement.py            # refresh if new snapshots exist, show top movers
+    python scripts/line_movement.py --force    # recompute even if nothing changed
+    python scripts/line_movement.py --db other.db --top 20
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from odds_snapshot import connect
+from odds_store import game_rows_sql, is_compact
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DB_PATH = Path(__file__).parent.parent / 'odds_history.db'
+
+# Movement in the last RECENT_HOURS before the newest snapshot counts as recent
+RECENT_HOURS = 3
+# A net move of STEAM_POINTS or more inside STEAM_MINUTES is a steam move
+STEAM_POINTS = 1.0
+STEAM_MINUTES = 60
+
+SUMMARY_COLUMNS = (
+    'player_name', 'stat_type', 'first_seen', 'last_change_at',
+    'draftkings_open_line', 'draftkings_line', 'fanduel_open_line', 'fanduel_line',
+    'open_line', 'current_line', 'line_move', 'recent_move', 'line_changes',
+    'steam_up', 'steam_down', 'last_steam_at',
+    'draftkings_no_vig_over', 'fanduel_no_vig_over', 'no_vig_over',
+    'line_divergence', 'prob_divergence', 'as_of', 'computed_at',
+)
+
+SUMMARY_TABLE = '''
+CREATE TABLE IF NOT EXISTS line_movement (
+    player_name TEXT NOT NULL,
+    stat_type TEXT NOT NULL,
+    first_seen TEXT,
+    last_change_at TEXT,
+    draftkings_open_line REAL,
+    draftkings_line REAL,
+    fanduel_open_line REAL,
+    fanduel_line REAL,
+    open_line REAL,
+    current_line REAL,
+    line_move REAL,
+    recent_move REAL,
+    line_changes INTEGER,
+    steam_up INTEGER,
+    steam_down INTEGER,
+    last_steam_at TEXT,
+    draftkings_no_vig_over REAL,
+    fanduel_no_vig_over REAL,
+    no_vig_over REAL,
+    line_divergence REAL,
+    prob_divergence REAL,
+    as_of TEXT,
+    computed_at TEXT,
+    PRIMARY KEY (player_name, stat_type)
+)
+'''
+
+# Per (player, stat, book, game): step deltas via LAG, net move over the
+# trailing steam window via a RANGE frame, then one aggregate per book.
+# Only each prop's current game (that of its newest row) is summarized, so a
+# back-to-back opens at tonight's first line, not last night's.
+BOOK_MOVEMENT_SQL = '''
+WITH tagged AS (
+    SELECT *, julianday(recorded_at) * 1440.0 AS t FROM ({rows})
+),
+current AS (
+    -- SQLite returns the bare game column from the MAX(t) row
+    SELECT player_name, stat_type, game, MAX(t) FROM tagged GROUP BY player_name, stat_type
+),
+long AS (
+    SELECT tagged.* FROM tagged JOIN current USING (player_name, stat_type, game)
+),
+steps AS (
+    SELECT *,
+           line - LAG(line) OVER w AS delta,
+           (line IS NOT LAG(line) OVER w OR over_odds IS NOT LAG(over_odds) OVER w
+            OR under_odds IS NOT LAG(under_odds) OVER w) AS changed,
+           ROW_NUMBER() OVER w AS rn,
+           COUNT(*) OVER (PARTITION BY player_name, stat_type, book, game) AS n
+    FROM long
+    WINDOW w AS (PARTITION BY player_name, stat_type, book, game ORDER BY t)
+),
+moves AS (
+    SELECT *,
+           SUM(delta) OVER (PARTITION BY player_name, stat_type, book, game ORDER BY t
+                            RANGE BETWEEN :steam_minutes PRECEDING AND CURRENT ROW) AS burst
+    FROM steps
+)
+SELECT player_name, stat_type, book,
+       MIN(recorded_at) AS first_seen,
+       MAX(CASE WHEN changed THEN recorded_at END) AS last_change_at,
+       MAX(CASE WHEN rn = 1 THEN line END) AS open_line,
+       MAX(CASE WHEN rn = n THEN line END) AS current_line,
+       MAX(CASE WHEN rn = n THEN over_odds END) AS over_odds,
+       MAX(CASE WHEN rn = n THEN under_odds END) AS under_odds,
+       COALESCE(SUM(CASE WHEN t >= julianday(:as_of) * 1440.0 - :recent_minutes THEN delta END), 0) AS recent_move,
+       SUM(CASE WHEN delta != 0 THEN 1 ELSE 0 END) AS line_changes,
+       SUM(CASE WHEN delta != 0 AND burst >= :steam_points THEN 1 ELSE 0 END) AS steam_up,
+       SUM(CASE WHEN delta != 0 AND burst <= -:steam_points THEN 1 ELSE 0 END) AS steam_down,
+       MAX(CASE WHEN delta != 0 AND ABS(burst) >= :steam_points THEN recorded_at END) AS last_steam_at
+FROM moves
+GROUP BY player_name, stat_type, book
+'''
+
+def implied_probability(american):
+    '''Break-even probability of American odds'''
+    if not american:
+        return None
+    return 100 / (american + 100) if american > 0 else -american / (-american + 100)
+
+def no_vig_over(over_odds, under_odds):
+    '''Over probability with the book's margin removed'''
+    p_over = implied_probability(over_odds)
+    p_under = implied_probability(under_odds)
+    if p_over is None or p_under is None:
+        return None
+    return p_over / (p_over + p_under)
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def _diff(a, b):
+    return a - b if a is not None and b is not None else None
+
+def latest_snapshot(conn):
+    source = 'snapshots' if is_compact(conn) else 'odds_history'
+    return conn.execute(f'SELECT MAX(recorded_at) FROM {source}').fetchone()[0]
+
+def compute(conn, as_of):
+    '''One summary dict per (player, stat) from a single pass over odds_history'''
+    params = {
+        'as_of': as_of,
+        'recent_minutes': RECENT_HOURS * 60,
+        'steam_minutes': STEAM_MINUTES,
+        'steam_points': STEAM_POINTS,
+    }
+    props = {}
+    for row in conn.execute(BOOK_MOVEMENT_SQL.format(rows=game_rows_sql(conn)), params):
+        (player_name, stat_type, book, first_seen, last_change_at, open_line, current_line,
+         over_odds, under_odds, recent_move, line_changes, steam_up, steam_down, last_steam_at) = row
+        prop = props.setdefault((player_name, stat_type), {
+            'player_name': player_name, 'stat_type': stat_type,
+            'first_seen': first_seen, 'last_change_at': last_change_at,
+            'line_changes': 0, 'steam_up': 0, 'steam_down': 0, 'last_steam_at': None,
+            'books': {},
+        })
+        prop['first_seen'] = min(prop['first_seen'], first_seen)
+        prop['last_change_at'] = max(prop['last_change_at'], last_change_at)
+        prop['line_changes'] += line_changes
+        prop['steam_up'] += steam_up
+        prop['steam_down'] += steam_down
+        if last_steam_at and (prop['last_steam_at'] or '') < last_steam_at:
+            prop['last_steam_at'] = last_steam_at
+        prop['books'][book] = {
+            'open_line': open_line,
+            'line': current_line,
+            'recent_move': recent_move,
+            'no_vig_over': no_vig_over(over_odds, under_odds),
+        }
+
+    computed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    summaries = []
+    for prop in props.values():
+        books = prop.pop('books')
+        dk = books.get('draftkings', {})
+        fd = books.get('fanduel', {})
+        prop.update({
+            'draftkings_open_line': dk.get('open_line'),
+            'draftkings_line': dk.get('line'),
+            'fanduel_open_line': fd.get('open_line'),
+            'fanduel_line': fd.get('line'),
+            'open_line': _mean(b['open_line'] for b in books.values()),
+            'current_line': _mean(b['line'] for b in books.values()),
+            'recent_move': _mean(b['recent_move'] for b in books.values()),
+            'draftkings_no_vig_over': dk.get('no_vig_over'),
+            'fanduel_no_vig_over': fd.get('no_vig_over'),
+            'no_vig_over': _mean(b['no_vig_over'] for b in books.values()),
+            'line_divergence': _diff(dk.get('line'), fd.get('line')),
+            'prob_divergence': _diff(dk.get('no_vig_over'), fd.get('no_vig_over')),
+            'as_of': as_of,
+            'computed_at': computed_at,
+        })
+        prop['line_move'] = _diff(prop['current_line'], prop['open_line'])
+        summaries.append(prop)
+    return summaries
+
+def refresh(db_path=DB_PATH, force=False):
+    '''Recompute line_movement if odds_history has newer snapshots; returns (props, ms) or None when current'''
+    conn = connect(db_path)
+    try:
+        conn.execute(SUMMARY_TABLE)
+        as_of = latest_snapshot(conn)
+        if as_of is None:
+            return None
+        stored = conn.execute('SELECT MAX(as_of) FROM line_movement').fetchone()[0]
+        if stored == as_of and not force:
+            return None
+
+        started = time.perf_counter()
+        summaries = compute(conn, as_of)
+        placeholders = ', '.join('?' for _ in SUMMARY_COLUMNS)
+        # Derived table: rebuilt whole, so column changes need no migration
+        with conn:
+            conn.execute('DROP TABLE line_movement')
+            conn.execute(SUMMARY_TABLE)
+            conn.executemany(
+                f'INSERT INTO line_movement ({", ".join(SUMMARY_COLUMNS)}) VALUES ({placeholders})',
+                [tuple(s[col] for col in SUMMARY_COLUMNS) for s in summaries],
+            )
+        return len(summaries), (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+def load_movement(db_path=DB_PATH):
+    '''{(player_name, stat_type): summary dict} from the materialized table'''
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('SELECT * FROM line_movement').fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    return {(r['player_name'], r['stat_type']): dict(r) for r in rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=str(DB_PATH))
+    parser.add_argument('--force', action='store_true', help='recompute even if no new snapshots')
+    parser.add_argument('--top', type=int, default=10, help='movers to print')
+    args = parser.parse_args()
+
+    result = refresh(args.db, force=args.force)
+    if result is None:
+        print('✅ line_movement is up to date')
+    else:
+        props, ms = result
+        print(f'📈 line_movement: {props} props computed in {ms:.1f} ms')
+
+    movement = load_movement(args.db)
+    movers = sorted((m for m in movement.values() if m['line_move']), key=lambda m: -abs(m['line_move']))
+    print(f'\n🔝 Biggest movers (of {len(movement)} props):')
+    for m in movers[:args.top]:
+        steam = f", steam {m['steam_up']}↑ {m['steam_down']}↓" if m['steam_up'] or m['steam_down'] else ''
+        prob = f", no-vig over {m['no_vig_over']:.1%}" if m['no_vig_over'] is not None else ''
+        print(f"   {m['player_name']} {m['stat_type']}: {m['open_line']} -> {m['current_line']} "
+              f"({m['line_move']:+.1f}{steam}{prob})")
+
+    divergent = sorted((m for m in movement.values() if m['line_divergence']),
+                       key=lambda m: -abs(m['line_divergence']))
+    if divergent:
+        print('\n↔️  DraftKings vs FanDuel:')
+        for m in divergent[:args.top]:
+            print(f"   {m['player_name']} {m['stat_type']}: DK {m['draftkings_line']} / FD {m['fanduel_line']}")
+
+if __name__ == '__main__':
+    main()
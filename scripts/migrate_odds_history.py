@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Convert odds_history.db from wide per-snapshot rows to the compact change-only layout (odds_store.py)
+The compact copy is built next to the original, checked against every legacy
+row, then swapped in; the original is kept as odds_history.legacy.db.
+
+Usage:
+    python scripts/migrate_odds_history.py                 # migrate ./odds_history.db at the repo root
+    python scripts/migrate_odds_history.py --db other.db   # migrate another file
+    python scripts/migrate_odds_history.py --no-backup     # don't keep the legacy copy
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from itertools import groupby
+from pathlib import Path
+
+from odds_snapshot import connect
+from odds_store import BOOK_COLUMNS, StoreState, init_schema, is_compact, record_snapshot
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DB_PATH = Path(__file__).parent.parent / 'odds_history.db'
+
+WIDE_COLUMNS = ('player_name', 'stat_type') + tuple(col for cols in BOOK_COLUMNS.values() for col in cols) + ('recorded_at',)
+
+# Snapshots per transaction while copying
+BATCH_SNAPSHOTS = 200
+
+def legacy_rows(conn):
+    cursor = conn.execute(f'SELECT {", ".join(WIDE_COLUMNS)} FROM odds_history ORDER BY recorded_at, id')
+    for row in cursor:
+        yield dict(zip(WIDE_COLUMNS, row))
+
+def copy_history(source, target):
+    '''Replay legacy snapshots in time order into the compact tables'''
+    state = StoreState()
+    snapshots = legacy = changed = book_rows = 0
+    target.execute('BEGIN')
+    for recorded_at, records in groupby(legacy_rows(source), key=lambda r: r['recorded_at']):
+        records = list(records)
+        c, b = record_snapshot(target, records, recorded_at, state)
+        snapshots += 1
+        legacy += len(records)
+        changed += c
+        book_rows += b
+        if snapshots % BATCH_SNAPSHOTS == 0:
+            target.execute('COMMIT')
+            target.execute('BEGIN')
+    target.execute('COMMIT')
+    return snapshots, legacy, changed, book_rows
+
+def verify(source, target):
+    '''Every legacy row must equal the compact view's latest values at or before its snapshot'''
+    view = {}
+    for row in target.execute(f'SELECT {", ".join(WIDE_COLUMNS)} FROM odds_history ORDER BY recorded_at'):
+        view.setdefault((row[0], row[1]), []).append(row)
+
+    mismatches = 0
+    position = {}
+    for row in source.execute(f'SELECT {", ".join(WIDE_COLUMNS)} FROM odds_history ORDER BY recorded_at, id'):
+        key = (row[0], row[1])
+        history = view.get(key, [])
+        i = position.get(key, -1)
+        while i + 1 < len(history) and history[i + 1][-1] <= row[-1]:
+            i += 1
+        position[key] = i
+        if i < 0 or history[i][2:-1] != row[2:-1]:
+            mismatches += 1
+    return mismatches
+
+def size_mb(path):
+    return os.path.getsize(path) / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=str(DB_PATH), help='legacy odds_history database')
+    parser.add_argument('--no-backup', action='store_true', help='delete the legacy file after a verified migration')
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    print('=' * 60)
+    print('🗜️  MIGRATING ODDS HISTORY TO COMPACT STORAGE')
+    print('=' * 60)
+
+    if not db_path.exists():
+        conn = connect(db_path)
+        init_schema(conn)
+        conn.close()
+        print(f'✅ Created empty compact database: {db_path}')
+        return
+
+    source = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    if is_compact(source):
+        source.close()
+        print(f'✅ {db_path} is already compact')
+        return
+
+    tmp_path = db_path.with_name(db_path.stem + '.compact.tmp')
+    backup_path = db_path.with_name(db_path.stem + '.legacy.db')
+    for path in (tmp_path, Path(f'{tmp_path}-wal'), Path(f'{tmp_path}-shm')):
+        if path.exists():
+            path.unlink()
+
+    started = time.perf_counter()
+    target = connect(tmp_path)
+    target.isolation_level = None
+    init_schema(target)
+    snapshots, legacy, changed, book_rows = copy_history(source, target)
+    copy_secs = time.perf_counter() - started
+
+    mismatches = verify(source, target)
+    source.close()
+    if mismatches:
+        target.close()
+        print(f'❌ {mismatches} legacy rows do not match the compact view; {db_path} left untouched')
+        print(f'   Compact copy kept for inspection: {tmp_path}')
+        sys.exit(1)
+
+    target.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    target.execute('PRAGMA journal_mode=DELETE')
+    target.execute('VACUUM')
+    target.close()
+
+    before = size_mb(db_path)
+    after = size_mb(tmp_path)
+    os.replace(db_path, backup_path)
+    os.replace(tmp_path, db_path)
+    if args.no_backup:
+        backup_path.unlink()
+
+    print(f'📸 Snapshots: {snapshots}')
+    print(f'📄 Legacy rows: {legacy} -> {changed} prop changes ({book_rows} book rows)')
+    print(f'💾 Size: {before:.2f} MB -> {after:.2f} MB ({before / after:.1f}x smaller)')
+    print(f'⏱️  Copied in {copy_secs:.1f}s, all legacy rows verified against the odds_history view')
+    if not args.no_backup:
+        print(f'🗄️  Legacy copy: {backup_path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Shared player-name resolution
+PrizePicks, The Odds API, stats.nba.com and the injury report all spell
+names slightly differently ("Nikola Jokić", "P.J. Washington", "Jimmy Butler III").
+NameIndex is built once per name list and resolves in O(1) for the common
+cases: normalized exact match, alias table, unique last name, and finally a
+trigram-filtered fuzzy match. Strict lookups (fuzzy=False, used where a wrong
+match would move injuries or game logs onto another player) stop after the
+alias table: "Jalen Williams" never becomes "Jaylin Williams". Indexes are persisted under .cache/names so
+scripts without a Supabase connection (the SQLite odds trackers) can map
+names onto the current props board.
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+INDEX_DIR = os.getenv('NAME_INDEX_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'names')
+
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# Nicknames / legal names that normalization can't bridge (normalized form -> normalized form)
+ALIASES = {
+    'herb jones': 'herbert jones',
+    'moe wagner': 'moritz wagner',
+    'bub carrington': 'carlton carrington',
+    'nicolas claxton': 'nic claxton',
+    'cameron thomas': 'cam thomas',
+    'kenyon martin': 'kj martin',
+    'alexandre sarr': 'alex sarr',
+    'ron holland': 'ronald holland',
+}
+
+FUZZY_CUTOFF = 0.85
+
+def normalize_name(name):
+    '''Lowercase, strip accents/punctuation and generational suffixes'''
+    if not name:
+        return ''
+    nfkd = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in nfkd if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[.'`’]", '', text)
+    text = re.sub(r'[^a-z0-9]+', ' ', text)
+    tokens = [t for t in text.split() if t not in SUFFIXES]
+    return ' '.join(tokens)
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    '''Resolve arbitrary spellings onto a fixed list of canonical names'''
+
+    def __init__(self, names, source=None, learned=None):
+        self.source = source
+        self.names = sorted({n for n in names if n})
+        self.exact = {}
+        self.by_last = {}
+        self.trigrams = {}
+        for name in self.names:
+            norm = normalize_name(name)
+            if not norm:
+                continue
+            self.exact.setdefault(norm, name)
+            self.by_last.setdefault(norm.split()[-1], []).append(norm)
+            for gram in _trigrams(norm):
+                self.trigrams.setdefault(gram, set()).add(norm)
+        # Earlier fuzzy/last-name hits, keyed by normalized input
+        self.learned = {k: v for k, v in (learned or {}).items() if v in self.names}
+        self.memo = {}
+        self.counts = Counter()
+        self.misses = set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _alias(self, norm):
+        target = ALIASES.get(norm)
+        if target and target in self.exact:
+            return self.exact[target]
+        # The alias table is symmetric
+        for alias, target in ALIASES.items():
+            if target == norm and alias in self.exact:
+                return self.exact[alias]
+        return None
+
+    def _last_name(self, norm):
+        parts = norm.split()
+        if len(parts) < 2 or len(parts[-1]) <= 3:
+            return None
+        bucket = [c for c in self.by_last.get(parts[-1], []) if c[0] == norm[0]]
+        return self.exact[bucket[0]] if len(bucket) == 1 else None
+
+    def _fuzzy(self, norm):
+        overlap = Counter()
+        for gram in _trigrams(norm):
+            for candidate in self.trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        scored = sorted(
+            ((difflib.SequenceMatcher(None, norm, c).ratio(), c) for c, _ in overlap.most_common(10)),
+            reverse=True,
+        )
+        if not scored or scored[0][0] < FUZZY_CUTOFF or scored[0][1][0] != norm[0]:
+            return None
+        # Two near-identical candidates (Jalen vs Jaylin) is a guess, not a match
+        if len(scored) > 1 and scored[0][0] - scored[1][0] < 0.05:
+            return None
+        return self.exact[scored[0][1]]
+
+    def resolve(self, name, fuzzy=True):
+        '''Canonical name for any spelling, or None (each distinct spelling is counted once)
+
+        fuzzy=False allows only exact and alias matches; last-name, fuzzy and
+        learned (earlier last-name/fuzzy) matches need fuzzy=True.
+        '''
+        norm = normalize_name(name)
+        cached = self.memo.get((norm, fuzzy))
+        if cached:
+            return cached[1]
+
+        method, match = 'missed', None
+        if norm in self.exact:
+            method, match = 'exact', self.exact[norm]
+        elif fuzzy and norm in self.learned:
+            method, match = 'learned', self.learned[norm]
+        elif norm:
+            match = self._alias(norm)
+            if match:
+                method = 'alias'
+            elif fuzzy:
+                match = self._last_name(norm)
+                if match:
+                    method = 'last_name'
+                else:
+                    match = self._fuzzy(norm)
+                    method = 'fuzzy' if match else 'missed'
+
+        with self.lock:
+            if (norm, fuzzy) not in self.memo:
+                self.memo[(norm, fuzzy)] = (method, match)
+                self.counts[method] += 1
+                if match is None:
+                    self.misses.add(name)
+                elif method in ('last_name', 'fuzzy'):
+                    self.learned[norm] = match
+        return match
+
+    def canonical(self, name, fuzzy=False):
+        '''resolve() but falls back to the original spelling'''
+        return self.resolve(name, fuzzy=fuzzy) or name
+
+    def report(self, label):
+        total = sum(self.counts.values())
+        if not total or not self.names:
+            return
+        matched = total - self.counts['missed']
+        detail = ', '.join(f'{k} {v}' for k, v in self.counts.most_common() if k != 'missed')
+        print(f'🔎 {label}: {matched}/{total} names matched ({matched / total:.1%}; {detail or "none"})')
+        if self.misses:
+            sample = ', '.join(sorted(self.misses)[:8])
+            more = f' (+{len(self.misses) - 8} more)' if len(self.misses) > 8 else ''
+            print(f'   Unmatched: {sample}{more}')
+
+    def save(self):
+        '''Persist names and learned matches to .cache/names/<source>.json'''
+        if not self.source:
+            return
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        path = os.path.join(INDEX_DIR, f'{self.source}.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'names': self.names, 'learned': self.learned}, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+def load_index(source):
+    '''NameIndex saved by an earlier run (empty index if none yet)'''
+    path = os.path.join(INDEX_DIR, f'{source}.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return NameIndex([], source=source)
+    return NameIndex(data.get('names', []), source=source, learned=data.get('learned'))
+
+def build_index(source, names):
+    '''Fresh index for a new name list, keeping learned matches that still apply'''
+    previous = load_index(source)
+    index = NameIndex(names, source=source, learned=previous.learned)
+    index.save()
+    return index
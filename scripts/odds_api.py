@@ -0,0 +1,158 @@
+"""
+Shared client for The Odds API
+Used by the odds trackers (track_odds_history.py, track_odds_to_supabase.py,
+fetch_sportsbook_odds.py). Per-event prop odds are fetched concurrently over
+one keep-alive session, so a snapshot takes about as long as the slowest
+event instead of the sum of all of them.
+
+Set ODDS_API_BASE_URL=http://localhost:8765/v4 to run against
+scripts/replay_server.py instead of the real API.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from pipeline_context import get_context
+
+load_dotenv()
+
+# The Odds API configuration
+ODDS_API_KEY = os.getenv('ODDS_API_KEY', 'dd30c0f0f1f494e7c0a5cef66366da2b')
+BASE_URL = os.getenv('ODDS_API_BASE_URL', 'https://api.the-odds-api.com/v4').rstrip('/')
+BOOKMAKERS = 'draftkings,fanduel'
+
+# Stat type mapping from The Odds API to our database
+ODDS_API_STAT_MAP = {
+    'player_points': 'Points',
+    'player_rebounds': 'Rebounds',
+    'player_assists': 'Assists',
+    'player_threes': '3-PT Made',
+    'player_blocks': 'Blocked Shots',
+    'player_steals': 'Steals',
+    'player_turnovers': 'Turnovers',
+    'player_points_rebounds_assists': 'Pts+Rebs+Asts',
+    'player_points_rebounds': 'Pts+Rebs',
+    'player_points_assists': 'Pts+Asts',
+    'player_rebounds_assists': 'Rebs+Asts',
+    'player_blocks_steals': 'Blks+Stls'
+}
+
+PROP_MARKETS = list(ODDS_API_STAT_MAP)
+
+# Concurrent event requests; each one costs quota, so stay modest
+DEFAULT_WORKERS = 8
+
+# The pipeline's keep-alive session, pooled well past DEFAULT_WORKERS
+# (the events list is cached on disk for 10 minutes)
+session = get_context().session
+
+# Latest x-requests-* headers seen on any response
+quota = {'remaining': None, 'used': None, 'last': None}
+quota_lock = threading.Lock()
+
+def _record_quota(response):
+    if getattr(response, 'from_cache', False):
+        return
+    with quota_lock:
+        for key in quota:
+            value = response.headers.get(f'x-requests-{key}')
+            if value is not None:
+                quota[key] = value
+
+def quota_summary():
+    if quota['remaining'] is None:
+        return 'quota headers not seen (cached or offline)'
+    return f"{quota['remaining']} requests remaining, {quota['used']} used (last call cost {quota['last']})"
+
+def get_nba_games():
+    """Fetch upcoming NBA games from The Odds API"""
+    try:
+        url = f"{BASE_URL}/sports/basketball_nba/events"
+        params = {
+            'apiKey': ODDS_API_KEY,
+            'dateFormat': 'iso'
+        }
+
+        response = session.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        _record_quota(response)
+
+        return response.json()
+
+    except Exception as e:
+        print(f"❌ Error fetching games: {e}")
+        return []
+
+def get_player_prop_odds(game_id, markets=None):
+    """Fetch player prop odds for a specific game"""
+    try:
+        url = f"{BASE_URL}/sports/basketball_nba/events/{game_id}/odds"
+        params = {
+            'apiKey': ODDS_API_KEY,
+            'regions': 'us',
+            'markets': ','.join(markets or PROP_MARKETS),
+            'oddsFormat': 'american',
+            'bookmakers': BOOKMAKERS
+        }
+
+        response = session.get(url, params=params, timeout=15)
+        response.raise_for_status()
+        _record_quota(response)
+
+        return response.json()
+
+    except Exception as e:
+        print(f"⚠️  Error fetching odds for game {game_id}: {e}")
+        return None
+
+def fetch_all_event_odds(games, markets=None, workers=DEFAULT_WORKERS):
+    """Fetch prop odds for every game concurrently; returns ([(game, odds_data)] in input order, seconds)"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(games) or 1))) as executor:
+        futures = [executor.submit(get_player_prop_odds, game.get('id'), markets) for game in games]
+        results = [(game, future.result()) for game, future in zip(games, futures)]
+    return results, time.perf_counter() - started
+
+def iter_prop_lines(odds_data, stat_map=ODDS_API_STAT_MAP):
+    """Paired over/under lines from an event odds payload, one dict per Over outcome
+
+    Unders are indexed by (description, point) in one pass over each market, so
+    alt-line markets with hundreds of outcomes stay linear. The first Under
+    listed for a (player, point) wins, and lines missing a price or point are
+    skipped.
+    """
+    if not odds_data:
+        return
+    for bookmaker in odds_data.get('bookmakers', []):
+        sportsbook = bookmaker.get('title', '')
+        for market in bookmaker.get('markets', []):
+            stat_type = stat_map.get(market.get('key'))
+            if not stat_type:
+                continue
+
+            outcomes = market.get('outcomes', [])
+            unders = {}
+            for outcome in outcomes:
+                if outcome.get('name') == 'Under':
+                    unders.setdefault((outcome.get('description'), outcome.get('point')), outcome.get('price'))
+
+            for outcome in outcomes:
+                if outcome.get('name') != 'Over':
+                    continue
+                player_name = outcome.get('description')
+                line = outcome.get('point')
+                over_price = outcome.get('price')
+                under_price = unders.get((player_name, line))
+                if over_price and under_price and line:
+                    yield {
+                        'sportsbook': sportsbook,
+                        'stat_type': stat_type,
+                        'player_name': player_name,
+                        'line': line,
+                        'over_price': over_price,
+                        'under_price': under_price,
+                    }
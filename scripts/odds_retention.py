@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Retention tiers for odds_history.db
+- raw snapshots: full resolution for the last RAW_HOURS
+- odds_hourly: open/high/low/close line and prices per book and hour, kept for the current season
+- odds_closing: last line per book for every game (slate date), kept forever
+
+Each run only rolls up hours and slates finished since the previous run
+(watermarks in retention_state), then prunes raw rows that are already
+covered by both tiers. Works on the legacy wide table and the compact
+layout (odds_store.py); in compact storage an hour only has a rollup if a
+line moved in it. api_server.py serves hourly closes for anything older
+than the raw tier.
+
+Usage:
+    python scripts/odds_retention.py            # roll up, close and prune
+    python scripts/odds_retention.py --vacuum   # also give freed pages back to the OS
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from odds_snapshot import connect
+from odds_store import SLATE_OFFSET_HOURS, book_rows_sql, is_compact
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DB_PATH = Path(__file__).parent.parent / 'odds_history.db'
+
+RAW_HOURS = 48
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS odds_hourly (
+    player_name TEXT NOT NULL,
+    stat_type TEXT NOT NULL,
+    book TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    line_open REAL, line_high REAL, line_low REAL, line_close REAL,
+    over_open INTEGER, over_high INTEGER, over_low INTEGER, over_close INTEGER,
+    under_open INTEGER, under_high INTEGER, under_low INTEGER, under_close INTEGER,
+    samples INTEGER,
+    PRIMARY KEY (player_name, stat_type, book, hour)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS odds_closing (
+    player_name TEXT NOT NULL,
+    stat_type TEXT NOT NULL,
+    book TEXT NOT NULL,
+    game_date TEXT NOT NULL,
+    line REAL,
+    over_odds INTEGER,
+    under_odds INTEGER,
+    recorded_at TEXT,
+    PRIMARY KEY (player_name, stat_type, book, game_date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS retention_state (name TEXT PRIMARY KEY, value TEXT);
+
+-- Hourly closes in the wide odds_history shape, for reads older than the raw tier
+CREATE VIEW IF NOT EXISTS odds_history_hourly AS
+SELECT player_name, stat_type,
+       MAX(CASE WHEN book = 'draftkings' THEN line_close END) AS draftkings_line,
+       MAX(CASE WHEN book = 'draftkings' THEN over_close END) AS draftkings_over_odds,
+       MAX(CASE WHEN book = 'draftkings' THEN under_close END) AS draftkings_under_odds,
+       MAX(CASE WHEN book = 'fanduel' THEN line_close END) AS fanduel_line,
+       MAX(CASE WHEN book = 'fanduel' THEN over_close END) AS fanduel_over_odds,
+       MAX(CASE WHEN book = 'fanduel' THEN under_close END) AS fanduel_under_odds,
+       hour AS recorded_at
+FROM odds_hourly
+GROUP BY player_name, stat_type, hour;
+'''
+
+ROLLUP_SQL = f'''
+INSERT OR REPLACE INTO odds_hourly
+WITH ranked AS (
+    SELECT *,
+           ROW_NUMBER() OVER (PARTITION BY player_name, stat_type, book, hour ORDER BY recorded_at) AS rn_first,
+           ROW_NUMBER() OVER (PARTITION BY player_name, stat_type, book, hour ORDER BY recorded_at DESC) AS rn_last
+    FROM (SELECT *, strftime('%Y-%m-%d %H:00:00', recorded_at) AS hour
+          FROM ({book_rows_sql('recorded_at >= :start AND recorded_at < :end')}))
+)
+SELECT player_name, stat_type, book, hour,
+       MAX(CASE WHEN rn_first = 1 THEN line END), MAX(line), MIN(line), MAX(CASE WHEN rn_last = 1 THEN line END),
+       MAX(CASE WHEN rn_first = 1 THEN over_odds END), MAX(over_odds), MIN(over_odds),
+       MAX(CASE WHEN rn_last = 1 THEN over_odds END),
+       MAX(CASE WHEN rn_first = 1 THEN under_odds END), MAX(under_odds), MIN(under_odds),
+       MAX(CASE WHEN rn_last = 1 THEN under_odds END),
+       COUNT(*)
+FROM ranked
+GROUP BY player_name, stat_type, book, hour
+'''
+
+CLOSING_SQL = f'''
+INSERT OR REPLACE INTO odds_closing
+SELECT player_name, stat_type, book, game_date, line, over_odds, under_odds, recorded_at
+FROM (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY player_name, stat_type, book, game_date
+                                 ORDER BY recorded_at DESC) AS rn
+    FROM (SELECT *, date(recorded_at, '-{SLATE_OFFSET_HOURS} hours') AS game_date
+          FROM ({book_rows_sql('recorded_at >= :start AND recorded_at < :end')}))
+)
+WHERE rn = 1
+'''
+
+def slate_start(game_date):
+    '''First recorded_at belonging to a slate date'''
+    day = datetime.strptime(game_date, '%Y-%m-%d') + timedelta(hours=SLATE_OFFSET_HOURS)
+    return day.strftime(TIME_FORMAT)
+
+def season_start(now):
+    '''Rollups from earlier seasons are dropped (the season turns over on October 1)'''
+    year = now.year if now.month >= 10 else now.year - 1
+    return f'{year}-10-01 00:00:00'
+
+def _state(conn, name):
+    row = conn.execute('SELECT value FROM retention_state WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else None
+
+def _set_state(conn, name, value):
+    conn.execute('INSERT OR REPLACE INTO retention_state (name, value) VALUES (?, ?)', (name, value))
+
+def _prune_raw(conn, cutoff):
+    '''Delete raw rows before cutoff; compact storage keeps each key's latest row as its baseline'''
+    if not is_compact(conn):
+        return conn.execute('DELETE FROM odds_history WHERE recorded_at < ?', (cutoff,)).rowcount
+
+    row = conn.execute('SELECT MIN(id) FROM snapshots WHERE recorded_at >= ?', (cutoff,)).fetchone()
+    cut = row[0] if row[0] is not None else conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM snapshots').fetchone()[0]
+    removed = conn.execute('''
+        DELETE FROM book_lines WHERE snapshot_id < :cut
+          AND (player_id, stat_id, book_id, snapshot_id) NOT IN (
+              SELECT player_id, stat_id, book_id, MAX(snapshot_id) FROM book_lines
+              WHERE snapshot_id < :cut GROUP BY player_id, stat_id, book_id)
+    ''', {'cut': cut}).rowcount
+    removed += conn.execute('''
+        DELETE FROM prop_changes WHERE snapshot_id < :cut
+          AND (player_id, stat_id, snapshot_id) NOT IN (
+              SELECT player_id, stat_id, MAX(snapshot_id) FROM prop_changes
+              WHERE snapshot_id < :cut GROUP BY player_id, stat_id)
+    ''', {'cut': cut}).rowcount
+    conn.execute('''
+        DELETE FROM snapshots WHERE id < :cut
+          AND id NOT IN (SELECT snapshot_id FROM prop_changes)
+          AND id NOT IN (SELECT snapshot_id FROM book_lines)
+    ''', {'cut': cut})
+    return removed
+
+def apply_retention(db_path=DB_PATH, now=None, raw_hours=RAW_HOURS):
+    '''Roll up finished hours, record closing lines for finished slates, prune raw rows; returns counts and ms'''
+    now = now or datetime.now(timezone.utc)
+    current_hour = now.strftime('%Y-%m-%d %H:00:00')
+    current_slate = (now - timedelta(hours=SLATE_OFFSET_HOURS)).strftime('%Y-%m-%d')
+    started = time.perf_counter()
+
+    result = {'hours': 0, 'hourly_rows': 0, 'slates': 0, 'closing_rows': 0, 'pruned': 0, 'expired': 0}
+    conn = connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'odds_history'").fetchone():
+            result['ms'] = 0.0
+            return result
+        source = 'snapshots' if is_compact(conn) else 'odds_history'
+        first = conn.execute(f'SELECT MIN(recorded_at) FROM {source}').fetchone()[0]
+        # With no raw rows the watermarks start now and only rollup expiry has work
+        first = first or now.strftime(TIME_FORMAT)
+
+        with conn:
+            # Hourly rollups for complete hours since the last run
+            rolled = _state(conn, 'rolled_through') or first[:13] + ':00:00'
+            if rolled < current_hour:
+                result['hourly_rows'] = conn.execute(ROLLUP_SQL, {'start': rolled, 'end': current_hour}).rowcount
+                result['hours'] = int((datetime.strptime(current_hour, TIME_FORMAT) -
+                                       datetime.strptime(rolled, TIME_FORMAT)).total_seconds() // 3600)
+                _set_state(conn, 'rolled_through', current_hour)
+                rolled = current_hour
+
+            # Closing lines for slates that are over
+            closed = _state(conn, 'closed_through') or \
+                (datetime.strptime(first, TIME_FORMAT) - timedelta(hours=SLATE_OFFSET_HOURS)).strftime('%Y-%m-%d')
+            if closed < current_slate:
+                result['closing_rows'] = conn.execute(
+                    CLOSING_SQL, {'start': slate_start(closed), 'end': slate_start(current_slate)}).rowcount
+                result['slates'] = (datetime.strptime(current_slate, '%Y-%m-%d') -
+                                    datetime.strptime(closed, '%Y-%m-%d')).days
+                _set_state(conn, 'closed_through', current_slate)
+                closed = current_slate
+
+            # Raw rows go once they are older than the raw tier and covered by both watermarks
+            cutoff = min((now - timedelta(hours=raw_hours)).strftime(TIME_FORMAT), rolled, slate_start(closed))
+            result['pruned'] = _prune_raw(conn, cutoff)
+            result['expired'] = conn.execute('DELETE FROM odds_hourly WHERE hour < ?', (season_start(now),)).rowcount
+
+        result['ms'] = (time.perf_counter() - started) * 1000
+        return result
+    finally:
+        conn.close()
+
+def describe(result):
+    return (f"{result['hourly_rows']} hourly rows ({result['hours']}h), "
+            f"{result['closing_rows']} closing lines ({result['slates']} slates), "
+            f"{result['pruned']} raw rows pruned, {result['expired']} old rollups dropped "
+            f"in {result['ms']:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll up, close and prune odds_history.db')
+    parser.add_argument('--db', default=str(DB_PATH))
+    parser.add_argument('--raw-hours', type=int, default=RAW_HOURS, help='hours of full-resolution snapshots to keep')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to shrink the file')
+    args = parser.parse_args()
+
+    print('=' * 60)
+    print('🗂️  ODDS HISTORY RETENTION')
+    print('=' * 60)
+    if not Path(args.db).exists():
+        print(f'❌ No database at {args.db}')
+        return
+    result = apply_retention(args.db, raw_hours=args.raw_hours)
+    print(f'✅ {describe(result)}')
+
+    conn = connect(args.db)
+    for table in ('odds_hourly', 'odds_closing'):
+        count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        print(f'   {table}: {count} rows')
+    if args.vacuum:
+        started = time.perf_counter()
+        conn.execute('VACUUM')
+        print(f'🧹 Vacuumed in {time.perf_counter() - started:.1f}s')
+    conn.close()
+
+if __name__ == '__main__':
+    main()
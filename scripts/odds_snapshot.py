@@ -0,0 +1,75 @@
+"""
+Batched SQLite writer for odds snapshots
+Rows for a whole snapshot are staged in memory and written with one
+executemany() in a single transaction on a WAL-mode connection, instead of
+one connect/insert/commit per outcome.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+# WAL lets the API server keep reading while a snapshot is written;
+# synchronous=NORMAL is durable in WAL mode and skips the per-commit fsync of FULL.
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),  # 16 MB
+    ('temp_store', 'MEMORY'),
+)
+
+def connect(db_path, timeout=30):
+    '''sqlite3 connection with the snapshot pragmas applied'''
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+class SnapshotWriter:
+    '''Stage rows for one odds snapshot and write them in a single transaction'''
+
+    def __init__(self, db_path, table, columns, conflict='IGNORE'):
+        self.db_path = db_path
+        self.table = table
+        self.columns = tuple(columns)
+        self.conflict = conflict
+        self.recorded_at = datetime.now(timezone.utc).isoformat()
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, row):
+        '''Stage a dict (missing columns become NULL)'''
+        self.rows.append(tuple(row.get(col) for col in self.columns))
+
+    def flush(self):
+        '''Write every staged row; returns timings and row counts for the snapshot'''
+        placeholders = ', '.join('?' for _ in self.columns)
+        sql = (f'INSERT OR {self.conflict} INTO {self.table} ({", ".join(self.columns)}) '
+               f'VALUES ({placeholders})')
+
+        started = time.perf_counter()
+        conn = connect(self.db_path)
+        connected = time.perf_counter()
+        try:
+            before = conn.total_changes
+            with conn:
+                conn.executemany(sql, self.rows)
+            inserted = conn.total_changes - before
+        finally:
+            conn.close()
+        finished = time.perf_counter()
+
+        timings = {
+            'staged': len(self.rows),
+            'inserted': inserted,
+            'connect_ms': (connected - started) * 1000,
+            'write_ms': (finished - connected) * 1000,
+        }
+        self.rows = []
+        return timings
+
+def describe(timings):
+    return (f"{timings['inserted']}/{timings['staged']} rows written in "
+            f"{timings['write_ms']:.1f} ms (connect {timings['connect_ms']:.1f} ms)")
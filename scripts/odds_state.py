@@ -0,0 +1,124 @@
+"""
+Last-known odds state persisted between runs
+track_odds_to_supabase.py remembers the line and prices it last wrote for
+every (player, stat, book), so each run only inserts the props that moved,
+plus one baseline row per prop on the first run of each (local) day so
+charts of today's odds_history always have a starting point.
+sync_odds_to_props.py remembers the latest odds per prop and how far into
+Supabase odds_history it has read, so it only fetches new rows and only
+updates props whose odds differ. Quiet hours write next to nothing.
+
+State lives in .cache/odds_state/<name>.json; delete it (or pass --full)
+to make the next run write everything again, e.g. after clear_old_odds.py.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+STATE_DIR = os.getenv('ODDS_STATE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'odds_state')
+
+BOOKS = ('draftkings', 'fanduel')
+ODDS_COLUMNS = tuple(f'{book}_{col}' for book in BOOKS for col in ('line', 'over_odds', 'under_odds'))
+
+# Props not seen for this long are forgotten
+KEEP_DAYS = 3
+
+def load_state(name):
+    '''State saved by an earlier run ({} if none yet or unreadable)'''
+    try:
+        with open(os.path.join(STATE_DIR, f'{name}.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(name, state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = os.path.join(STATE_DIR, f'{name}.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+def book_values(record, book):
+    return [record.get(f'{book}_line'), record.get(f'{book}_over_odds'), record.get(f'{book}_under_odds')]
+
+def _key(*parts):
+    return '|'.join(parts)
+
+def _expired(seen_at, now):
+    return seen_at < (now - timedelta(days=KEEP_DAYS)).isoformat()
+
+def _local_midnight():
+    '''Start of the local day as a UTC isoformat string, comparable with recorded_at'''
+    midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.astimezone(timezone.utc).isoformat()
+
+class LastKnownOdds:
+    '''Line and prices last written per (player, stat, book)
+
+    Entries are [line, over_odds, under_odds, last seen, last written].
+    '''
+
+    def __init__(self, name='tracker', day_start=None):
+        self.name = name
+        self.books = load_state(name).get('books', {})
+        self.day_start = day_start or _local_midnight()
+
+    def changed_books(self, record):
+        '''Books whose values differ from the last write (a book that pulled its line counts),
+        or that have not been written yet today'''
+        changed = []
+        for book in BOOKS:
+            previous = self.books.get(_key(record['player_name'], record['stat_type'], book))
+            values = book_values(record, book)
+            if (previous[:3] if previous else [None, None, None]) != values:
+                changed.append(book)
+            elif previous and (len(previous) < 5 or previous[4] < self.day_start):
+                changed.append(book)
+        return changed
+
+    def mark(self, record):
+        '''Remember a written record as the new baseline'''
+        for book in BOOKS:
+            self.books[_key(record['player_name'], record['stat_type'], book)] = \
+                book_values(record, book) + [record['recorded_at'], record['recorded_at']]
+
+    def touch(self, record):
+        '''Keep an unchanged prop's entry alive'''
+        for book in BOOKS:
+            entry = self.books.get(_key(record['player_name'], record['stat_type'], book))
+            if entry:
+                entry[3] = record['recorded_at']
+
+    def save(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        self.books = {k: v for k, v in self.books.items() if not _expired(v[3], now)}
+        save_state(self.name, {'books': self.books, 'saved_at': now.isoformat()})
+
+class SyncedOdds:
+    '''Latest odds_history row per (player, stat) and the newest recorded_at already read'''
+
+    def __init__(self, name='props_sync'):
+        self.name = name
+        state = load_state(name)
+        self.synced_through = state.get('synced_through')
+        self.latest = {tuple(k.split('|', 1)): v for k, v in state.get('latest', {}).items()}
+
+    def apply(self, records):
+        '''Merge newly read odds_history rows; returns the (player, stat) keys they moved'''
+        moved = set()
+        for record in records:
+            key = (record['player_name'], record['stat_type'])
+            current = self.latest.get(key)
+            if current is None or record['recorded_at'] > current['recorded_at']:
+                self.latest[key] = {col: record.get(col) for col in ODDS_COLUMNS + ('recorded_at',)}
+                moved.add(key)
+            if not self.synced_through or record['recorded_at'] > self.synced_through:
+                self.synced_through = record['recorded_at']
+        return moved
+
+    def save(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        latest = {_key(*k): v for k, v in self.latest.items() if not _expired(v['recorded_at'], now)}
+        save_state(self.name, {'synced_through': self.synced_through, 'latest': latest})
@@ -0,0 +1,232 @@
+"""
+Compact, change-only storage for odds_history.db
+Player names, stat types, sportsbooks, events and snapshot times live in
+small dictionary tables; book_lines only gets a row when a book's line or
+prices for a (player, stat) actually move. Rows are clustered by
+(player, stat, book) so one player's history is a short range scan.
+
+The legacy wide table is replaced by an odds_history view that rebuilds the
+old columns (latest DraftKings/FanDuel values as of each change), so
+api_server.py and upload_odds_to_supabase.py read it unchanged.
+
+Convert an existing database with scripts/migrate_odds_history.py; the
+trackers detect the compact layout and write deltas from then on.
+"""
+
+import time
+
+from odds_snapshot import connect
+
+# Legacy wide columns per book; book ids are fixed so the view can refer to them
+BOOK_COLUMNS = {
+    'draftkings': ('draftkings_line', 'draftkings_over_odds', 'draftkings_under_odds'),
+    'fanduel': ('fanduel_line', 'fanduel_over_odds', 'fanduel_under_odds'),
+}
+BOOK_IDS = {book: i for i, book in enumerate(BOOK_COLUMNS, 1)}
+
+# Games finish by ~1am ET; observations up to 10:00 UTC belong to the previous slate
+SLATE_OFFSET_HOURS = 10
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS stat_types (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS books (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, external_id TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, recorded_at TEXT NOT NULL UNIQUE);
+
+-- One row per (player, stat, snapshot) where any book changed
+CREATE TABLE IF NOT EXISTS prop_changes (
+    player_id INTEGER NOT NULL,
+    stat_id INTEGER NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    event_id INTEGER,
+    PRIMARY KEY (player_id, stat_id, snapshot_id)
+) WITHOUT ROWID;
+
+-- New values for one book; NULLs mean the book pulled the line
+CREATE TABLE IF NOT EXISTS book_lines (
+    player_id INTEGER NOT NULL,
+    stat_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    line REAL,
+    over_odds INTEGER,
+    under_odds INTEGER,
+    PRIMARY KEY (player_id, stat_id, book_id, snapshot_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_prop_changes_snapshot ON prop_changes(snapshot_id);
+'''
+
+def _as_of(alias, book_id):
+    return f'''
+    LEFT JOIN book_lines {alias} ON {alias}.player_id = c.player_id AND {alias}.stat_id = c.stat_id
+        AND {alias}.book_id = {book_id}
+        AND {alias}.snapshot_id = (
+            SELECT MAX(x.snapshot_id) FROM book_lines x
+            WHERE x.player_id = c.player_id AND x.stat_id = c.stat_id
+              AND x.book_id = {book_id} AND x.snapshot_id <= c.snapshot_id)'''
+
+VIEW = f'''
+CREATE VIEW IF NOT EXISTS odds_history AS
+SELECT p.name AS player_name, st.name AS stat_type,
+       dk.line AS draftkings_line, dk.over_odds AS draftkings_over_odds, dk.under_odds AS draftkings_under_odds,
+       fd.line AS fanduel_line, fd.over_odds AS fanduel_over_odds, fd.under_odds AS fanduel_under_odds,
+       sn.recorded_at AS recorded_at
+FROM prop_changes c
+JOIN players p ON p.id = c.player_id
+JOIN stat_types st ON st.id = c.stat_id
+JOIN snapshots sn ON sn.id = c.snapshot_id{_as_of('dk', BOOK_IDS['draftkings'])}{_as_of('fd', BOOK_IDS['fanduel'])}
+'''
+
+def book_rows_sql(where=None):
+    '''SELECT over odds_history (table or view) unpivoted to one row per book with a line'''
+    parts = []
+    for book, (line, over, under) in BOOK_COLUMNS.items():
+        condition = f'{line} IS NOT NULL' + (f' AND {where}' if where else '')
+        parts.append(f'''
+        SELECT player_name, stat_type, '{book}' AS book, recorded_at,
+               {line} AS line, {over} AS over_odds, {under} AS under_odds
+        FROM odds_history WHERE {condition}''')
+    return ' UNION ALL'.join(parts)
+
+# Compact counterpart of book_rows_sql(): reads book_lines directly so each
+# row keeps the event its prop_changes row was recorded for
+COMPACT_GAME_ROWS_SQL = f'''
+SELECT p.name AS player_name, st.name AS stat_type, b.name AS book, sn.recorded_at,
+       bl.line, bl.over_odds, bl.under_odds,
+       COALESCE('event:' || e.external_id,
+                date(sn.recorded_at, '-{SLATE_OFFSET_HOURS} hours')) AS game
+FROM book_lines bl
+JOIN players p ON p.id = bl.player_id
+JOIN stat_types st ON st.id = bl.stat_id
+JOIN books b ON b.id = bl.book_id
+JOIN snapshots sn ON sn.id = bl.snapshot_id
+LEFT JOIN prop_changes c ON c.player_id = bl.player_id AND c.stat_id = bl.stat_id
+    AND c.snapshot_id = bl.snapshot_id
+LEFT JOIN events e ON e.id = c.event_id
+WHERE bl.line IS NOT NULL'''
+
+def game_rows_sql(conn):
+    '''book_rows_sql() plus a game column: the event in compact databases, else the slate date
+
+    Back-to-back games of the same (player, stat) get different game values,
+    so per-game windows don't run one game's line into the next.
+    '''
+    if is_compact(conn):
+        return COMPACT_GAME_ROWS_SQL
+    return f"SELECT *, date(recorded_at, '-{SLATE_OFFSET_HOURS} hours') AS game FROM ({book_rows_sql()})"
+
+def is_compact(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_lines'").fetchone()
+    return row is not None
+
+def init_schema(conn):
+    with conn:
+        conn.executescript(SCHEMA)
+        conn.executemany('INSERT OR IGNORE INTO books (id, name) VALUES (?, ?)',
+                         [(i, book) for book, i in BOOK_IDS.items()])
+        conn.executescript(VIEW)
+
+class StoreState:
+    '''Dictionary ids and the latest values per (player, stat, book), kept across snapshots'''
+
+    def __init__(self, conn=None):
+        self.ids = {'players': {}, 'stat_types': {}, 'events': {}}
+        self.latest = {}
+        self.events = {}
+        if conn is None:
+            return
+        for table in ('players', 'stat_types'):
+            self.ids[table] = {name: i for i, name in conn.execute(f'SELECT id, name FROM {table}')}
+        self.ids['events'] = {ext: i for i, ext in conn.execute('SELECT id, external_id FROM events')}
+        # SQLite returns the bare columns from the MAX(snapshot_id) row
+        for player_id, stat_id, book_id, _, line, over, under in conn.execute('''
+            SELECT player_id, stat_id, book_id, MAX(snapshot_id), line, over_odds, under_odds
+            FROM book_lines GROUP BY player_id, stat_id, book_id
+        '''):
+            self.latest[(player_id, stat_id, book_id)] = (line, over, under)
+        for player_id, stat_id, _, event_id in conn.execute('''
+            SELECT player_id, stat_id, MAX(snapshot_id), event_id
+            FROM prop_changes GROUP BY player_id, stat_id
+        '''):
+            self.events[(player_id, stat_id)] = event_id
+
+    def id_for(self, conn, table, name):
+        ids = self.ids[table]
+        if name not in ids:
+            column = 'external_id' if table == 'events' else 'name'
+            ids[name] = conn.execute(f'INSERT INTO {table} ({column}) VALUES (?)', (name,)).lastrowid
+        return ids[name]
+
+def record_snapshot(conn, records, recorded_at, state):
+    '''Write the book lines that moved since the last snapshot; caller owns the transaction'''
+    conn.execute('INSERT OR IGNORE INTO snapshots (recorded_at) VALUES (?)', (recorded_at,))
+    snapshot_id = conn.execute('SELECT id FROM snapshots WHERE recorded_at = ?', (recorded_at,)).fetchone()[0]
+
+    change_rows = []
+    line_rows = []
+    seen = set()
+    for record in records:
+        player_id = state.id_for(conn, 'players', record['player_name'])
+        stat_id = state.id_for(conn, 'stat_types', record['stat_type'])
+        # First record per (player, stat) wins, like the legacy UNIQUE(player_name, stat_type, recorded_at)
+        if (player_id, stat_id) in seen:
+            continue
+        seen.add((player_id, stat_id))
+        event = record.get('event_id')
+        event_id = state.id_for(conn, 'events', event) if event else None
+        # A prop for a new game starts a fresh history even at an unchanged line
+        new_event = event_id is not None and state.events.get((player_id, stat_id)) != event_id
+        changed = False
+        for book, columns in BOOK_COLUMNS.items():
+            key = (player_id, stat_id, BOOK_IDS[book])
+            values = tuple(record.get(col) for col in columns)
+            previous = state.latest.get(key, (None, None, None))
+            if values != previous or (new_event and values[0] is not None):
+                line_rows.append(key + (snapshot_id,) + values)
+                state.latest[key] = values
+                changed = True
+        if changed:
+            state.events[(player_id, stat_id)] = event_id
+            change_rows.append((player_id, stat_id, snapshot_id, event_id))
+
+    conn.executemany('INSERT OR IGNORE INTO prop_changes VALUES (?, ?, ?, ?)', change_rows)
+    conn.executemany('INSERT OR IGNORE INTO book_lines VALUES (?, ?, ?, ?, ?, ?, ?)', line_rows)
+    return len(change_rows), len(line_rows)
+
+class CompactSnapshotWriter:
+    '''SnapshotWriter counterpart for compact databases: stage wide rows, flush only the deltas'''
+
+    def __init__(self, db_path, recorded_at):
+        self.db_path = db_path
+        self.recorded_at = recorded_at
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, row):
+        self.rows.append(dict(row))
+
+    def flush(self):
+        started = time.perf_counter()
+        conn = connect(self.db_path)
+        connected = time.perf_counter()
+        try:
+            with conn:
+                state = StoreState(conn)
+                changed, book_rows = record_snapshot(conn, self.rows, self.recorded_at, state)
+        finally:
+            conn.close()
+        finished = time.perf_counter()
+
+        timings = {
+            'staged': len(self.rows),
+            'inserted': changed,
+            'book_rows': book_rows,
+            'connect_ms': (connected - started) * 1000,
+            'write_ms': (finished - connected) * 1000,
+        }
+        self.rows = []
+        return timings
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+In-process DAG runner for the daily update
+Each stage names the stages whose output it needs. Independent stages run
+concurrently on a thread pool, and a stage starts as soon as its inputs are
+ready. Nothing is shelled out, so supabase/numpy/scipy are imported once
+and scripts share this process, one Supabase client, one HTTP session and
+one copy of the props/games tables (see pipeline_context.py).
+
+Stages that declare inputs are fingerprinted: the hash of their inputs
+plus their dependencies' outputs is saved after a successful run
+(.cache/pipeline/state.json). If it still matches next time, the stage is
+skipped and its saved output is passed on. Stages without inputs (anything
+that pulls fresh data from outside) always run.
+
+Usage:
+    python scripts/pipeline.py                      # whole daily update
+    python scripts/pipeline.py --only projections   # a stage plus everything it needs
+    python scripts/pipeline.py --force              # ignore saved fingerprints
+    python scripts/pipeline.py --full               # recompute every prop's projection
+    python scripts/pipeline.py --list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline_context import get_context
+
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+SCRIPTS_DIR = Path(__file__).parent
+STATE_PATH = os.getenv('PIPELINE_STATE') or str(SCRIPTS_DIR.parent / '.cache' / 'pipeline' / 'state.json')
+
+DEFAULT_WORKERS = 6
+
+class Stage:
+    '''One node of the DAG; run(results) does the work and returns its output fingerprint material'''
+
+    def __init__(self, name, run, deps=(), inputs=None, description=''):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        # inputs(results) -> extra fingerprint material; None means always run
+        self.inputs = inputs
+        self.description = description
+
+def fingerprint(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+class StageOutput:
+    '''sys.stdout stand-in: a stage thread's prints are buffered and shown as one block when it ends'''
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(text)
+        else:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def begin(self):
+        self.local.buffer = []
+
+    def end(self, header):
+        text = ''.join(self.local.buffer)
+        self.local.buffer = None
+        with self.lock:
+            self.stream.write(f'\n{header}\n{text}')
+            if text and not text.endswith('\n'):
+                self.stream.write('\n')
+            self.stream.flush()
+
+def select(stages, targets):
+    '''The target stages and everything they depend on, in declaration order'''
+    by_name = {s.name: s for s in stages}
+    wanted = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in by_name:
+            raise ValueError(f'unknown stage: {name}')
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(by_name[name].deps)
+    return [s for s in stages if s.name in wanted]
+
+def execute(stage, results, state, force, output):
+    '''Run (or skip) one stage; returns its result dict'''
+    started = time.perf_counter()
+    result = {'status': 'ok', 'output': None, 'error': None}
+    key = None
+    if stage.inputs is not None:
+        key = fingerprint([results[d]['output'] for d in stage.deps], stage.inputs(results))
+        saved = state.get(stage.name)
+        if not force and saved and saved.get('input') == key:
+            result.update(status='skipped', output=saved.get('output'), seconds=time.perf_counter() - started)
+            print(f'⏭️  [{stage.name}] inputs unchanged since {saved.get("at", "?")[:16]}, skipped')
+            return result
+
+    output.begin()
+    try:
+        result['output'] = stage.run(results)
+    except SystemExit as e:
+        # Scripts call exit() on fatal errors; exit(0) is still a success
+        if e.code not in (None, 0):
+            result.update(status='failed', error=f'exit {e.code}')
+    except Exception as e:
+        result.update(status='failed', error=f'{type(e).__name__}: {e}')
+    result['seconds'] = time.perf_counter() - started
+    icon = '✅' if result['status'] == 'ok' else '❌'
+    output.end(f'{icon} [{stage.name}] {result["seconds"]:.1f}s' +
+               (f' - {result["error"]}' if result['error'] else ''))
+
+    if result['status'] == 'ok' and key is not None:
+        state[stage.name] = {
+            'input': key,
+            'output': result['output'],
+            'at': datetime.now(timezone.utc).isoformat(),
+        }
+    return result
+
+def run_pipeline(stages, targets=None, force=False, workers=DEFAULT_WORKERS, state_path=STATE_PATH):
+    '''Run stages as soon as their dependencies finish; returns ({name: result dict}, wall seconds)'''
+    if targets:
+        stages = select(stages, targets)
+    state = load_state(state_path)
+    pending = {s.name: s for s in stages}
+    # A stage's entry is None while it runs
+    results = {}
+    running = {}
+    starts = {}
+    began = time.perf_counter()
+
+    output = StageOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(results.get(d) is None for d in stage.deps):
+                        continue
+                    del pending[name]
+                    failed = [d for d in stage.deps if results[d]['status'] in ('failed', 'blocked')]
+                    if failed:
+                        results[name] = {'status': 'blocked', 'output': None, 'seconds': 0.0,
+                                         'error': f'needs {", ".join(failed)}'}
+                        starts[name] = time.perf_counter() - began
+                        continue
+                    future = executor.submit(execute, stage, results, state, force, output)
+                    running[future] = name
+                    results[name] = None
+                    starts[name] = time.perf_counter() - began
+                if not running:
+                    if pending:
+                        raise ValueError(f'dependency cycle among: {", ".join(pending)}')
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+    finally:
+        sys.stdout = output.stream
+        save_state(state, state_path)
+
+    for name, start in starts.items():
+        results[name]['start'] = start
+    return results, time.perf_counter() - began
+
+def report(stages, results, total):
+    busy = sum(r['seconds'] for r in results.values())
+    print()
+    print('=' * 60)
+    print('⏱️  PIPELINE TIMINGS')
+    print('=' * 60)
+    print(f'   {"stage":<15} {"status":<8} {"start":>7} {"time":>7}')
+    for stage in stages:
+        r = results.get(stage.name)
+        if r is None:
+            continue
+        note = f'  {r["error"]}' if r['error'] else ''
+        print(f'   {stage.name:<15} {r["status"]:<8} {r["start"]:>6.1f}s {r["seconds"]:>6.1f}s{note}')
+    print(f'   Wall time {total:.1f}s for {busy:.1f}s of stage work')
+
+# --- Daily update stages -----------------------------------------------------
+
+def _today():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+def stage_props(results):
+    import fetch_prizepicks_props
+    fetch_prizepicks_props.main()
+    props = get_context().props()
+    if not props:
+        raise RuntimeError('no props on the board')
+    # Board players: the stats refresh only reruns when these change
+    return sorted({p['player_name'] for p in props})
+
+def stage_games(results):
+    import fetch_balldontlie_games
+    today = date.today()
+    dates = [today.strftime('%Y-%m-%d'), (today + timedelta(days=1)).strftime('%Y-%m-%d')]
+    games = fetch_balldontlie_games.fetch_games_for_dates(dates)
+    print(f'Found {len(games)} games across {len(dates)} dates')
+    if not fetch_balldontlie_games.upsert_games(games):
+        # Secondary source
+        import fetch_espn_games
+        fetch_espn_games.get_todays_real_games()
+    return None
+
+def stage_link(results):
+    import fix_team_abbreviations
+    import update_projections_with_defense as model
+    fix_team_abbreviations.main()
+    if not model.link_props_to_games():
+        raise RuntimeError('props could not be linked to games')
+    # Everything the projections read from the board
+    context = get_context()
+    games = {g['id']: (g.get('home_team_abbr'), g.get('away_team_abbr'), g.get('game_time'))
+             for g in context.games()}
+    board = sorted((p['id'], p['player_name'], p['stat_type'], p.get('line'), p.get('team'),
+                    games.get(p.get('game_id')))
+                   for p in context.props())
+    return fingerprint(board)
+
+def stage_injuries(results):
+    import update_projections_with_defense as model
+    if model.fetch_current_injuries():
+        print(f'✅ Injury data loaded: {len(model.INJURY_CACHE)} players tracked')
+    else:
+        print('⚠️  Could not fetch injury data, continuing without injury adjustments')
+    return fingerprint(sorted(model.INJURY_CACHE.items()))
+
+def stage_stats(results):
+    import fetch_player_stats_robust
+    fetch_player_stats_robust.main([])
+    return fetch_player_stats_robust.get_stats_watermark()
+
+def stage_odds(results):
+    import fetch_sportsbook_odds
+    fetch_sportsbook_odds.main()
+    # Served to the frontend as a static file
+    if os.path.exists('sportsbook_odds_cache.json'):
+        shutil.copy('sportsbook_odds_cache.json', 'public/sportsbook_odds_cache.json')
+        print('✅ Copied odds cache to public/sportsbook_odds_cache.json')
+    return None
+
+def stage_supabase_odds(results):
+    import sync_odds_to_props
+    import track_odds_to_supabase
+    track_odds_to_supabase.main([])
+    sync_odds_to_props.main([])
+    return None
+
+def _model_source():
+    '''Projection code changes invalidate saved projections'''
+    from projection_engine import model_version
+    return model_version()
+
+def daily_stages(dump_matchups=None, offline_stats=False, full=False):
+    def stage_projections(results):
+        import update_projections_with_defense as model
+        model.run_projections(dump_matchups=dump_matchups, offline_stats=offline_stats, full=full)
+        return None
+
+    return [
+        Stage('props', stage_props, description='PrizePicks board -> props'),
+        Stage('games', stage_games, deps=['props'], description="today's and tomorrow's games"),
+        Stage('link', stage_link, deps=['props', 'games'], description='normalize teams, link props to games'),
+        # Injuries are keyed on board spellings, so wait for props to rebuild the board name index
+        Stage('injuries', stage_injuries, deps=['props'], description='injury report scrape'),
+        Stage('stats', stage_stats, deps=['props'], inputs=lambda r: _today(),
+              description='game logs for board players (skipped when the players are unchanged today)'),
+        Stage('odds', stage_odds, deps=['props'], description='sportsbook odds -> odds_history.db'),
+        Stage('supabase_odds', stage_supabase_odds, deps=['link'], description='odds -> Supabase odds_history and props'),
+        # Within the stage only props whose inputs changed are recomputed; --full always runs it for every prop
+        Stage('projections', stage_projections, deps=['link', 'injuries', 'stats'],
+              inputs=None if full else lambda r: (_today(), _model_source(), dump_matchups, offline_stats),
+              description='projections and edges for props whose inputs changed (skipped when none did)'),
+    ]
+
+def run_daily(targets=None, force=False, workers=DEFAULT_WORKERS, dump_matchups=None, offline_stats=False, full=False):
+    stages = daily_stages(dump_matchups=dump_matchups, offline_stats=offline_stats, full=full)
+    print('🚀 DAILY PIPELINE')
+    print('=' * 60)
+    results, total = run_pipeline(stages, targets=targets, force=force, workers=workers)
+    report(stages, results, total)
+    reads = get_context().reads
+    if reads:
+        print('   Supabase table loads: ' + ', '.join(f'{t} x{n}' for t, n in sorted(reads.items())))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the daily update as a DAG of in-process stages')
+    parser.add_argument('--only', action='append', metavar='STAGE', help='run this stage and its dependencies (repeatable)')
+    parser.add_argument('--force', action='store_true', help='run every stage even if its inputs are unchanged')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='stages run at once')
+    parser.add_argument('--dump-matchups', metavar='PATH', help='write the precomputed matchup table as TSV')
+    parser.add_argument('--offline-stats', action='store_true', help='use the local game log store without topping it up')
+    parser.add_argument('--full', action='store_true', help='recompute every projection, not just props whose inputs changed')
+    parser.add_argument('--list', action='store_true', help='show the stages and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for stage in daily_stages():
+            deps = f' <- {", ".join(stage.deps)}' if stage.deps else ''
+            print(f'{stage.name:<15} {stage.description}{deps}')
+        return
+
+    results = run_daily(targets=args.only, force=args.force, workers=args.workers,
+                        dump_matchups=args.dump_matchups, offline_stats=args.offline_stats, full=args.full)
+    if any(r['status'] in ('failed', 'blocked') for r in results.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Shared clients and board data for scripts running in one process
+PipelineContext owns one Supabase client and one keep-alive HTTP session,
+and loads board-level datasets (props, games, the player_stats window,
+the injury report) once, on first use, so pipeline stages share a single
+copy instead of each script re-downloading whole tables. A script run on
+its own just gets a context for its own process from get_context().
+
+Writers keep the cache honest: rows returned by props()/games() are the
+cached rows, so a script that updates one in Supabase updates the dict too
+(or calls update_rows/add_rows); invalidate() drops a table it rewrote so
+the next reader refetches it.
+"""
+
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from urllib3.util.retry import Retry
+
+from http_cache import get_session
+
+PAGE_SIZE = 1000
+
+# One connection pool for every fetcher; 5xx responses are retried with
+# backoff, 429s are left to callers' rate limiters
+POOL_SIZE = 32
+RETRY = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+
+class PipelineContext:
+    '''One Supabase client, one HTTP session and lazily memoized board datasets'''
+
+    def __init__(self, client=None, session=None):
+        self._client = client
+        self._session = session
+        self._data = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        # Full-table downloads per table, for the pipeline report
+        self.reads = Counter()
+
+    @property
+    def supabase(self):
+        with self._lock:
+            if self._client is None:
+                from supabase import create_client
+                load_dotenv()
+                self._client = create_client(
+                    os.getenv('VITE_SUPABASE_URL'),
+                    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
+                )
+            return self._client
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = get_session(retry=RETRY, pool_maxsize=POOL_SIZE)
+            return self._session
+
+    def memo(self, name, load):
+        '''load() once per name; concurrent callers wait for the first one'''
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._data:
+                self._data[name] = load()
+            return self._data[name]
+
+    def fetch_all(self, table, columns='*'):
+        '''Every row of a table, a page at a time'''
+        self.reads[table] += 1
+        rows = []
+        offset = 0
+        while True:
+            response = self.supabase.table(table).select(columns).order('id')\
+                .range(offset, offset + PAGE_SIZE - 1)\
+                .execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            offset += PAGE_SIZE
+
+    def props(self, include_retired=False):
+        '''Props on the board (all columns); retired rows only on request'''
+        rows = self.memo('props', lambda: self.fetch_all('props'))
+        return rows if include_retired else [p for p in rows if not p.get('retired_at')]
+
+    def games(self):
+        return self.memo('games', lambda: self.fetch_all('games'))
+
+    def find_game(self, home_abbr, away_abbr, start, end):
+        '''Cached game for a matchup with game_time between two aware datetimes'''
+        for game in self.games():
+            if game.get('home_team_abbr') != home_abbr or game.get('away_team_abbr') != away_abbr:
+                continue
+            game_time = _utc(game.get('game_time'))
+            if game_time and start <= game_time <= end:
+                return game
+        return None
+
+    def add_rows(self, name, rows):
+        '''Mirror inserted rows into the cached table, if it is loaded'''
+        with self._lock:
+            cached = self._data.get(name)
+        if cached is not None:
+            cached.extend(rows or ())
+
+    def remove_rows(self, name, keep):
+        '''Drop cached rows for which keep(row) is false, if the table is loaded'''
+        with self._lock:
+            rows = self._data.get(name)
+            if rows is not None:
+                rows[:] = [row for row in rows if keep(row)]
+
+    def update_rows(self, name, changes_by_id):
+        '''Mirror updates ({row id: {column: value}}) into the cached table, if it is loaded'''
+        with self._lock:
+            rows = self._data.get(name)
+        for row in rows or ():
+            changes = changes_by_id.get(row.get('id'))
+            if changes:
+                row.update(changes)
+
+    def invalidate(self, *names):
+        with self._lock:
+            for name in names:
+                self._data.pop(name, None)
+
+def _utc(value):
+    '''Supabase timestamp -> aware datetime (naive values are UTC)'''
+    try:
+        dt = datetime.fromisoformat((value or '').replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+_context = None
+_context_lock = threading.Lock()
+
+def get_context():
+    '''The process-wide context, created on first use'''
+    global _context
+    with _context_lock:
+        if _context is None:
+            _context = PipelineContext()
+        return _context
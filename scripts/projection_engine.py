@@ -0,0 +1,142 @@
+"""
+Vectorized projection engine
+Computes projections for the whole board in one NumPy pass.
+Mirrors calculate_projection() in update_projections_with_defense.py.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import stats as scipy_stats
+
+# Games per player window (matches the player_stats prefetch)
+WINDOW = 15
+
+# player_stats columns summed for each prop stat type
+STAT_COLUMNS = {
+    'Points': ('points',),
+    'Rebounds': ('rebounds',),
+    'Assists': ('assists',),
+    'Steals': ('steals',),
+    'Blocks': ('blocks',),
+    'Blocked Shots': ('blocks',),
+    'Turnovers': ('turnovers',),
+    '3-Pointers Made': ('three_pointers_made',),
+    '3-PT Made': ('three_pointers_made',),
+    'Field Goals Made': ('field_goals_made',),
+    'FG Made': ('field_goals_made',),
+    'Free Throws Made': ('free_throws_made',),
+    'Pts+Rebs': ('points', 'rebounds'),
+    'Pts+Asts': ('points', 'assists'),
+    'Pts+Rebs+Asts': ('points', 'rebounds', 'assists'),
+    'Rebs+Asts': ('rebounds', 'assists'),
+    'Blks+Stls': ('blocks', 'steals'),
+}
+
+# One row per prop: padded game values + mask, line and adjustment factors
+BOARD_DTYPE = np.dtype([
+    ('values', 'f8', (WINDOW,)),
+    ('mask', '?', (WINDOW,)),
+    ('line', 'f8'),
+    ('known_stat', '?'),
+    ('injury_adj', 'f8'),
+    ('usage_boost', 'f8'),
+    ('matchup_adj', 'f8'),
+])
+
+def stat_values(player_stats, stat_type):
+    '''Per-game values for a stat type (None if the stat type is not modeled)'''
+    columns = STAT_COLUMNS.get(stat_type)
+    if columns is None:
+        return None
+    return [sum(s.get(col) or 0 for col in columns) for s in (player_stats or [])]
+
+# This engine plus the script that post-processes its output (probability
+# clamp, edge cap); editing either invalidates every stored input fingerprint
+MODEL_SOURCES = ('projection_engine.py', 'update_projections_with_defense.py')
+
+def model_version():
+    '''Hash of MODEL_SOURCES as they are on disk'''
+    digest = hashlib.sha1()
+    for name in MODEL_SOURCES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+MODEL_VERSION = model_version()
+
+def input_fingerprint(entry, *extra):
+    '''Hash of what project_board() sees for one build_board entry (plus extra context)
+
+    Equal fingerprints give equal projections, so a stored projection can be
+    kept while its fingerprint matches.
+    '''
+    player_stats, line, stat_type, injury_adj, usage_boost, matchup_adj = entry
+    values = stat_values(player_stats, stat_type)
+    payload = [MODEL_VERSION, values[:WINDOW] if values is not None else None, float(line), stat_type,
+               round(float(injury_adj), 6), round(float(usage_boost), 6), round(float(matchup_adj), 6), list(extra)]
+    return hashlib.sha1(json.dumps(payload, default=str).encode('utf-8')).hexdigest()[:16]
+
+def build_board(entries):
+    '''Pack (player_stats, line, stat_type, injury_adj, usage_boost, matchup_adj) tuples into BOARD_DTYPE'''
+    entries = list(entries)
+    board = np.zeros(len(entries), dtype=BOARD_DTYPE)
+
+    for i, (player_stats, line, stat_type, injury_adj, usage_boost, matchup_adj) in enumerate(entries):
+        values = stat_values(player_stats, stat_type)
+        board['line'][i] = line
+        board['injury_adj'][i] = injury_adj
+        board['usage_boost'][i] = usage_boost
+        board['matchup_adj'][i] = matchup_adj
+        if values is None:
+            continue
+        board['known_stat'][i] = True
+        values = values[:WINDOW]
+        board['values'][i, :len(values)] = values
+        board['mask'][i, :len(values)] = True
+
+    return board
+
+def project_board(board):
+    '''Return (projection, prob_over, confidence) arrays for every row of a BOARD_DTYPE array'''
+    values = board['values']
+    mask = board['mask']
+    line = board['line']
+    injury_adj = board['injury_adj']
+
+    counts = mask.sum(axis=1)
+    has_games = board['known_stat'] & (counts > 0)
+    safe_counts = np.maximum(counts, 1)
+
+    # Same weights as np.exp(np.linspace(-1, 0, n)) over each row's first n games
+    steps = np.arange(WINDOW) / np.maximum(counts - 1, 1)[:, None]
+    weights = np.where(mask, np.exp(steps - 1.0), 0.0)
+    weights /= np.where(has_games, weights.sum(axis=1), 1.0)[:, None]
+    weighted_avg = (weights * values).sum(axis=1)
+
+    adjusted = weighted_avg * injury_adj * board['usage_boost'] * board['matchup_adj']
+
+    # Population std over the real games; single-game rows fall back to 25% of the average
+    mean = np.where(mask, values, 0.0).sum(axis=1) / safe_counts
+    variance = np.where(mask, (values - mean[:, None]) ** 2, 0.0).sum(axis=1) / safe_counts
+    std_dev = np.where(counts > 1, np.sqrt(variance), weighted_avg * 0.25)
+
+    z_score = (adjusted - line) / (std_dev + 0.01)
+    prob_over = scipy_stats.norm.cdf(z_score)
+
+    cv = std_dev / (weighted_avg + 0.01)
+    confidence = np.where(counts >= 10, np.where(cv < 0.3, 'high', np.where(cv < 0.5, 'medium', 'low')), 'low')
+
+    # Rows without usable games keep the line; players ruled OUT project to zero
+    is_out = has_games & (injury_adj == 0.0)
+    projection = np.where(has_games, np.round(adjusted, 1), line)
+    prob_over = np.where(has_games, np.round(prob_over, 4), 0.5)
+    confidence = np.where(has_games, confidence, 'low')
+
+    projection = np.where(is_out, 0.0, projection)
+    prob_over = np.where(is_out, 0.01, prob_over)
+    confidence = np.where(is_out, 'low', confidence)
+
+    return projection, prob_over, confidence
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Local replay server for recorded stats.nba.com and The Odds API responses
+Lets the stats fetcher and odds trackers be exercised without hitting the real APIs.
+
+Fixture layout (JSON exactly as returned by the APIs):
+    <fixtures>/commonallplayers.json
+    <fixtures>/leaguegamelog.json
+    <fixtures>/playergamelog/<PlayerID>.json
+    <fixtures>/events.json                  (Odds API event list)
+    <fixtures>/events/<event_id>.json       (Odds API event odds)
+
+Usage:
+    python scripts/replay_server.py fixtures/nba --port 8765 --max-rps 2
+    NBA_STATS_BASE_URL=http://localhost:8765/stats python scripts/fetch_player_stats_robust.py
+    ODDS_API_BASE_URL=http://localhost:8765/v4 python scripts/track_odds_history.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    fixtures = Path('.')
+    max_rps = 0.0
+    latency = 0.0
+    recent = deque()
+    lock = threading.Lock()
+    served = {'ok': 0, 'not_modified': 0, 'throttled': 0, 'missing': 0}
+    odds_quota = {'used': 0}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _over_limit(self):
+        '''Sliding one-second window, like the real API's 429 behaviour'''
+        if not self.max_rps:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.max_rps:
+                return True
+            self.recent.append(now)
+            return False
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip('/').split('/')[-1]
+
+        if self._over_limit():
+            self.served['throttled'] += 1
+            return self._send(429, {'message': 'Too Many Requests'}, {'Retry-After': '1'})
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if endpoint == 'commonallplayers':
+            path = self.fixtures / 'commonallplayers.json'
+        elif endpoint == 'playergamelog':
+            path = self.fixtures / 'playergamelog' / f'{params.get("PlayerID", "")}.json'
+        elif endpoint == 'odds' and '/events/' in url.path:
+            event_id = url.path.rstrip('/').split('/')[-2]
+            path = self.fixtures / 'events' / f'{event_id}.json'
+        else:
+            path = self.fixtures / f'{endpoint}.json'
+
+        if not path.exists():
+            self.served['missing'] += 1
+            return self._send(404, {'message': f'No fixture for {url.path}'})
+
+        body = json.loads(path.read_text(encoding='utf-8'))
+        etag = '"%x"' % int(path.stat().st_mtime_ns)
+        if self.headers.get('If-None-Match') == etag:
+            self.served['not_modified'] += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        headers = {'ETag': etag}
+        if '/sports/' in url.path:
+            # Mimic The Odds API usage headers: one credit per market requested
+            cost = len(params.get('markets', '').split(',')) if endpoint == 'odds' else 0
+            with self.lock:
+                self.odds_quota['used'] += cost
+                used = self.odds_quota['used']
+            headers.update({'x-requests-used': str(used), 'x-requests-remaining': str(max(0, 500 - used)),
+                            'x-requests-last': str(cost)})
+
+        self.served['ok'] += 1
+        self._send(200, body, headers)
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded stats.nba.com JSON locally')
+    parser.add_argument('fixtures', help='directory with recorded responses')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-rps', type=float, default=0.0, help='answer 429 above this many requests per second')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before each response')
+    args = parser.parse_args()
+
+    ReplayHandler.fixtures = Path(args.fixtures)
+    ReplayHandler.max_rps = args.max_rps
+    ReplayHandler.latency = args.latency
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), ReplayHandler)
+    print(f'Replaying {args.fixtures} on http://127.0.0.1:{args.port}/stats and /v4 (max {args.max_rps or "unlimited"} req/s)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f'Served: {ReplayHandler.served}')
+
+if __name__ == '__main__':
+    main()
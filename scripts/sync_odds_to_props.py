@@ -2,131 +2,173 @@
 """
 Update live props with latest sportsbook odds from odds_history
 This syncs the odds_history table data to the props table for website display
+Only odds_history rows newer than the last sync are read, and only props whose
+odds differ from the latest known values are updated (state in
+.cache/odds_state, see odds_state.py); --full re-reads the last 2 hours.
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+import argparse
 from datetime import datetime, timezone, timedelta
-
-load_dotenv()
-
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
-
-print('=' * 60)
-print('SYNCING ODDS TO LIVE PROPS')
-print('=' * 60)
-print()
-
-# Get the most recent odds from odds_history
-print('[*] Fetching latest odds from odds_history...')
-try:
-    # Get odds from the last 2 hours
-    cutoff_time = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
-    
-    response = supabase.table('odds_history')\
-        .select('*')\
-        .gte('recorded_at', cutoff_time)\
-        .order('recorded_at', desc=True)\
-        .execute()
-    
-    odds_records = response.data
-    print(f'[+] Found {len(odds_records)} recent odds records')
-except Exception as e:
-    print(f'[-] Error fetching odds_history: {e}')
-    exit(1)
-
-if not odds_records:
-    print('[!] No recent odds found in odds_history table')
-    print('    Run: python scripts/track_odds_to_supabase.py')
-    exit(0)
-
-print()
-
-# Group by player + stat to get the latest odds for each
-print('[*] Grouping odds by player and stat...')
-latest_odds = {}
-
-for record in odds_records:
-    key = (record['player_name'], record['stat_type'])
-    
-    if key not in latest_odds:
-        latest_odds[key] = record
+from name_resolver import NameIndex
+from odds_state import SyncedOdds
+from pipeline_context import get_context
+
+context = get_context()
+
+PAGE_SIZE = 1000
+# First run (or --full): how far back to look for odds
+BOOTSTRAP_HOURS = 2
+
+def fetch_rows(table, columns, since=None):
+    '''All rows of a table (newer than `since` by recorded_at if given), a page at a time'''
+    rows = []
+    offset = 0
+    while True:
+        query = context.supabase.table(table).select(columns)
+        if since:
+            query = query.gt('recorded_at', since).order('recorded_at')
+        response = query.order('id').range(offset, offset + PAGE_SIZE - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+def odds_update(odds):
+    '''Props columns to set from one odds_history row'''
+    update_data = {}
+
+    if odds.get('draftkings_line') is not None:
+        update_data['draftkings_line'] = odds['draftkings_line']
+        update_data['draftkings_over_odds'] = odds['draftkings_over_odds']
+        update_data['draftkings_under_odds'] = odds['draftkings_under_odds']
+
+    if odds.get('fanduel_line') is not None:
+        update_data['fanduel_line'] = odds['fanduel_line']
+        update_data['fanduel_over_odds'] = odds['fanduel_over_odds']
+        update_data['fanduel_under_odds'] = odds['fanduel_under_odds']
+
+    return update_data
+
+def _same(a, b):
+    # Supabase returns DECIMAL lines as strings or floats depending on the column
+    if a is None or b is None:
+        return a is b
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return a == b
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sync latest odds_history odds onto the props board')
+    parser.add_argument('--full', action='store_true', help=f'ignore the saved watermark and re-read the last {BOOTSTRAP_HOURS} hours')
+    args = parser.parse_args(argv)
+
+    print('=' * 60)
+    print('SYNCING ODDS TO LIVE PROPS')
+    print('=' * 60)
+    print()
+
+    state = SyncedOdds()
+    since = None if args.full else state.synced_through
+    if since is None:
+        since = (datetime.now(timezone.utc) - timedelta(hours=BOOTSTRAP_HOURS)).isoformat()
+
+    # Only odds recorded since the last sync; the tracker writes a row only when a line moves
+    print(f'[*] Fetching odds_history rows after {since}...')
+    try:
+        odds_records = fetch_rows('odds_history', '*', since=since)
+        print(f'[+] Found {len(odds_records)} new odds records')
+    except Exception as e:
+        print(f'[-] Error fetching odds_history: {e}')
+        exit(1)
+
+    moved = state.apply(odds_records)
+    latest_odds = state.latest
+    print(f'[+] {len(moved)} player props moved, {len(latest_odds)} known')
+
+    if not latest_odds:
+        print('[!] No recent odds found in odds_history table')
+        print('    Run: python scripts/track_odds_to_supabase.py')
+        state.save()
+        exit(0)
+
+    print()
+
+    # Current odds on the board, so unchanged props are skipped and new props still get odds
+    print('[*] Fetching props from database...')
+    try:
+        props = context.props()
+        print(f'[+] Found {len(props)} props in database')
+    except Exception as e:
+        print(f'[-] Error fetching props: {e}')
+        exit(1)
+
+    # Re-key odds onto the props' spelling of each player name
+    board = NameIndex({p['player_name'] for p in props})
+    odds_by_prop = {}
+    for (player_name, stat_type), record in latest_odds.items():
+        key = (board.canonical(player_name), stat_type)
+        if key not in odds_by_prop or record['recorded_at'] > odds_by_prop[key]['recorded_at']:
+            odds_by_prop[key] = record
+    board.report('Odds -> props board')
+
+    print()
+
+    # Match and update
+    print('[*] Matching odds to props...')
+    updated_count = 0
+    current_count = 0
+    errors = 0
+
+    for prop in props:
+        player_name = prop['player_name']
+        stat_type = prop['stat_type']
+        key = (player_name, stat_type)
+
+        if key not in odds_by_prop:
+            continue
+
+        update_data = odds_update(odds_by_prop[key])
+        if all(_same(prop.get(col), value) for col, value in update_data.items()):
+            current_count += 1
+            continue
+
+        try:
+            context.supabase.table('props').update(update_data).eq('id', prop['id']).execute()
+            prop.update(update_data)
+            updated_count += 1
+
+            if updated_count <= 5:
+                print(f'    [+] Updated {player_name} - {stat_type}')
+        except Exception as e:
+            errors += 1
+            if errors <= 3:
+                print(f'    [!] Error updating {player_name}: {e}')
+
+    # Props that failed still differ next run, so the watermark can move on
+    state.save()
+
+    print()
+    print('=' * 60)
+    print('ODDS SYNC COMPLETE')
+    print('=' * 60)
+    print(f'Updated: {updated_count} props')
+    print(f'Already current: {current_count} props')
+    print(f'Errors: {errors}')
+    print()
+
+    if updated_count > 0:
+        print('[+] Success! Sportsbook odds are now live on your website')
+        print('    Refresh your browser to see DraftKings and FanDuel odds')
+    elif current_count > 0:
+        print('[+] Props already have the latest odds')
     else:
-        # Keep the most recent
-        if record['recorded_at'] > latest_odds[key]['recorded_at']:
-            latest_odds[key] = record
-
-print(f'[+] Found {len(latest_odds)} unique player props')
-print()
-
-# Get all props from database
-print('[*] Fetching props from database...')
-try:
-    props_response = supabase.table('props').select('id, player_name, stat_type').execute()
-    props = props_response.data
-    print(f'[+] Found {len(props)} props in database')
-except Exception as e:
-    print(f'[-] Error fetching props: {e}')
-    exit(1)
-
-print()
-
-# Match and update
-print('[*] Matching odds to props...')
-updated_count = 0
-errors = 0
-
-for prop in props:
-    player_name = prop['player_name']
-    stat_type = prop['stat_type']
-    key = (player_name, stat_type)
-    
-    if key in latest_odds:
-        odds = latest_odds[key]
-        
-        # Prepare update
-        update_data = {}
-        
-        if odds.get('draftkings_line') is not None:
-            update_data['draftkings_line'] = odds['draftkings_line']
-            update_data['draftkings_over_odds'] = odds['draftkings_over_odds']
-            update_data['draftkings_under_odds'] = odds['draftkings_under_odds']
-        
-        if odds.get('fanduel_line') is not None:
-            update_data['fanduel_line'] = odds['fanduel_line']
-            update_data['fanduel_over_odds'] = odds['fanduel_over_odds']
-            update_data['fanduel_under_odds'] = odds['fanduel_under_odds']
-        
-        if update_data:
-            try:
-                supabase.table('props').update(update_data).eq('id', prop['id']).execute()
-                updated_count += 1
-                
-                if updated_count <= 5:
-                    print(f'    [+] Updated {player_name} - {stat_type}')
-            except Exception as e:
-                errors += 1
-                if errors <= 3:
-                    print(f'    [!] Error updating {player_name}: {e}')
-
-print()
-print('=' * 60)
-print('ODDS SYNC COMPLETE')
-print('=' * 60)
-print(f'Updated: {updated_count} props')
-print(f'Errors: {errors}')
-print()
-
-if updated_count > 0:
-    print('[+] Success! Sportsbook odds are now live on your website')
-    print('    Refresh your browser to see DraftKings and FanDuel odds')
-else:
-    print('[!] No props were updated')
-    print('    Make sure:')
-    print('    1. Props exist in your database (run: .\\run-projections.ps1)')
-    print('    2. Odds were tracked (run: python scripts/track_odds_to_supabase.py)')
-    print('    3. Player names match between props and odds_history tables')
+        print('[!] No props were updated')
+        print('    Make sure:')
+        print('    1. Props exist in your database (run: .\\run-projections.ps1)')
+        print('    2. Odds were tracked (run: python scripts/track_odds_to_supabase.py)')
+        print('    3. Player names match between props and odds_history tables')
+
+if __name__ == '__main__':
+    main()
@@ -10,34 +10,30 @@ import sys
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-import requests
-
-# The Odds API configuration
-ODDS_API_KEY = os.getenv('ODDS_API_KEY', 'dd30c0f0f1f494e7c0a5cef66366da2b')
-BASE_URL = "https://api.the-odds-api.com/v4"
+from name_resolver import load_index
+from odds_snapshot import SnapshotWriter, connect, describe
+from odds_store import CompactSnapshotWriter, is_compact
+from line_movement import refresh as refresh_line_movement
+from odds_retention import apply_retention, describe as describe_retention
+from odds_api import ODDS_API_KEY, fetch_all_event_odds, get_nba_games, iter_prop_lines, quota_summary
 
 # SQLite database path
 DB_PATH = Path(__file__).parent.parent / 'odds_history.db'
 
-# Stat type mapping from The Odds API to our database
-ODDS_API_STAT_MAP = {
-    'player_points': 'Points',
-    'player_rebounds': 'Rebounds',
-    'player_assists': 'Assists',
-    'player_threes': '3-PT Made',
-    'player_blocks': 'Blocked Shots',
-    'player_steals': 'Steals',
-    'player_turnovers': 'Turnovers',
-    'player_points_rebounds_assists': 'Pts+Rebs+Asts',
-    'player_points_rebounds': 'Pts+Rebs',
-    'player_points_assists': 'Pts+Asts',
-    'player_rebounds_assists': 'Rebs+Asts',
-    'player_blocks_steals': 'Blks+Stls'
-}
+SNAPSHOT_COLUMNS = ('player_name', 'stat_type', 'draftkings_line', 'draftkings_over_odds',
+                    'draftkings_under_odds', 'fanduel_line', 'fanduel_over_odds',
+                    'fanduel_under_odds', 'recorded_at')
+
+# Odds API spellings are mapped onto the props board names saved by fetch_prizepicks_props.py
+board_names = load_index('board')
 
 def init_database():
-    """Initialize SQLite database with odds_history table"""
-    conn = sqlite3.connect(DB_PATH)
+    """Initialize SQLite database with odds_history table; returns True for a compact (change-only) database"""
+    conn = connect(DB_PATH)
+    if is_compact(conn):
+        conn.close()
+        print('✅ Database ready (compact, change-only)')
+        return True
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -65,64 +61,7 @@ def init_database():
     conn.commit()
     conn.close()
     print('✅ Database initialized')
-
-def get_nba_games():
-    """Fetch upcoming NBA games from The Odds API"""
-    try:
-        url = f"{BASE_URL}/sports/basketball_nba/events"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'dateFormat': 'iso'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        games = response.json()
-        return games
-        
-    except Exception as e:
-        print(f"❌ Error fetching games: {e}")
-        return []
-
-def get_player_prop_odds(game_id):
-    """Fetch player prop odds for a specific game"""
-    try:
-        bookmakers = 'draftkings,fanduel'
-        
-        markets = ','.join([
-            'player_points',
-            'player_rebounds', 
-            'player_assists',
-            'player_threes',
-            'player_blocks',
-            'player_steals',
-            'player_turnovers',
-            'player_points_rebounds_assists',
-            'player_points_rebounds',
-            'player_points_assists',
-            'player_rebounds_assists',
-            'player_blocks_steals',
-        ])
-        
-        url = f"{BASE_URL}/sports/basketball_nba/events/{game_id}/odds"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'regions': 'us',
-            'markets': markets,
-            'oddsFormat': 'american',
-            'bookmakers': bookmakers
-        }
-        
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data
-        
-    except Exception as e:
-        print(f"⚠️  Error fetching odds for game {game_id}: {e}")
-        return None
+    return False
 
 def get_existing_props():
     """Get current props from SQLite to track"""
@@ -130,95 +69,50 @@ def get_existing_props():
     # No need to link to props table
     return {}
 
-def store_odds_history(odds_data, props_map):
-    """Store odds snapshot in SQLite odds_history table"""
+def store_odds_history(odds_data, props_map, writer):
+    """Stage one game's odds for the snapshot's single write to odds_history"""
     if not odds_data or 'bookmakers' not in odds_data:
         return 0
     
-    count = 0
-    
     # Organize odds by player and stat
     player_odds = {}
     
-    for bookmaker in odds_data.get('bookmakers', []):
-        sportsbook_name = bookmaker.get('title', '').lower()
+    for prop in iter_prop_lines(odds_data):
+        sportsbook_name = prop['sportsbook'].lower()
+        stat_type = prop['stat_type']
+        line = prop['line']
+        over_price = prop['over_price']
+        under_price = prop['under_price']
+        player_name = board_names.canonical(prop['player_name'])
+        key = (player_name, stat_type)
         
-        for market in bookmaker.get('markets', []):
-            market_key = market.get('key')
-            stat_type = ODDS_API_STAT_MAP.get(market_key)
-            
-            if not stat_type:
-                continue
-            
-            for outcome in market.get('outcomes', []):
-                player_name = outcome.get('description')
-                line = outcome.get('point')
-                
-                if outcome.get('name') == 'Over':
-                    over_price = outcome.get('price')
-                    
-                    # Find corresponding under
-                    under_price = None
-                    for other in market.get('outcomes', []):
-                        if (other.get('description') == player_name and 
-                            other.get('name') == 'Under' and 
-                            other.get('point') == line):
-                            under_price = other.get('price')
-                            break
-                    
-                    if over_price and under_price and line:
-                        key = (player_name, stat_type)
-                        
-                        if key not in player_odds:
-                            player_odds[key] = {
-                                'player_name': player_name,
-                                'stat_type': stat_type,
-                                'draftkings_line': None,
-                                'draftkings_over_odds': None,
-                                'draftkings_under_odds': None,
-                                'fanduel_line': None,
-                                'fanduel_over_odds': None,
-                                'fanduel_under_odds': None
-                            }
-                        
-                        if 'draftkings' in sportsbook_name:
-                            player_odds[key]['draftkings_line'] = float(line)
-                            player_odds[key]['draftkings_over_odds'] = int(over_price)
-                            player_odds[key]['draftkings_under_odds'] = int(under_price)
-                        elif 'fanduel' in sportsbook_name:
-                            player_odds[key]['fanduel_line'] = float(line)
-                            player_odds[key]['fanduel_over_odds'] = int(over_price)
-                            player_odds[key]['fanduel_under_odds'] = int(under_price)
-    
-    # Insert records into SQLite
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+        if key not in player_odds:
+            player_odds[key] = {
+                'player_name': player_name,
+                'stat_type': stat_type,
+                'draftkings_line': None,
+                'draftkings_over_odds': None,
+                'draftkings_under_odds': None,
+                'fanduel_line': None,
+                'fanduel_over_odds': None,
+                'fanduel_under_odds': None,
+                'event_id': odds_data.get('id')
+            }
+        
+        if 'draftkings' in sportsbook_name:
+            player_odds[key]['draftkings_line'] = float(line)
+            player_odds[key]['draftkings_over_odds'] = int(over_price)
+            player_odds[key]['draftkings_under_odds'] = int(under_price)
+        elif 'fanduel' in sportsbook_name:
+            player_odds[key]['fanduel_line'] = float(line)
+            player_odds[key]['fanduel_over_odds'] = int(over_price)
+            player_odds[key]['fanduel_under_odds'] = int(under_price)
     
     for odds_record in player_odds.values():
-        try:
-            cursor.execute('''
-                INSERT OR IGNORE INTO odds_history 
-                (player_name, stat_type, draftkings_line, draftkings_over_odds, 
-                 draftkings_under_odds, fanduel_line, fanduel_over_odds, fanduel_under_odds)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                odds_record['player_name'],
-                odds_record['stat_type'],
-                odds_record['draftkings_line'],
-                odds_record['draftkings_over_odds'],
-                odds_record['draftkings_under_odds'],
-                odds_record['fanduel_line'],
-                odds_record['fanduel_over_odds'],
-                odds_record['fanduel_under_odds']
-            ))
-            count += 1
-        except Exception as e:
-            print(f"⚠️  Error storing odds for {odds_record['player_name']}: {e}")
-    
-    conn.commit()
-    conn.close()
+        odds_record['recorded_at'] = writer.recorded_at
+        writer.add(odds_record)
     
-    return count
+    return len(player_odds)
 
 def main():
     print('=' * 60)
@@ -229,7 +123,7 @@ def main():
     print()
     
     # Initialize database
-    init_database()
+    compact = init_database()
     print()
     
     # Check API key
@@ -253,32 +147,62 @@ def main():
     print(f'✅ Found {len(games)} upcoming games')
     print()
     
-    # Fetch odds for each game
+    # Fetch odds for every game at once, then store them in order
     print('💰 Fetching current odds...')
-    
-    total_recorded = 0
-    
-    for i, game in enumerate(games[:10], 1):
-        game_id = game.get('id')
+    results, fetch_secs = fetch_all_event_odds(games)
+    print(f'   Fetched {len(results)} events in {fetch_secs:.1f}s ({quota_summary()})')
+    
+    # One timestamp per snapshot, in the CURRENT_TIMESTAMP format of existing rows
+    recorded_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    if compact:
+        writer = CompactSnapshotWriter(DB_PATH, recorded_at)
+    else:
+        writer = SnapshotWriter(DB_PATH, 'odds_history', SNAPSHOT_COLUMNS)
+        writer.recorded_at = recorded_at
+    staged = 0
+    
+    for i, (game, odds_data) in enumerate(results, 1):
         home_team = game.get('home_team')
         away_team = game.get('away_team')
         
-        print(f'  [{i}/{min(10, len(games))}] {away_team} @ {home_team}', end=' ')
-        
-        odds_data = get_player_prop_odds(game_id)
+        print(f'  [{i}/{len(results)}] {away_team} @ {home_team}', end=' ')
         
         if odds_data:
-            count = store_odds_history(odds_data, props_map)
-            total_recorded += count
-            print(f'✅ {count} odds recorded')
+            count = store_odds_history(odds_data, props_map, writer)
+            staged += count
+            print(f'✅ {count} odds staged')
         else:
             print('⚠️  No odds')
     
+    print()
+    try:
+        timings = writer.flush()
+        total_recorded = timings['inserted']
+        print(f'💾 Snapshot: {describe(timings)}')
+    except sqlite3.Error as e:
+        total_recorded = 0
+        print(f'⚠️  Error storing odds snapshot ({staged} rows): {e}')
+    
+    # Roll up finished hours and slates, prune raw rows past the retention window
+    try:
+        print(f'🗂️  Retention: {describe_retention(apply_retention(DB_PATH))}')
+    except sqlite3.Error as e:
+        print(f'⚠️  Error applying retention: {e}')
+    
+    # Keep the per-prop movement summary in step with the new snapshot
+    try:
+        movement = refresh_line_movement(DB_PATH)
+        if movement:
+            print(f'📈 Line movement: {movement[0]} props summarized in {movement[1]:.1f} ms')
+    except sqlite3.Error as e:
+        print(f'⚠️  Error refreshing line movement: {e}')
+    
     print()
     print('=' * 60)
     print('✅ ODDS HISTORY SNAPSHOT COMPLETE')
     print('=' * 60)
     print(f'📈 Total odds recorded: {total_recorded}')
+    board_names.report('Odds -> props board')
     print(f'💾 Stored in: {DB_PATH}')
     print()
     print('💡 Run this script hourly to build line movement history')
@@ -2,168 +2,81 @@
 """
 Track sportsbook odds history directly to Supabase
 Run this script hourly to capture odds snapshots for line movement analysis
+Only props whose line or prices moved since the last run are inserted
+(last-known state in .cache/odds_state, see odds_state.py); --full writes
+the whole board again.
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-import requests
 from dotenv import load_dotenv
-from supabase import create_client
+from name_resolver import load_index
+from odds_api import ODDS_API_KEY, fetch_all_event_odds, get_nba_games, iter_prop_lines, quota_summary
+from odds_state import LastKnownOdds
+from pipeline_context import get_context
 
 # Load environment variables
 load_dotenv()
 
 # Supabase configuration
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
 
-# The Odds API configuration
-ODDS_API_KEY = os.getenv('ODDS_API_KEY', 'dd30c0f0f1f494e7c0a5cef66366da2b')
-BASE_URL = "https://api.the-odds-api.com/v4"
+# Odds API spellings are mapped onto the props board names saved by fetch_prizepicks_props.py
+board_names = load_index('board')
 
-# Stat type mapping from The Odds API to our database
-ODDS_API_STAT_MAP = {
-    'player_points': 'Points',
-    'player_rebounds': 'Rebounds',
-    'player_assists': 'Assists',
-    'player_threes': '3-PT Made',
-    'player_blocks': 'Blocked Shots',
-    'player_steals': 'Steals',
-    'player_turnovers': 'Turnovers',
-    'player_points_rebounds_assists': 'Pts+Rebs+Asts',
-    'player_points_rebounds': 'Pts+Rebs',
-    'player_points_assists': 'Pts+Asts',
-    'player_rebounds_assists': 'Rebs+Asts',
-    'player_blocks_steals': 'Blks+Stls'
-}
-
-def get_nba_games():
-    """Fetch upcoming NBA games from The Odds API"""
-    try:
-        url = f"{BASE_URL}/sports/basketball_nba/events"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'dateFormat': 'iso'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        games = response.json()
-        return games
-        
-    except Exception as e:
-        print(f"❌ Error fetching games: {e}")
-        return []
-
-def get_player_prop_odds(game_id):
-    """Fetch player prop odds for a specific game"""
-    try:
-        bookmakers = 'draftkings,fanduel'
-        
-        markets = ','.join([
-            'player_points',
-            'player_rebounds', 
-            'player_assists',
-            'player_threes',
-            'player_blocks',
-            'player_steals',
-            'player_turnovers',
-            'player_points_rebounds_assists',
-            'player_points_rebounds',
-            'player_points_assists',
-            'player_rebounds_assists',
-            'player_blocks_steals',
-        ])
-        
-        url = f"{BASE_URL}/sports/basketball_nba/events/{game_id}/odds"
-        params = {
-            'apiKey': ODDS_API_KEY,
-            'regions': 'us',
-            'markets': markets,
-            'oddsFormat': 'american',
-            'bookmakers': bookmakers
-        }
-        
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data
-        
-    except Exception as e:
-        print(f"⚠️  Error fetching odds for game {game_id}: {e}")
-        return None
-
-def store_odds_to_supabase(odds_data):
-    """Store odds snapshot directly in Supabase odds_history table"""
+def store_odds_to_supabase(odds_data, last_known, full=False):
+    """Store the props that moved since the last run in Supabase odds_history; returns (inserted, unchanged)"""
     if not odds_data or 'bookmakers' not in odds_data:
-        return 0
+        return 0, 0
     
     count = 0
+    unchanged = 0
     records_to_insert = []
     
     # Organize odds by player and stat
     player_odds = {}
     
-    for bookmaker in odds_data.get('bookmakers', []):
-        sportsbook_name = bookmaker.get('title', '').lower()
+    for prop in iter_prop_lines(odds_data):
+        sportsbook_name = prop['sportsbook'].lower()
+        stat_type = prop['stat_type']
+        line = prop['line']
+        over_price = prop['over_price']
+        under_price = prop['under_price']
+        player_name = board_names.canonical(prop['player_name'])
+        key = (player_name, stat_type)
         
-        for market in bookmaker.get('markets', []):
-            market_key = market.get('key')
-            stat_type = ODDS_API_STAT_MAP.get(market_key)
-            
-            if not stat_type:
-                continue
-            
-            for outcome in market.get('outcomes', []):
-                player_name = outcome.get('description')
-                line = outcome.get('point')
-                
-                if outcome.get('name') == 'Over':
-                    over_price = outcome.get('price')
-                    
-                    # Find corresponding under
-                    under_price = None
-                    for other in market.get('outcomes', []):
-                        if (other.get('description') == player_name and 
-                            other.get('name') == 'Under' and 
-                            other.get('point') == line):
-                            under_price = other.get('price')
-                            break
-                    
-                    if over_price and under_price and line:
-                        key = (player_name, stat_type)
-                        
-                        if key not in player_odds:
-                            player_odds[key] = {
-                                'player_name': player_name,
-                                'stat_type': stat_type,
-                                'draftkings_line': None,
-                                'draftkings_over_odds': None,
-                                'draftkings_under_odds': None,
-                                'fanduel_line': None,
-                                'fanduel_over_odds': None,
-                                'fanduel_under_odds': None,
-                                'recorded_at': datetime.now(timezone.utc).isoformat()
-                            }
-                        
-                        if 'draftkings' in sportsbook_name:
-                            player_odds[key]['draftkings_line'] = float(line)
-                            player_odds[key]['draftkings_over_odds'] = int(over_price)
-                            player_odds[key]['draftkings_under_odds'] = int(under_price)
-                        elif 'fanduel' in sportsbook_name:
-                            player_odds[key]['fanduel_line'] = float(line)
-                            player_odds[key]['fanduel_over_odds'] = int(over_price)
-                            player_odds[key]['fanduel_under_odds'] = int(under_price)
-    
-    # Prepare records for batch insert
+        if key not in player_odds:
+            player_odds[key] = {
+                'player_name': player_name,
+                'stat_type': stat_type,
+                'draftkings_line': None,
+                'draftkings_over_odds': None,
+                'draftkings_under_odds': None,
+                'fanduel_line': None,
+                'fanduel_over_odds': None,
+                'fanduel_under_odds': None,
+                'recorded_at': datetime.now(timezone.utc).isoformat()
+            }
+        
+        if 'draftkings' in sportsbook_name:
+            player_odds[key]['draftkings_line'] = float(line)
+            player_odds[key]['draftkings_over_odds'] = int(over_price)
+            player_odds[key]['draftkings_under_odds'] = int(under_price)
+        elif 'fanduel' in sportsbook_name:
+            player_odds[key]['fanduel_line'] = float(line)
+            player_odds[key]['fanduel_over_odds'] = int(over_price)
+            player_odds[key]['fanduel_under_odds'] = int(under_price)
+    
+    # Prepare records for batch insert: only props where some book moved
     for odds_record in player_odds.values():
-        records_to_insert.append(odds_record)
+        if full or last_known.changed_books(odds_record):
+            records_to_insert.append(odds_record)
+        else:
+            last_known.touch(odds_record)
+            unchanged += 1
     
     # Insert records into Supabase in batches
     if records_to_insert:
@@ -172,21 +85,28 @@ def store_odds_to_supabase(odds_data):
             batch_size = 100
             for i in range(0, len(records_to_insert), batch_size):
                 batch = records_to_insert[i:i+batch_size]
-                result = supabase.table('odds_history').insert(batch).execute()
+                result = context.supabase.table('odds_history').insert(batch).execute()
                 count += len(batch)
+                for record in batch:
+                    last_known.mark(record)
         except Exception as e:
             print(f"⚠️  Error inserting to Supabase: {e}")
             # Try individual inserts as fallback
             for record in records_to_insert:
                 try:
-                    supabase.table('odds_history').insert(record).execute()
+                    context.supabase.table('odds_history').insert(record).execute()
                     count += 1
+                    last_known.mark(record)
                 except Exception as e2:
                     print(f"⚠️  Error storing odds for {record['player_name']}: {e2}")
     
-    return count
+    return count, unchanged
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Track sportsbook odds history to Supabase')
+    parser.add_argument('--full', action='store_true', help='insert every prop, not just the ones that moved')
+    args = parser.parse_args(argv)
+    
     print('=' * 60)
     print('📈 TRACKING ODDS HISTORY TO SUPABASE')
     print(f'⏰ Snapshot time: {datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")}')
@@ -201,7 +121,7 @@ def main():
     
     # Check Supabase connection
     try:
-        supabase.table('odds_history').select('id').limit(1).execute()
+        context.supabase.table('odds_history').select('id').limit(1).execute()
         print('✅ Connected to Supabase')
     except Exception as e:
         print(f'❌ Error connecting to Supabase: {e}')
@@ -220,32 +140,37 @@ def main():
     print(f'✅ Found {len(games)} upcoming games')
     print()
     
-    # Fetch odds for each game
+    # Fetch odds for every game at once, then store them in order
     print('💰 Fetching and storing current odds...')
+    results, fetch_secs = fetch_all_event_odds(games)
+    print(f'   Fetched {len(results)} events in {fetch_secs:.1f}s ({quota_summary()})')
     
+    last_known = LastKnownOdds()
     total_recorded = 0
+    total_unchanged = 0
     
-    for i, game in enumerate(games[:10], 1):
-        game_id = game.get('id')
+    for i, (game, odds_data) in enumerate(results, 1):
         home_team = game.get('home_team')
         away_team = game.get('away_team')
         
-        print(f'  [{i}/{min(10, len(games))}] {away_team} @ {home_team}', end=' ')
-        
-        odds_data = get_player_prop_odds(game_id)
+        print(f'  [{i}/{len(results)}] {away_team} @ {home_team}', end=' ')
         
         if odds_data:
-            count = store_odds_to_supabase(odds_data)
+            count, unchanged = store_odds_to_supabase(odds_data, last_known, full=args.full)
             total_recorded += count
-            print(f'✅ {count} odds recorded to Supabase')
+            total_unchanged += unchanged
+            print(f'✅ {count} odds recorded to Supabase ({unchanged} unchanged)')
         else:
             print('⚠️  No odds')
     
+    last_known.save()
+    
     print()
     print('=' * 60)
     print('✅ ODDS HISTORY SNAPSHOT COMPLETE')
     print('=' * 60)
-    print(f'📈 Total odds recorded to Supabase: {total_recorded}')
+    print(f'📈 Total odds recorded to Supabase: {total_recorded} ({total_unchanged} unchanged props skipped)')
+    board_names.report('Odds -> props board')
     print(f'☁️  Data now available on live website!')
     print()
     print('💡 Run this script hourly to build line movement history')
@@ -1,14 +1,17 @@
-﻿import os
+﻿import hashlib
+import os
 import time
 from dotenv import load_dotenv
-from supabase import create_client
 import numpy as np
 from scipy import stats as scipy_stats
-import subprocess
 import sys
 import requests
 from datetime import datetime, timedelta, timezone
 from bs4 import BeautifulSoup
+from projection_engine import STAT_COLUMNS, build_board, input_fingerprint, project_board
+from game_log_store import GameLogStore
+from name_resolver import NameIndex, load_index
+from pipeline_context import get_context
 
 # NBA Team Pace and Advanced Stats (2024-25 Season)
 NBA_TEAM_STATS = {
@@ -81,6 +84,9 @@ LEAGUE_AVG_AST = 63.0
 LEAGUE_AVG_TOV = 14.5
 LEAGUE_AVG_DEF_RTG = 113.0
 
+# Shared HTTP session (the injury page is cached on disk for 15 minutes)
+http_session = get_context().session
+
 # Global injury cache
 INJURY_CACHE = {}
 TEAM_INJURIES = {}  # Track injuries by team
@@ -97,7 +103,7 @@ def scrape_injuries_from_sportsethos():
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_session.get(url, headers=headers, timeout=15)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -105,6 +111,10 @@ def scrape_injuries_from_sportsethos():
         INJURY_CACHE = {}
         TEAM_INJURIES = {}
         injuries_found = 0
+
+        # Key injuries by the props board spelling so lookups by prop name hit exactly
+        board_names = load_index('board')
+        position_names = NameIndex(PLAYER_POSITIONS)
         
         # Find all injury tables
         injury_tables = soup.find_all('table')
@@ -146,8 +156,10 @@ def scrape_injuries_from_sportsethos():
                         elif 're-evaluat' in player_text.lower() or 'reevaluat' in player_text.lower():
                             status = 'out'
                         
+                        player_name = board_names.canonical(player_name)
+
                         # FIX: Use real position from PLAYER_POSITIONS instead of hard-coded 'SF'
-                        position = PLAYER_POSITIONS.get(player_name, 'SF')
+                        position = PLAYER_POSITIONS.get(position_names.canonical(player_name), 'SF')
                         team_abbr = normalize_team_abbr(team_abbr)
                         
                         if player_name and team_abbr:
@@ -168,6 +180,7 @@ def scrape_injuries_from_sportsethos():
                         continue
         
         print(f'✅ Found {injuries_found} injured players')
+        board_names.report('Injury report -> props board')
         
         if injuries_found > 0:
             status_counts = {}
@@ -201,8 +214,8 @@ def scrape_injuries_from_sportsethos():
         return False
 
 def fetch_current_injuries():
-    '''Fetch current NBA injuries from sportsethos.com'''
-    return scrape_injuries_from_sportsethos()
+    '''Fetch current NBA injuries from sportsethos.com (scraped once per process)'''
+    return get_context().memo('injuries', scrape_injuries_from_sportsethos)
 
 def get_usage_boost(player_name, player_team, player_position, stat_type):
     '''Calculate usage boost when key teammates are OUT (ADDITIVE not multiplicative)'''
@@ -577,15 +590,93 @@ PLAYER_POSITIONS = {
 
 
 load_dotenv()
-supabase = create_client(
-    os.getenv('VITE_SUPABASE_URL'),
-    os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
-)
+context = get_context()
 
 def get_player_position(player_name):
     '''Get player position, default to SF if unknown'''
     return PLAYER_POSITIONS.get(player_name, 'SF')
 
+def load_stats_from_store(player_names, games_per_player=15, offline=False):
+    '''Last N games per player from the local game log store, topped up with rows created since its last sync'''
+    try:
+        store = GameLogStore().load()
+        if not offline:
+            watermark, fetched = store.sync(context.supabase)
+            print(f'📥 Game log store: {fetched} new rows created since {watermark or "bootstrap"}')
+        if not store.rows:
+            return None
+        # Board spellings -> NBA spellings stored by the stats fetcher
+        stats_names = NameIndex(store.player_names())
+        resolved = {name: stats_names.resolve(name, fuzzy=False) for name in player_names}
+        windows = store.recent_games({n for n in resolved.values() if n}, games_per_player)
+        stats_by_player = {name: windows.get(stats_name, []) for name, stats_name in resolved.items()}
+        stats_names.report('Board -> stored game logs')
+        with_stats = sum(1 for rows in stats_by_player.values() if rows)
+        print(f'✅ Loaded stats for {with_stats}/{len(stats_by_player)} players from {store.rows} local rows '
+              f'({store.load_secs * 1000:.0f} ms, through {store.watermark})')
+        return stats_by_player
+    except Exception as e:
+        print(f'⚠️  Local game log store unavailable ({e}); querying Supabase')
+        return None
+
+def prefetch_player_stats(player_names, games_per_player=15, batch_size=25, page_size=1000, offline=False):
+    '''Load the last N games for every player on the board (once per process and board)'''
+    names = frozenset(name for name in player_names if name)
+    return context.memo(('player_stats', names, games_per_player, offline),
+                        lambda: _load_player_stats(names, games_per_player, batch_size, page_size, offline))
+
+def _load_player_stats(player_names, games_per_player, batch_size, page_size, offline):
+    '''Local game log store first; Supabase for everyone if it is unavailable, else for short windows'''
+    names = {name for name in player_names if name}
+    stats_by_player = load_stats_from_store(names, games_per_player, offline)
+    if stats_by_player is None:
+        return query_player_stats(names, games_per_player, batch_size, page_size)
+
+    # Players missing from the store (or with fewer games than it should have) are checked upstream
+    short = sorted(name for name, rows in stats_by_player.items() if len(rows) < games_per_player)
+    if short and not offline:
+        print(f'📊 {len(short)} players have fewer than {games_per_player} stored games; checking Supabase')
+        for name, rows in query_player_stats(short, games_per_player, batch_size, page_size).items():
+            if len(rows) > len(stats_by_player[name]):
+                stats_by_player[name] = rows
+    return stats_by_player
+
+def query_player_stats(player_names, games_per_player=15, batch_size=25, page_size=1000):
+    '''Last N games per player straight from Supabase, in batched in_() queries'''
+    stats_by_player = {name: [] for name in player_names if name}
+    names = sorted(stats_by_player)
+    queries = 0
+
+    for i in range(0, len(names), batch_size):
+        batch = names[i:i+batch_size]
+        offset = 0
+        while True:
+            # Newest games first across the whole batch; each player keeps its first N rows
+            response = context.supabase.table('player_stats')\
+                .select('*')\
+                .in_('player_name', batch)\
+                .order('game_date', desc=True)\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            queries += 1
+            rows = response.data or []
+
+            for row in rows:
+                window = stats_by_player.get(row.get('player_name'))
+                if window is not None and len(window) < games_per_player:
+                    window.append(row)
+
+            # Stop once the page is short or every player in the batch has a full window
+            if len(rows) < page_size:
+                break
+            if all(len(stats_by_player[name]) >= games_per_player for name in batch):
+                break
+            offset += page_size
+
+    with_stats = sum(1 for rows in stats_by_player.values() if rows)
+    print(f'✅ Prefetched stats for {with_stats}/{len(names)} players in {queries} queries')
+    return stats_by_player
+
 def get_defensive_adjustment(opponent_team, player_position, stat_type):
     '''Nonlinear, capped defensive adjustment based on opponent positional matchups'''
     if opponent_team not in DEFENSIVE_MATCHUPS:
@@ -680,6 +771,90 @@ def get_efficiency_adjustment(player_team, opponent_team, stat_type):
 
     return max(0.93, min(1.07, adjustment))
 
+def get_matchup_adjustment(player_team, opponent_team, player_position, stat_type):
+    '''Combined defense blend x pace x rebound x assist factor for one matchup'''
+    pos_def_adj = get_defensive_adjustment(opponent_team, player_position, stat_type)
+    eff_adj_for_blend = get_efficiency_adjustment(player_team, opponent_team, stat_type)
+    def_adj = (pos_def_adj * 0.65) + (eff_adj_for_blend * 0.35)
+    return (def_adj
+            * get_pace_adjustment(player_team, opponent_team)
+            * get_rebound_adjustment(player_team, opponent_team, stat_type)
+            * get_assist_adjustment(player_team, opponent_team, stat_type))
+
+# Matchup table axes; unknown teams fall into a trailing league-average slot
+MATCHUP_POSITIONS = ['PG', 'SG', 'SF', 'PF', 'C']
+MATCHUP_FACTORS = ('defense', 'pace', 'rebound', 'assist', 'total')
+
+def build_matchup_table():
+    '''Precompute matchup factors for every team x opponent x position x stat type'''
+    # Inputs are always normalized, so alias keys (SA, NO, GS, ...) never need a slot
+    teams = sorted(t for t in set(NBA_TEAM_STATS) | set(DEFENSIVE_MATCHUPS) if normalize_team_abbr(t) == t)
+    team_keys = teams + [None]
+    stat_types = list(STAT_COLUMNS)
+    n_teams, n_pos, n_stats = len(team_keys), len(MATCHUP_POSITIONS), len(stat_types)
+
+    pos_def = np.ones((n_teams, n_pos, n_stats))
+    efficiency = np.ones((n_teams, n_teams, n_stats))
+    pace = np.ones((n_teams, n_teams))
+    rebound = np.ones((n_teams, n_teams, n_stats))
+    assist = np.ones((n_teams, n_teams, n_stats))
+
+    for o, opp in enumerate(team_keys):
+        for p, pos in enumerate(MATCHUP_POSITIONS):
+            for s, stat in enumerate(stat_types):
+                pos_def[o, p, s] = get_defensive_adjustment(opp, pos, stat)
+        for t, team in enumerate(team_keys):
+            pace[t, o] = get_pace_adjustment(team, opp)
+            for s, stat in enumerate(stat_types):
+                efficiency[t, o, s] = get_efficiency_adjustment(team, opp, stat)
+                rebound[t, o, s] = get_rebound_adjustment(team, opp, stat)
+                assist[t, o, s] = get_assist_adjustment(team, opp, stat)
+
+    # Broadcast everything onto (team, opponent, position, stat, factor)
+    factors = np.empty((n_teams, n_teams, n_pos, n_stats, len(MATCHUP_FACTORS)))
+    factors[..., 0] = (pos_def[None, :, :, :] * 0.65) + (efficiency[:, :, None, :] * 0.35)
+    factors[..., 1] = pace[:, :, None, None]
+    factors[..., 2] = rebound[:, :, None, :]
+    factors[..., 3] = assist[:, :, None, :]
+    factors[..., 4] = factors[..., 0] * factors[..., 1] * factors[..., 2] * factors[..., 3]
+
+    return {
+        'teams': teams,
+        'team_index': {team: i for i, team in enumerate(teams)},
+        'position_index': {pos: i for i, pos in enumerate(MATCHUP_POSITIONS)},
+        'stat_types': stat_types,
+        'stat_index': {stat: i for i, stat in enumerate(stat_types)},
+        'factors': factors,
+        'version': hashlib.sha1(factors.tobytes()).hexdigest()[:12],
+    }
+
+def get_matchup_factors(table, player_team, opponent_team, player_position, stat_type):
+    '''Gather (defense, pace, rebound, assist, total) for one prop from the matchup table'''
+    stat_idx = table['stat_index'].get(stat_type)
+    if stat_idx is None:
+        return np.ones(len(MATCHUP_FACTORS))
+    unknown = len(table['teams'])
+    return table['factors'][
+        table['team_index'].get(player_team, unknown),
+        table['team_index'].get(opponent_team, unknown),
+        table['position_index'].get(player_position, table['position_index']['SF']),
+        stat_idx,
+    ]
+
+def dump_matchup_table(table, path):
+    '''Write the matchup table as sorted TSV so runs can be diffed'''
+    team_labels = table['teams'] + ['UNK']
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'# matchup table version {table["version"]}\n')
+        f.write('\t'.join(['team', 'opponent', 'position', 'stat_type', *MATCHUP_FACTORS]) + '\n')
+        for t, team in enumerate(team_labels):
+            for o, opp in enumerate(team_labels):
+                for p, pos in enumerate(MATCHUP_POSITIONS):
+                    for s, stat in enumerate(table['stat_types']):
+                        values = '\t'.join(f'{v:.6f}' for v in table['factors'][t, o, p, s])
+                        f.write(f'{team}\t{opp}\t{pos}\t{stat}\t{values}\n')
+    print(f'📝 Matchup table {table["version"]} written to {path}')
+
 def calculate_projection(player_stats, line, stat_type, opponent_team, player_position, player_team, player_name):
     '''Calculate projection using real stats + blended defense + pace + stat-specific adj + INJURIES'''
     if not player_stats or len(player_stats) == 0:
@@ -771,216 +946,179 @@ def calculate_projection(player_stats, line, stat_type, opponent_team, player_po
 
     return round(adjusted_projection, 1), round(prob_over, 4), confidence
 
-def run_script_safely(args: list[str], label: str, timeout: int = 60):
+# Rows per bulk update request when writing projection results back to props
+PROJECTION_WRITE_CHUNK = 250
+
+class ProjectionWriter:
+    '''Buffer projection results and write them to props in chunked bulk updates
+
+    Only the computed columns are sent, through the update_prop_projections
+    function, which updates existing rows and never inserts: a line moved or
+    a prop purged by a board sync during the run is left as the sync wrote it.
+    '''
+
+    def __init__(self, chunk_size=PROJECTION_WRITE_CHUNK, max_retries=3):
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.buffer = []
+        self.flushes = []  # (rows, seconds, attempts) per successful flush
+        self.written = 0
+        self.failed = 0
+
+    def add(self, prop, projection, probability_over, edge, confidence, fingerprint=None):
+        self.buffer.append({
+            'id': prop['id'],
+            'projection': projection,
+            'probability_over': probability_over,
+            'edge': edge,
+            'confidence': confidence,
+            'input_fingerprint': fingerprint,
+        })
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        while self.buffer:
+            chunk = self.buffer[:self.chunk_size]
+            self.buffer = self.buffer[self.chunk_size:]
+            self._write_chunk(chunk)
+
+    def _write_chunk(self, chunk):
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                context.supabase.rpc('update_prop_projections', {'updates': chunk}).execute()
+                context.update_rows('props', {row['id']: row for row in chunk})
+                elapsed = time.perf_counter() - started
+                self.flushes.append((len(chunk), elapsed, attempt))
+                self.written += len(chunk)
+                print(f'💾 Flushed {len(chunk)} projections in {elapsed:.2f}s' + (f' (attempt {attempt})' if attempt > 1 else ''))
+                return True
+            except Exception as e:
+                print(f'⚠️  Flush of {len(chunk)} rows failed (attempt {attempt}/{self.max_retries}): {str(e)[:80]}')
+                if attempt < self.max_retries:
+                    time.sleep(2 ** attempt)
+        self.failed += len(chunk)
+        return False
+
+    def summary(self):
+        if not self.flushes:
+            print(f'💾 No projection writes succeeded ({self.failed} rows failed)')
+            return
+        latencies = [secs for _, secs, _ in self.flushes]
+        retried = sum(1 for _, _, attempts in self.flushes if attempts > 1)
+        print(f'💾 Wrote {self.written} rows in {len(self.flushes)} bulk updates '
+              f'(avg {sum(latencies) / len(latencies):.2f}s, max {max(latencies):.2f}s, '
+              f'total {sum(latencies):.2f}s, {retried} retried, {self.failed} rows failed)')
+
+def parse_game_time(s):
+    '''Parse a games.game_time value into an aware UTC datetime (None if invalid)'''
     try:
-        print(f"≡ƒöº {label}...")
-        result = subprocess.run(
-            args,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=timeout,
+        dt = datetime.fromisoformat((s or '').replace('Z','+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+    except Exception:
+        return None
+
+def build_games_index(games):
+    '''Map game id -> (home_abbr, away_abbr, tipoff) from one games fetch'''
+    index = {}
+    for g in games:
+        index[g['id']] = (
+            normalize_team_abbr(g.get('home_team_abbr', 'UNK')),
+            normalize_team_abbr(g.get('away_team_abbr', 'UNK')),
+            parse_game_time(g.get('game_time')),
         )
-        out = (result.stdout or '').strip()
-        err = (result.stderr or '').strip()
-        if result.returncode == 0:
-            if out:
-                print(out[:1000])
-            print(f"Γ£à {label} complete\n")
-            return True
-        else:
-            if err:
-                print(f"ΓÜá∩╕Å  {label} warning:\n{err[:1000]}\n")
-            else:
-                print(f"ΓÜá∩╕Å  {label} warning: (no error output)\n")
-            return False
-    except Exception as e:
-        print(f"ΓÜá∩╕Å  {label} error: {e}\n")
-        return False
+    return index
+
+# A game still counts as a team's current game this long after tip-off
+GAME_IN_PROGRESS = timedelta(hours=3)
+
+# Prop ids per bulk update (keeps the in_() filter URL short)
+LINK_BATCH = 200
+
+def plan_links(props, games_index, now):
+    '''{game_id: [prop ids]} for props that should point at a different game
+
+    games_index must already be limited to the linking window. A prop stays
+    on its current game while that game involves its team, so back-to-backs
+    keep today's and tomorrow's props apart; other props go to their team's
+    next game that is not over yet (else the team's last game in the window).
+    '''
+    schedule = {}
+    for gid, (home, away, tipoff) in games_index.items():
+        for team in (home, away):
+            if team and team not in ('TBD', 'UNK'):
+                schedule.setdefault(team, []).append((tipoff, gid))
+    for games in schedule.values():
+        games.sort()
+    teams_by_game = {gid: (home, away) for gid, (home, away, _) in games_index.items()}
+
+    changes = {}
+    skipped = 0
+    for p in props:
+        team = normalize_team_abbr(p.get('team'))
+        games = schedule.get(team) if team not in (None, '', 'TBD', 'UNK') else None
+        if not games:
+            skipped += 1
+            continue
+        if team in teams_by_game.get(p.get('game_id'), ()):
+            continue
+        chosen = next((gid for tipoff, gid in games if tipoff + GAME_IN_PROGRESS >= now), games[-1][1])
+        if p.get('game_id') != chosen:
+            changes.setdefault(chosen, []).append(p['id'])
+    return changes, skipped
 
 def link_props_to_games():
+    '''Point active props at their team's game (today + tomorrow); one bulk update per target game'''
     try:
-        print('≡ƒöù Linking props to games (internal, today + tomorrow)...')
-        # Load props (id, team, game_id)
-        props_resp = supabase.table('props').select('id, team, game_id').limit(5000).execute()
-        props = props_resp.data or []
+        print('🔗 Linking props to games (internal, today + tomorrow)...')
+        props = context.props()
         if not props:
-            print('Γä╣∩╕Å  No props to link')
+            print('ℹ️  No props to link')
             return True
 
-        # Load games
-        games_resp = supabase.table('games').select('id, home_team_abbr, away_team_abbr, game_time').limit(5000).execute()
-        games = games_resp.data or []
-        if not games:
-            print('ΓÜá∩╕Å  No games available to link')
-            return False
-
-        # Consider games in the next 48 hours (UTC)
+        # Parse every tip-off once, then keep games in the next 48 hours (UTC)
         now = datetime.now(timezone.utc)
         start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         end = (now + timedelta(days=1)).replace(hour=23, minute=59, second=59, microsecond=0)
-        def parse_time(s):
-            try:
-                dt = datetime.fromisoformat((s or '').replace('Z','+00:00'))
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(timezone.utc)
-            except Exception:
-                return None
-        window_games = []
-        for g in games:
-            dt = parse_time(g.get('game_time'))
-            if dt and start <= dt <= end:
-                window_games.append(g)
-        games = window_games
-        if not games:
-            print('ΓÜá∩╕Å  No games found for today/tomorrow')
+        games_index = {gid: game for gid, game in build_games_index(context.games()).items()
+                       if game[2] and start <= game[2] <= end}
+        if not games_index:
+            print('⚠️  No games found for today/tomorrow')
             return False
 
-        # Build index by team
-        from collections import defaultdict
-        by_team = defaultdict(list)
-        for g in games:
-            home = normalize_team_abbr(g.get('home_team_abbr'))
-            away = normalize_team_abbr(g.get('away_team_abbr'))
-            if home and home not in ('TBD','UNK'):
-                by_team[home].append(g)
-            if away and away not in ('TBD','UNK'):
-                by_team[away].append(g)
-
+        changes, skipped = plan_links(props, games_index, now)
         updated = 0
-        skipped = 0
-        for p in props:
-            team = normalize_team_abbr(p.get('team'))
-            if not team or team in ('TBD','UNK'):
-                skipped += 1
-                continue
-            candidates = by_team.get(team, [])
-            if not candidates:
-                skipped += 1
-                continue
-            # Choose earliest by time
-            def sort_key(g):
-                dt = parse_time(g.get('game_time'))
-                return dt or end
-            chosen = sorted(candidates, key=sort_key)[0]
-            if p.get('game_id') != chosen['id']:
-                supabase.table('props').update({ 'game_id': chosen['id'] }).eq('id', p['id']).execute()
-                updated += 1
-        print(f'Γ£à Linked {updated} props, skipped {skipped}')
+        for game_id, prop_ids in changes.items():
+            for i in range(0, len(prop_ids), LINK_BATCH):
+                batch = prop_ids[i:i+LINK_BATCH]
+                context.supabase.table('props').update({'game_id': game_id}).in_('id', batch).execute()
+                context.update_rows('props', {prop_id: {'game_id': game_id} for prop_id in batch})
+                updated += len(batch)
+        print(f'✅ Linked {updated} props to {len(changes)} games, skipped {skipped}')
         return True
     except Exception as e:
-        print(f'ΓÜá∩╕Å  Linking error: {e}')
+        print(f'⚠️  Linking error: {e}')
         return False
 
-def step0_refresh_props():
-    print('=' * 60)
-    print('STEP 0: FETCHING PLAYER PROPS')
-    print('=' * 60)
-    
-    # Instead of calling Edge Function, run the fetch_prizepicks_props.py script directly
-    try:
-        print('📥 Fetching props from PrizePicks...')
-        result = subprocess.run(
-            [sys.executable, 'scripts/fetch_prizepicks_props.py'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=60
-        )
-        
-        if result.returncode == 0:
-            print(result.stdout)
-            print('✅ Props fetched successfully from PrizePicks')
-            return True
-        else:
-            print(f'⚠️  Error fetching props:')
-            if result.stderr:
-                print(result.stderr[:500])
-            return False
-    except Exception as e:
-        print(f'❌ Error running fetch script: {e}')
-        return False
-
-def clear_props_board():
-    """Delete all rows from props to ensure only active board props remain after refresh"""
-    try:
-        print('🗑️ Clearing existing props board...')
-        ids_resp = supabase.table('props').select('id').limit(100000).execute()
-        ids = [row['id'] for row in (ids_resp.data or [])]
-        # Batch delete to avoid URL size limits
-        batch_size = 100
-        for i in range(0, len(ids), batch_size):
-            batch = ids[i:i+batch_size]
-            supabase.table('props').delete().in_('id', batch).execute()
-        print(f'Γ£à Deleted {len(ids)} props')
-        return True
-    except Exception as e:
-        print(f'ΓÜá∩╕Å  Could not clear props board: {e}')
-        return False
-
-def main():
-    print('🚀 ADVANCED PROJECTION MODEL')
-    print('=' * 60)
-
-    # Step 0a: Clear props so we only keep active board items
-    clear_props_board()
-
-    # Step 0b: Refresh props so projections run on the latest board
-    refreshed = step0_refresh_props()
-    if refreshed:
-        print('✅ Props refreshed from board (active only)')
-        try:
-            print('🔄 Fetching player stats via PowerShell (fetch-stats.ps1)...')
-            subprocess.run([
-                'powershell',
-                '-NoProfile',
-                '-ExecutionPolicy', 'Bypass',
-                '-File', '.\\fetch-stats.ps1',
-                '-NoPause'
-            ], check=False)
-            print('✅ Player stats fetch complete\n')
-        except Exception as e:
-            print(f'⚠️  Could not run fetch-stats.ps1: {e}\n')
-    else:
-        print('⚠️  Could not verify props refresh; continuing with existing props')
-
-    # Fetch today's games from Ball Don't Lie before linking
-    ok_games = run_script_safely([sys.executable, 'scripts/fetch_balldontlie_games.py'], "Fetch today's games (Ball Don't Lie)", timeout=40)
-    if not ok_games:
-        # Secondary: try ESPN games
-        run_script_safely([sys.executable, 'scripts/fetch_espn_games.py'], "Fetch today's games (ESPN)", timeout=40)
-
-    # Step 1: Ensure games and teams are linked
-    print('🔗 Step 1: Linking Games and Teams')
-    print('=' * 60)
-    print()
-
-    # Normalize before linking to fix team variants
-    run_script_safely([sys.executable, 'scripts/fix_team_abbreviations.py'], 'Normalize team abbreviations', timeout=30)
-
-    # Link props to games (today only)
-    link_props_to_games()
-
-    # Re-link once more to catch any late fixes
-    link_props_to_games()
-
-    # NEW: Fetch injuries before calculating projections
-    print()
-    print('=' * 60)
-    print('🏥 Fetching Current NBA Injuries')
-    print('=' * 60)
-    print()
-    
-    injuries_fetched = fetch_current_injuries()
-    if injuries_fetched:
-        print(f'✅ Injury data loaded: {len(INJURY_CACHE)} players tracked')
-        print(f'   Teams with injuries: {len(TEAM_INJURIES)}')
-    else:
-        print('⚠️  Could not fetch injury data, continuing without injury adjustments')
-
+def main(dump_matchups=None, offline_stats=False, full=False):
+    """Refresh props, games, injuries and stats, then run projections (stages in scripts/pipeline.py)"""
+    from pipeline import run_daily
+    run_daily(targets=['projections'], dump_matchups=dump_matchups, offline_stats=offline_stats, full=full)
+
+def run_projections(dump_matchups=None, offline_stats=False, full=False):
+    """Project linked props on today's/tomorrow's board whose inputs changed (every prop with full=True)
+
+    Each written projection stores the input_fingerprint it was computed
+    from (line, stats window, injury and usage factors, opponent, matchup
+    table version, model version); props whose fingerprint still matches
+    keep their projection. Inputs are refreshed by the pipeline.
+    The model version (projection_engine.MODEL_VERSION) covers this file
+    too, since the probability clamp and edge cap below post-process
+    project_board() output.
+    """
     print()
     print('=' * 60)
     print('🔮 Step 2: Calculating Advanced Projections')
@@ -989,31 +1127,38 @@ def main():
 
     # Get all props
     print('📊 Fetching props from database...')
-    props_response = supabase.table('props').select('*').execute()
-    all_props = props_response.data or []
+    all_props = context.props()
     print(f'✅ Found {len(all_props)} props')
 
-    # Only process props whose game is scheduled today or tomorrow
-    games_window_resp = supabase.table('games').select('id, game_time').execute()
-    games_window = games_window_resp.data or []
+    # Only process props whose game is scheduled today or tomorrow.
+    # One games fetch feeds both the window filter and opponent lookups.
+    games_index = build_games_index(context.games())
     now = datetime.now(timezone.utc)
     start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     end = (now + timedelta(days=1)).replace(hour=23, minute=59, second=59, microsecond=0)
-    def parse_time2(s):
-        try:
-            dt = datetime.fromisoformat((s or '').replace('Z','+00:00'))
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt.astimezone(timezone.utc)
-        except Exception:
-            return None
-    window_game_ids = set(g['id'] for g in games_window if (parse_time2(g.get('game_time')) and start <= parse_time2(g.get('game_time')) <= end))
+    window_game_ids = set(gid for gid, (_, _, tipoff) in games_index.items() if tipoff and start <= tipoff <= end)
     props = [p for p in all_props if p.get('game_id') in window_game_ids]
     print(f'✅ Processing {len(props)} props scheduled for today/tomorrow\n')
 
-    updated = 0
+    # Pull every board player's recent games up front instead of one query per prop
+    print('📊 Prefetching player stats for the board...')
+    stats_by_player = prefetch_player_stats({p.get('player_name') for p in props}, offline=offline_stats)
+    print()
+
+    # Precompute every matchup factor once; the loop below just gathers from it
+    matchup_table = build_matchup_table()
+    print(f'✅ Matchup table {matchup_table["version"]}: {matchup_table["factors"].shape[:-1]} (team, opp, pos, stat)')
+    if dump_matchups:
+        dump_matchup_table(matchup_table, dump_matchups)
+    print()
+
+    writer = ProjectionWriter()
+    entries = []
+    queued = []
+    fingerprints = []
     errors = 0
     skipped = 0
+    unchanged = 0
     
     # Show first detailed example
     show_details = 1
@@ -1025,26 +1170,11 @@ def main():
             line = prop['line']
             game_id = prop['game_id']
             
-            # Get player stats
-            stats_response = supabase.table('player_stats')\
-                .select('*')\
-                .eq('player_name', player_name)\
-                .order('game_date', desc=True)\
-                .limit(15)\
-                .execute()
-            
-            player_stats = stats_response.data
-            
-            # Get game info for opponent
-            game_response = supabase.table('games')\
-                .select('*')\
-                .eq('id', game_id)\
-                .single()\
-                .execute()
-            
-            game = game_response.data
-            home_team = normalize_team_abbr(game.get('home_team_abbr', 'UNK'))
-            away_team = normalize_team_abbr(game.get('away_team_abbr', 'UNK'))
+            # Get player stats (prefetched for the whole board)
+            player_stats = stats_by_player.get(player_name, [])
+
+            # Get game info for opponent (from the in-memory games index)
+            home_team, away_team, _ = games_index[game_id]
             player_team = normalize_team_abbr(prop.get('team', ''))
             
             # Determine opponent team
@@ -1060,8 +1190,22 @@ def main():
             # Get player position
             player_position = get_player_position(player_name)
             
-            # Show detailed info for first prop
-            if i <= show_details:
+            # Collect inputs; projections for the dirty props are computed in one pass below
+            entry = (
+                player_stats,
+                line,
+                stat_type,
+                get_injury_adjustment(player_name),
+                get_usage_boost(player_name, player_team, player_position, stat_type),
+                get_matchup_factors(matchup_table, player_team, opponent_team, player_position, stat_type)[-1],
+            )
+            fingerprint = input_fingerprint(entry, player_team, opponent_team, player_position, matchup_table['version'])
+            if not full and prop.get('projection') is not None and prop.get('input_fingerprint') == fingerprint:
+                unchanged += 1
+                continue
+
+            # Show detailed info for the first recomputed prop
+            if len(queued) < show_details:
                 print(f'\n{"="*60}')
                 print(f'DETAILED PROJECTION #{i}')
                 print(f'{"="*60}')
@@ -1095,49 +1239,54 @@ def main():
                 total_adj = def_adj * pace_adj * reb_adj * ast_adj
                 print(f'\n  🔮 TOTAL ADJUSTMENT: {total_adj:.3f}x')
             
-            # Calculate projection
-            projection, prob_over, confidence = calculate_projection(
-                player_stats, line, stat_type, opponent_team, player_position, player_team, player_name
-            )
-            
-            # Cap probability between 5% and 95% to avoid extreme edges
-            prob_over = max(0.05, min(0.95, prob_over))
-            
-            # Calculate edge (capped at ±30%)
-            edge = (prob_over - 0.5) * 100
-            edge = max(-30, min(30, edge))
-            
-            # Show result for detailed example
-            if i <= show_details:
-                print(f'\n  🔮 RESULT:')
-                print(f'     Projection: {projection}')
-                print(f'     Probability Over: {prob_over:.1%}')
-                print(f'     Edge: {edge:+.1f}%')
-                print(f'     Confidence: {confidence}')
-            
-            # Update database
-            supabase.table('props').update({
-                'projection': projection,
-                'probability_over': prob_over,
-                'edge': edge,
-                'confidence': confidence
-            }).eq('id', prop['id']).execute()
-            
-            updated += 1
+            entries.append(entry)
+            queued.append(prop)
+            fingerprints.append(fingerprint)
             
             if i % 100 == 0:
-                print(f'\n[{i}/{len(props)}] Processed {updated} props, {errors} errors, {skipped} skipped')
+                print(f'\n[{i}/{len(props)}] Prepared {len(queued)} props, {unchanged} unchanged, {errors} errors, {skipped} skipped')
             
         except Exception as e:
             errors += 1
             if i <= show_details or i % 100 == 0:
                 print(f'⚠️ Error on prop {i}: {str(e)[:80]}')
     
+    print(f'\n🧮 Recomputing {len(queued)} props ({unchanged} unchanged' + (', --full' if full else '') + ')')
+
+    # Calculate projections for every queued prop at once
+    projections, probs_over, confidences = project_board(build_board(entries))
+    
+    for j, prop in enumerate(queued):
+        projection = float(projections[j])
+        confidence = str(confidences[j])
+        
+        # Cap probability between 5% and 95% to avoid extreme edges
+        prob_over = max(0.05, min(0.95, float(probs_over[j])))
+        
+        # Calculate edge (capped at ±30%)
+        edge = (prob_over - 0.5) * 100
+        edge = max(-30, min(30, edge))
+        
+        # Show result for detailed example
+        if j < show_details:
+            print(f'\n  🔮 RESULT:')
+            print(f'     Projection: {projection}')
+            print(f'     Probability Over: {prob_over:.1%}')
+            print(f'     Edge: {edge:+.1f}%')
+            print(f'     Confidence: {confidence}')
+        
+        # Queue the result; the writer sends it in chunked bulk updates
+        writer.add(prop, projection, prob_over, edge, confidence, fingerprints[j])
+    
+    writer.flush()
+    
     print()
     print('=' * 60)
     print('✅ PROJECTION UPDATE COMPLETE')
     print('=' * 60)
-    print(f'✅ Successfully updated: {updated}/{len(props)} props')
+    writer.summary()
+    print(f'✅ Successfully updated: {writer.written}/{len(queued)} recomputed props')
+    print(f'⏭️  Unchanged inputs: {unchanged}')
     print(f'⚠️  Skipped (no team): {skipped}')
     print(f'⚠️ Errors: {errors}')
     print()
@@ -1153,4 +1302,12 @@ def main():
     print('=' * 60)
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the advanced projection model')
+    parser.add_argument('--dump-matchups', metavar='PATH', help='write the precomputed matchup table as TSV')
+    parser.add_argument('--offline-stats', action='store_true', help='use the local game log store without topping it up')
+    parser.add_argument('--full', action='store_true', help='recompute every prop, not just those whose inputs changed')
+    args = parser.parse_args()
+    # pipeline.py imports this module by name; share this copy instead of loading a second one
+    sys.modules.setdefault('update_projections_with_defense', sys.modules[__name__])
+    main(dump_matchups=args.dump_matchups, offline_stats=args.offline_stats, full=args.full)
@@ -36,20 +36,31 @@ export function OddsHistoryChart({ playerName, statType }: OddsHistoryChartProps
       today.setHours(0, 0, 0, 0);
       const todayISO = today.toISOString();
 
-      const { data, error } = await supabase
-        .from('odds_history')
-        .select('*')
-        .eq('player_name', playerName)
-        .eq('stat_type', statType)
-        .gte('recorded_at', todayISO) // Only get odds from today
-        .order('recorded_at', { ascending: true });
+      const [{ data, error }, { data: before, error: beforeError }] = await Promise.all([
+        supabase
+          .from('odds_history')
+          .select('*')
+          .eq('player_name', playerName)
+          .eq('stat_type', statType)
+          .gte('recorded_at', todayISO) // Only get odds from today
+          .order('recorded_at', { ascending: true }),
+        // The tracker only writes odds that moved, so start from the last row before today
+        supabase
+          .from('odds_history')
+          .select('*')
+          .eq('player_name', playerName)
+          .eq('stat_type', statType)
+          .lt('recorded_at', todayISO)
+          .order('recorded_at', { ascending: false })
+          .limit(1),
+      ]);
       
-      if (error) {
-        console.error('Error fetching odds history:', error);
-        throw error;
+      if (error || beforeError) {
+        console.error('Error fetching odds history:', error || beforeError);
+        throw error || beforeError;
       }
       
-      return data as OddsHistoryPoint[];
+      return [...(before || []), ...(data || [])] as OddsHistoryPoint[];
     },
     enabled: open, // Only fetch when dialog is open
     refetchInterval: 60 * 60 * 1000, // Refetch every hour
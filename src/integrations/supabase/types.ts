@@ -192,6 +192,8 @@ export type Database = {
           fanduel_over_odds: number | null
           fanduel_under_odds: number | null
           prizepicks_odds: number | null
+          retired_at: string | null
+          input_fingerprint: string | null
         }
         Insert: {
           confidence?: string | null
@@ -215,6 +217,8 @@ export type Database = {
           fanduel_over_odds?: number | null
           fanduel_under_odds?: number | null
           prizepicks_odds?: number | null
+          retired_at?: string | null
+          input_fingerprint?: string | null
         }
         Update: {
           confidence?: string | null
@@ -238,6 +242,8 @@ export type Database = {
           fanduel_over_odds?: number | null
           fanduel_under_odds?: number | null
           prizepicks_odds?: number | null
+          retired_at?: string | null
+          input_fingerprint?: string | null
         }
         Relationships: [
           {
@@ -254,7 +260,10 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
-      [_ in never]: never
+      update_prop_projections: {
+        Args: { updates: Json }
+        Returns: number
+      }
     }
     Enums: {
       [_ in never]: never
@@ -37,6 +37,7 @@ export async function fetchPropsForGame(gameId: string) {
       .from('props')
       .select('*')
       .eq('game_id', gameId)
+      .is('retired_at', null)
       .order('edge', { ascending: false, nullsFirst: false });
     
     if (error) throw error;
@@ -100,6 +101,7 @@ export async function fetchAllProps() {
           game_time
         )
       `)
+      .is('retired_at', null)
       .order('edge', { ascending: false, nullsFirst: false });
     
     if (error) throw error;
@@ -155,6 +157,117 @@ export async function fetchOddsHistory(
   }
 }
 
+// Columnar history for one prop: parallel arrays, one entry per point
+export interface OddsHistorySeries {
+  player_name: string;
+  stat_type: string;
+  total: number;
+  recorded_at: string[];
+  draftkings_line: (number | null)[];
+  draftkings_over_odds: (number | null)[];
+  draftkings_under_odds: (number | null)[];
+  fanduel_line: (number | null)[];
+  fanduel_over_odds: (number | null)[];
+  fanduel_under_odds: (number | null)[];
+}
+
+export function seriesToPoints(series: OddsHistorySeries): OddsHistoryPoint[] {
+  return series.recorded_at.map((recorded_at, i) => ({
+    player_name: series.player_name,
+    stat_type: series.stat_type,
+    draftkings_line: series.draftkings_line[i],
+    draftkings_over_odds: series.draftkings_over_odds[i],
+    draftkings_under_odds: series.draftkings_under_odds[i],
+    fanduel_line: series.fanduel_line[i],
+    fanduel_over_odds: series.fanduel_over_odds[i],
+    fanduel_under_odds: series.fanduel_under_odds[i],
+    recorded_at,
+  }));
+}
+
+// One request for many props (and/or every prop in a game), optionally capped at `points` per series
+export async function fetchOddsHistoryBatch(
+  pairs: { playerName: string; statType: string }[],
+  options: { gameId?: string; points?: number } = {}
+): Promise<OddsHistorySeries[]> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/odds-history/batch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        pairs: pairs.map((p) => [p.playerName, p.statType]),
+        game_id: options.gameId,
+        points: options.points,
+      }),
+    });
+    
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    return data.series;
+  } catch (error) {
+    console.error('Error fetching odds history batch:', error);
+    return [];
+  }
+}
+
+export async function fetchGameOddsHistory(
+  gameId: string,
+  points?: number
+): Promise<OddsHistorySeries[]> {
+  return fetchOddsHistoryBatch([], { gameId, points });
+}
+
+// Retry delay when the server refuses a stream (e.g. 503 when it is at its stream limit)
+const STREAM_RETRY_MS = 30000;
+
+// Live line moves pushed by the API server; returns a function that closes the stream.
+// The server closes idle streams and EventSource reconnects on its own; moves made
+// while disconnected are covered by calling onResync on every reconnect.
+export function subscribeToLineUpdates(
+  filters: { gameId?: string; playerNames?: string[] },
+  onLines: (updates: OddsHistoryPoint[]) => void,
+  onResync?: () => void
+): () => void {
+  const params = new URLSearchParams();
+  if (filters.gameId) params.append('game_id', filters.gameId);
+  (filters.playerNames || []).forEach((name) => params.append('player_name', name));
+  
+  let source: EventSource;
+  let connected = false;
+  let closed = false;
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+  
+  const connect = () => {
+    source = new EventSource(`${API_BASE_URL}/stream?${params.toString()}`);
+    source.addEventListener('ready', () => {
+      if (connected && onResync) onResync();
+      connected = true;
+    });
+    source.addEventListener('lines', (event) => {
+      onLines(JSON.parse((event as MessageEvent).data));
+    });
+    if (onResync) {
+      source.addEventListener('resync', () => onResync());
+    }
+    source.onerror = () => {
+      // A non-200 response (503) closes the source for good; try again later
+      if (source.readyState === EventSource.CLOSED && !closed) {
+        retryTimer = setTimeout(connect, STREAM_RETRY_MS);
+      }
+    };
+  };
+  connect();
+  
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source.close();
+  };
+}
+
 export async function checkApiHealth(): Promise<boolean> {
   try {
     const response = await fetch(`${API_BASE_URL}/health`);
@@ -52,6 +52,7 @@ export default function Index() {
       const { data, error } = await supabase
         .from('props')
         .select('*')
+        .is('retired_at', null)
         .order('edge', { ascending: false });
       
       if (error) throw error;
@@ -26,6 +26,8 @@ export interface Prop {
   confidence: string | null;
   created_at: string;
   updated_at: string;
+  // Set when the prop leaves the PrizePicks board
+  retired_at: string | null;
   // Sportsbook odds
   prizepicks_odds: number | null;
   draftkings_line: number | null;
@@ -140,6 +140,48 @@ COMMENT ON COLUMN public.props.draftkings_under_odds IS 'DraftKings under odds i
 COMMENT ON COLUMN public.props.fanduel_over_odds IS 'FanDuel over odds in American format (e.g., -110, +105)';
 COMMENT ON COLUMN public.props.fanduel_under_odds IS 'FanDuel under odds in American format (e.g., -110, +105)';
 
+-- Migration 5: Soft-retire props that leave the board
+ALTER TABLE public.props
+ADD COLUMN IF NOT EXISTS retired_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_props_active ON public.props(game_id) WHERE retired_at IS NULL;
+
+COMMENT ON COLUMN public.props.retired_at IS 'When the prop left the PrizePicks board (NULL while it is on the board)';
+
+-- Migration 6: Projection input fingerprints
+ALTER TABLE public.props
+ADD COLUMN IF NOT EXISTS input_fingerprint TEXT;
+
+COMMENT ON COLUMN public.props.input_fingerprint IS 'Inputs hash of the stored projection (line, stats window, injuries, matchup, model version)';
+
+-- Migration 7: Bulk projection writes (updates only, never inserts)
+CREATE OR REPLACE FUNCTION public.update_prop_projections(updates JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.props p
+    SET projection = r.projection,
+        probability_over = r.probability_over,
+        edge = r.edge,
+        confidence = r.confidence,
+        input_fingerprint = r.input_fingerprint
+    FROM jsonb_to_recordset(updates) AS r(
+      id UUID,
+      projection DECIMAL(10, 2),
+      probability_over DECIMAL(5, 4),
+      edge DECIMAL(10, 4),
+      confidence TEXT,
+      input_fingerprint TEXT
+    )
+    WHERE p.id = r.id
+    RETURNING p.id
+  )
+  SELECT count(*)::INTEGER FROM updated;
+$$;
+
+COMMENT ON FUNCTION public.update_prop_projections(JSONB) IS 'Set projection, probability_over, edge, confidence and input_fingerprint for existing props; never inserts';
+
 -- =====================================================
 -- Setup complete!
 -- =====================================================
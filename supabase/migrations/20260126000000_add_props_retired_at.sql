@@ -0,0 +1,9 @@
+-- Props that leave the PrizePicks board are retired instead of deleted,
+-- so rows still on the board keep their projections, odds and game links
+ALTER TABLE public.props
+ADD COLUMN IF NOT EXISTS retired_at TIMESTAMP WITH TIME ZONE;
+
+-- The site and the pipeline only read active props
+CREATE INDEX IF NOT EXISTS idx_props_active ON public.props(game_id) WHERE retired_at IS NULL;
+
+COMMENT ON COLUMN public.props.retired_at IS 'When the prop left the PrizePicks board (NULL while it is on the board)';
@@ -0,0 +1,6 @@
+-- Hash of the inputs a prop's projection was computed from; the projection
+-- run only recomputes props whose current inputs hash differently
+ALTER TABLE public.props
+ADD COLUMN IF NOT EXISTS input_fingerprint TEXT;
+
+COMMENT ON COLUMN public.props.input_fingerprint IS 'Inputs hash of the stored projection (line, stats window, injuries, matchup, model version)';
@@ -0,0 +1,29 @@
+-- Bulk write of projection results: updates the computed columns of existing
+-- props only, so board columns (line, names) are never overwritten and props
+-- deleted since the run loaded them are not re-inserted
+CREATE OR REPLACE FUNCTION public.update_prop_projections(updates JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.props p
+    SET projection = r.projection,
+        probability_over = r.probability_over,
+        edge = r.edge,
+        confidence = r.confidence,
+        input_fingerprint = r.input_fingerprint
+    FROM jsonb_to_recordset(updates) AS r(
+      id UUID,
+      projection DECIMAL(10, 2),
+      probability_over DECIMAL(5, 4),
+      edge DECIMAL(10, 4),
+      confidence TEXT,
+      input_fingerprint TEXT
+    )
+    WHERE p.id = r.id
+    RETURNING p.id
+  )
+  SELECT count(*)::INTEGER FROM updated;
+$$;
+
+COMMENT ON FUNCTION public.update_prop_projections(JSONB) IS 'Set projection, probability_over, edge, confidence and input_fingerprint for existing props; never inserts';